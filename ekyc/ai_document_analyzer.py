@@ -92,8 +92,22 @@ except ImportError:
         openai_api_key = None
         elasticsearch_url = "http://localhost:9200"
         elasticsearch_index = "document_vectors"
+        embedding_cache_size = 10000
+        embedding_cache_path = ""
+        embedding_batch_size = 64
+        es_bulk_batch_size = 500
+        es_bulk_concurrency = 4
+        es_bulk_refresh_threshold = 5000
+        hybrid_search_mode = "rrf"
+        es_index_profile = "balanced"
     settings = Settings()
 
+from embedding_service import EmbeddingService
+from es_bulk import bulk_index
+from es_pool import es_pool
+from index_profiles import check_index, create_index, get_profile, num_candidates
+from elasticsearch import ApiError
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -243,6 +257,30 @@ class DocumentProcessor:
         
         return min(quality_score, 1.0)
 
+# Fields returned by the direct Elasticsearch searches
+SEARCH_SOURCE_FIELDS = [
+    "content", "title", "document_type", "category",
+    "entities", "quality_score", "classification_scores", "metadata"
+]
+
+# Hybrid search modes, most capable first; "client" fuses two searches in Python
+HYBRID_MODES = ["rrf", "combined", "client"]
+# RRF fuses ranks and cannot apply weights; other weights start from "combined"
+DEFAULT_SEMANTIC_WEIGHT = 0.7
+DEFAULT_KEYWORD_WEIGHT = 0.3
+# Error text that means the cluster lacks a hybrid mode (old version or licence), per mode
+HYBRID_MODE_FEATURES = {"rrf": ("retriever", "rrf"), "combined": ("knn",)}
+UNSUPPORTED_MARKERS = ("unknown field", "unknown key", "unknown retriever", "license", "non-compliant")
+
+
+def hybrid_mode_unsupported(error: ApiError, mode: str) -> bool:
+    """True when a 400/403 says the cluster cannot run this mode at all, not that this query was bad"""
+    if error.meta.status not in (400, 403):
+        return False
+    text = f"{error.message} {error.body}".lower()
+    return (any(marker in text for marker in UNSUPPORTED_MARKERS)
+            and any(feature in text for feature in HYBRID_MODE_FEATURES[mode]))
+
 class VectorDatabase:
     """Vector database menggunakan LangChain ElasticsearchStore"""
     
@@ -258,31 +296,58 @@ class VectorDatabase:
         
         # Initialize LangChain embeddings
         if api_key and llm_provider == "openai":
-            self.embedding_model = OpenAIEmbeddings(openai_api_key=api_key)
+            base_model = OpenAIEmbeddings(openai_api_key=api_key)
+            # Cached vectors are keyed by the actual model, so a model change never reuses them
+            model_name = base_model.model
+            self.vector_dims = 1536
         else:
             # Use HuggingFace embeddings untuk DeepSeek atau sebagai fallback
-            self.embedding_model = HuggingFaceEmbeddings(
+            base_model = HuggingFaceEmbeddings(
                 model_name='all-MiniLM-L6-v2',
                 model_kwargs={'device': 'cpu'}
             )
+            model_name = 'all-MiniLM-L6-v2'
+            self.vector_dims = 384
+        
+        # Batched, cached embeddings; the vector store uses them too
+        self.embedding_service = EmbeddingService(
+            base_model,
+            model_name=model_name,
+            max_entries=settings.embedding_cache_size,
+            cache_path=settings.embedding_cache_path,
+            batch_size=settings.embedding_batch_size
+        )
+        self.embedding_model = self.embedding_service
+        
+        # HNSW / quantisation settings for _setup_index and num_candidates per query
+        self.index_profile_name = settings.es_index_profile
+        self.index_profile = get_profile(self.index_profile_name)
+        
+        # Steps down to the next HYBRID_MODES entry when the cluster rejects one
+        self.hybrid_mode = settings.hybrid_search_mode if settings.hybrid_search_mode in HYBRID_MODES else "client"
+        
+        # Shared clients: every VectorDatabase on this cluster reuses one keep-alive pool
+        self.es_client = es_pool.get_client(elasticsearch_url)
+        self.async_es_client = es_pool.get_async_client(elasticsearch_url)
+        
+        # Create the index with the profile mapping before the vector store or
+        # a bulk load can auto-create it with dynamic mappings
+        self.index_ready = False
+        self._ensure_index()
         
         # Initialize LangChain Elasticsearch vector store
         self.vector_store = ElasticsearchStore(
-            es_url=elasticsearch_url,
+            es_connection=self.es_client,
             index_name=index_name,
-            embedding=self.embedding_model,
-            es_params={
-                "timeout": 30,
-                "max_retries": 3,
-                "retry_on_timeout": True
-            }
+            embedding=self.embedding_model
         )
         
         logger.info(f"Initialized LangChain ElasticsearchStore: {index_name} with {llm_provider}")
     
     async def initialize(self):
         """Initialize method for backward compatibility"""
-        # Components are already initialized in __init__
+        # Components are already initialized in __init__; retry the index if ES was down then
+        await self._ensure_index_async()
         return True
     
     async def store_documents(self, documents: List[dict]) -> List[str]:
@@ -297,6 +362,7 @@ class VectorDatabase:
                 ))
             
             # Add to vector store
+            await self._ensure_index_async()
             ids = self.vector_store.add_documents(langchain_docs)
             logger.info(f"Added {len(ids)} documents to vector store")
             return ids
@@ -356,6 +422,7 @@ class VectorDatabase:
                 enriched_docs.append(doc)
             
             # Add to vector store
+            await self._ensure_index_async()
             doc_ids = await asyncio.to_thread(
                 self.vector_store.add_documents,
                 enriched_docs
@@ -453,131 +520,64 @@ class VectorDatabase:
             search_kwargs=search_kwargs
         )
     
-    def _setup_index(self):
-        """Setup Elasticsearch index dengan mapping untuk vectors"""
-        
-        mapping = {
-            "mappings": {
-                "properties": {
-                    "content": {
-                        "type": "text",
-                        "analyzer": "standard"
-                    },
-                    "title": {
-                        "type": "text",
-                        "analyzer": "standard"
-                    },
-                    "document_type": {
-                        "type": "keyword"
-                    },
-                    "category": {
-                        "type": "keyword"
-                    },
-                    "vector": {
-                        "type": "dense_vector",
-                        "dims": 384,  # Dimensi untuk all-MiniLM-L6-v2
-                        "index": True,
-                        "similarity": "cosine"
-                    },
-                    "entities": {
-                        "type": "object",
-                        "properties": {
-                            "names": {"type": "keyword"},
-                            "dates": {"type": "keyword"},
-                            "numbers": {"type": "keyword"},
-                            "emails": {"type": "keyword"},
-                            "phones": {"type": "keyword"}
-                        }
-                    },
-                    "quality_score": {
-                        "type": "float"
-                    },
-                    "classification_scores": {
-                        "type": "object"
-                    },
-                    "metadata": {
-                        "type": "object"
-                    },
-                    "created_at": {
-                        "type": "date"
-                    },
-                    "document_hash": {
-                        "type": "keyword"
-                    }
-                }
-            },
-            "settings": {
-                "number_of_shards": 1,
-                "number_of_replicas": 0,
-                "index": {
-                    "knn": {
-                        "algo_param": {
-                            "ef_search": 100
-                        }
-                    }
-                }
-            }
-        }
+    def _setup_index(self, recreate: bool = False):
+        """Setup Elasticsearch index dengan mapping untuk vectors (see index_profiles)"""
         
         try:
-            if not self.es_client.indices.exists(index=self.index_name):
-                self.es_client.indices.create(index=self.index_name, body=mapping)
+            if create_index(self.es_client, self.index_name, self.index_profile_name,
+                            self.vector_dims, recreate=recreate):
                 logger.info(f"Created Elasticsearch index: {self.index_name}")
             else:
                 logger.info(f"Elasticsearch index {self.index_name} already exists")
+                mismatches = check_index(self.es_client, self.index_name, self.index_profile_name,
+                                         self.vector_dims)
+                if mismatches:
+                    logger.warning(f"Index {self.index_name} does not match profile "
+                                   f"'{self.index_profile_name}': {', '.join(mismatches)}. "
+                                   f"Recreate and reindex it to apply the profile")
+            self.index_ready = True
         except Exception as e:
             logger.error(f"Error setting up Elasticsearch index: {str(e)}")
             raise
     
-    async def add_document_async(self, 
-                               content: str,
-                               title: str = "",
-                               document_type: str = "general",
-                               category: str = "document",
-                               metadata: Dict = None,
-                               processor: DocumentProcessor = None) -> List[str]:
-        """Tambah dokumen ke vector database (async)"""
-        
-        if metadata is None:
-            metadata = {}
-        
-        if processor is None:
-            processor = DocumentProcessor()
+    def _ensure_index(self) -> bool:
+        """Set up the index once; logs and returns False while Elasticsearch is unreachable"""
+        if not self.index_ready:
+            try:
+                self._setup_index()
+            except Exception as e:
+                logger.warning(f"Index {self.index_name} not set up yet, will retry before the next write: {e}")
+        return self.index_ready
+    
+    async def _ensure_index_async(self) -> bool:
+        if self.index_ready:
+            return True
+        return await asyncio.to_thread(self._ensure_index)
+    
+    def _prepare_chunks(self,
+                        content: str,
+                        title: str,
+                        document_type: str,
+                        category: str,
+                        metadata: Dict,
+                        processor: DocumentProcessor) -> List[Dict]:
+        """Split text into chunk documents (without vectors), id'd by content hash"""
         
-        # Generate document hash untuk deduplikasi
         content_hash = hashlib.md5(content.encode()).hexdigest()
         
-        # Check if document already exists
-        existing = await self.async_es_client.search(
-            index=self.index_name,
-            body={"query": {"term": {"document_hash": content_hash}}},
-            size=1
-        )
-        
-        if existing['hits']['total']['value'] > 0:
-            logger.info(f"Document with hash {content_hash} already exists")
-            return [existing['hits']['hits'][0]['_id']]
-        
         # Process document
         entities = processor.extract_entities(content)
         classification_scores = processor.classify_document_type(content)
         quality_score = processor.calculate_document_quality(content, metadata)
         
-        # Split text into chunks
         chunks = processor.text_splitter.split_text(content)
-        doc_ids = []
-        
+        docs = []
         for i, chunk in enumerate(chunks):
-            # Generate embedding
-            embedding = self.embedding_model.encode(chunk).tolist()
-            
-            # Prepare document
-            doc = {
+            docs.append({
                 "content": chunk,
                 "title": f"{title} (chunk {i+1})" if title else f"Chunk {i+1}",
                 "document_type": document_type,
                 "category": category,
-                "vector": embedding,
                 "entities": entities,
                 "quality_score": quality_score,
                 "classification_scores": classification_scores,
@@ -590,14 +590,110 @@ class VectorDatabase:
                 },
                 "created_at": datetime.now().isoformat(),
                 "document_hash": f"{content_hash}_{i}"
-            }
-            
-            # Index document
-            result = await self.async_es_client.index(index=self.index_name, body=doc)
-            doc_ids.append(result['_id'])
+            })
+        return docs
+    
+    async def _index_chunks(self, docs: List[Dict], **bulk_options) -> Dict[str, Any]:
+        """Embed chunk documents in one pass and bulk index them"""
+        
+        await self._ensure_index_async()
+        embeddings = await self.embedding_service.aembed_documents([doc["content"] for doc in docs])
+        for doc, embedding in zip(docs, embeddings):
+            doc["vector"] = embedding
+        
+        # The chunk hash is the document id, so re-ingested chunks are skipped
+        return await bulk_index(
+            self.async_es_client,
+            self.index_name,
+            docs,
+            ids=[doc["document_hash"] for doc in docs],
+            op_type="create",
+            **bulk_options
+        )
+    
+    async def add_document_async(self, 
+                               content: str,
+                               title: str = "",
+                               document_type: str = "general",
+                               category: str = "document",
+                               metadata: Dict = None,
+                               processor: DocumentProcessor = None) -> List[str]:
+        """Tambah dokumen ke vector database (async)"""
+        
+        if metadata is None:
+            metadata = {}
+        
+        if processor is None:
+            processor = DocumentProcessor()
+        
+        docs = self._prepare_chunks(content, title, document_type, category, metadata, processor)
+        report = await self._index_chunks(docs)
+        
+        if report['failed']:
+            raise RuntimeError(f"Failed to index {report['failed']} of {len(docs)} chunks: {report['errors'][:3]}")
+        
+        logger.info(f"Added document '{title}' with {len(docs)} chunks ({report['skipped']} already indexed)")
+        return report['ids']
+    
+    async def add_documents_bulk_async(self,
+                                     entries: List[Dict[str, Any]],
+                                     processor: DocumentProcessor = None,
+                                     batch_size: Optional[int] = None,
+                                     concurrency: Optional[int] = None) -> Dict[str, Any]:
+        """Tambah banyak dokumen sekaligus lewat _bulk API (async)
+        
+        Each entry holds content and optionally title, document_type, category
+        and metadata. Returns the bulk report with per-item failures.
+        """
         
-        logger.info(f"Added document '{title}' with {len(chunks)} chunks")
-        return doc_ids
+        if processor is None:
+            processor = DocumentProcessor()
+        
+        docs = []
+        for entry in entries:
+            docs.extend(self._prepare_chunks(
+                entry["content"],
+                entry.get("title", ""),
+                entry.get("document_type", "general"),
+                entry.get("category", "document"),
+                entry.get("metadata") or {},
+                processor
+            ))
+        
+        report = await self._index_chunks(docs, batch_size=batch_size, concurrency=concurrency)
+        report['documents'] = len(entries)
+        report['chunks'] = len(docs)
+        return report
+    
+    @staticmethod
+    def _format_hit(hit: Dict) -> Dict:
+        """Search hit as a result dict, keyed by the Elasticsearch document id"""
+        source = hit['_source']
+        return {
+            "id": hit['_id'],
+            "content": source['content'],
+            "title": source['title'],
+            "document_type": source['document_type'],
+            "category": source['category'],
+            "entities": source.get('entities', {}),
+            "quality_score": source.get('quality_score', 0.0),
+            "classification_scores": source.get('classification_scores', {}),
+            "metadata": source.get('metadata', {}),
+            "score": hit['_score']
+        }
+    
+    @staticmethod
+    def _search_filters(document_type: Optional[str] = None,
+                        category: Optional[str] = None,
+                        min_quality: float = 0.0) -> List[Dict]:
+        filters = []
+        if document_type:
+            filters.append({"term": {"document_type": document_type}})
+        if category:
+            filters.append({"term": {"category": category}})
+        if min_quality > 0:
+            filters.append({"range": {"quality_score": {"gte": min_quality}}})
+        return filters
     
     async def search_similar_async(self, 
                                  query: str,
@@ -607,8 +703,8 @@ class VectorDatabase:
                                  min_quality: float = 0.0) -> List[Dict]:
         """Search similar documents menggunakan vector similarity (async)"""
         
-        # Generate query embedding
-        query_embedding = self.embedding_model.encode(query).tolist()
+        # Generate query embedding (repeated questions come from the cache)
+        query_embedding = await self.embedding_service.aembed_query(query)
         
         # Build search query dengan kNN
         search_body = {
@@ -616,82 +712,149 @@ class VectorDatabase:
                 "field": "vector",
                 "query_vector": query_embedding,
                 "k": top_k,
-                "num_candidates": top_k * 2
+                "num_candidates": num_candidates(top_k, self.index_profile)
             },
-            "query": {
-                "bool": {
-                    "filter": []
-                }
-            },
-            "_source": [
-                "content", "title", "document_type", "category", 
-                "entities", "quality_score", "classification_scores", "metadata"
-            ]
+            "_source": SEARCH_SOURCE_FIELDS
         }
         
         # Add filters
-        filters = []
-        if document_type:
-            filters.append({"term": {"document_type": document_type}})
-        if category:
-            filters.append({"term": {"category": category}})
-        if min_quality > 0:
-            filters.append({"range": {"quality_score": {"gte": min_quality}}})
-        
+        filters = self._search_filters(document_type, category, min_quality)
         if filters:
-            search_body["query"]["bool"]["filter"] = filters
+            search_body["knn"]["filter"] = filters
         
         try:
             response = await self.async_es_client.search(
                 index=self.index_name, 
                 body=search_body
             )
-            
-            results = []
-            for hit in response['hits']['hits']:
-                results.append({
-                    "content": hit['_source']['content'],
-                    "title": hit['_source']['title'],
-                    "document_type": hit['_source']['document_type'],
-                    "category": hit['_source']['category'],
-                    "entities": hit['_source']['entities'],
-                    "quality_score": hit['_source']['quality_score'],
-                    "classification_scores": hit['_source']['classification_scores'],
-                    "metadata": hit['_source']['metadata'],
-                    "score": hit['_score']
-                })
-            
-            return results
+            return [self._format_hit(hit) for hit in response['hits']['hits']]
             
         except Exception as e:
             logger.error(f"Error searching documents: {str(e)}")
             return []
     
+    @staticmethod
+    def _keyword_query(query: str) -> Dict:
+        return {
+            "multi_match": {
+                "query": query,
+                "fields": ["content^2", "title^1.5"],
+                "type": "best_fields",
+                "fuzziness": "AUTO"
+            }
+        }
+    
+    def _hybrid_body(self, mode: str, query: str, query_embedding: List[float], top_k: int,
+                     semantic_weight: float, keyword_weight: float) -> Dict:
+        """One search request that runs the keyword query and kNN together"""
+        
+        knn = {
+            "field": "vector",
+            "query_vector": query_embedding,
+            "k": top_k,
+            "num_candidates": num_candidates(top_k, self.index_profile)
+        }
+        if mode == "rrf":
+            # Rank fusion inside Elasticsearch (retrievers API, 8.14+)
+            return {
+                "retriever": {
+                    "rrf": {
+                        "retrievers": [
+                            {"standard": {"query": self._keyword_query(query)}},
+                            {"knn": knn}
+                        ],
+                        "rank_window_size": top_k * 2,
+                        "rank_constant": 60
+                    }
+                },
+                "size": top_k,
+                "_source": SEARCH_SOURCE_FIELDS
+            }
+        # knn + query in one request: scores are summed with the weights as boosts (8.4+)
+        return {
+            "knn": {**knn, "boost": semantic_weight},
+            "query": {"bool": {"must": [self._keyword_query(query)], "boost": keyword_weight}},
+            "size": top_k,
+            "_source": SEARCH_SOURCE_FIELDS
+        }
+    
     async def search_hybrid_async(self, 
                                 query: str,
                                 top_k: int = 5,
-                                semantic_weight: float = 0.7,
-                                keyword_weight: float = 0.3) -> List[Dict]:
-        """Hybrid search: kombinasi semantic dan keyword search (async)"""
+                                semantic_weight: float = DEFAULT_SEMANTIC_WEIGHT,
+                                keyword_weight: float = DEFAULT_KEYWORD_WEIGHT) -> List[Dict]:
+        """Hybrid search: kombinasi semantic dan keyword search (async)
+        
+        Sends a single request (RRF retriever, or combined kNN + query) and
+        steps down to the next mode when the cluster rejects one, ending with
+        two searches fused in Python. A mode is only dropped for later calls
+        when the error says the cluster does not support it. RRF
+        ignores weights, so a call with non-default weights starts at
+        "combined".
+        
+        Every result has search_mode, combined_score, semantic_score and
+        keyword_score. The per-signal scores are None unless search_mode is
+        "client". combined_score is only comparable within one mode:
+        - rrf: reciprocal rank fusion, sum of 1 / (60 + rank) (at most about 0.033)
+        - combined: semantic_weight * kNN similarity + keyword_weight * BM25 (unbounded)
+        - client: weighted sum of scores normalised to each search's best hit (0 to 1)
+        """
+        
+        query_embedding = await self.embedding_service.aembed_query(query)
+        
+        modes = HYBRID_MODES[HYBRID_MODES.index(self.hybrid_mode):]
+        weighted = (semantic_weight, keyword_weight) != (DEFAULT_SEMANTIC_WEIGHT, DEFAULT_KEYWORD_WEIGHT)
+        if weighted and modes[0] == "rrf":
+            modes = modes[1:]
+        for mode in modes[:-1]:
+            try:
+                response = await self.async_es_client.search(
+                    index=self.index_name,
+                    body=self._hybrid_body(mode, query, query_embedding, top_k,
+                                           semantic_weight, keyword_weight)
+                )
+            except ApiError as e:
+                if e.meta.status not in (400, 403):
+                    # Not a capability problem; fuse client-side this time only
+                    logger.error(f"Error in hybrid search: {str(e)}")
+                    break
+                if hybrid_mode_unsupported(e, mode):
+                    logger.warning(f"Hybrid search mode '{mode}' not available ({e.meta.status}), falling back")
+                    self.hybrid_mode = HYBRID_MODES[HYBRID_MODES.index(mode) + 1]
+                else:
+                    logger.warning(f"Hybrid search mode '{mode}' failed for this query ({e.meta.status}): {str(e)}")
+                continue
+            except Exception as e:
+                logger.error(f"Error in hybrid search: {str(e)}")
+                return []
+            
+            results = []
+            for hit in response['hits']['hits']:
+                result = self._format_hit(hit)
+                result['combined_score'] = hit['_score']
+                result['semantic_score'] = None
+                result['keyword_score'] = None
+                result['search_mode'] = mode
+                results.append(result)
+            return results
+        
+        return await self._search_hybrid_client_side(query, top_k, semantic_weight, keyword_weight)
+    
+    async def _search_hybrid_client_side(self,
+                                         query: str,
+                                         top_k: int,
+                                         semantic_weight: float,
+                                         keyword_weight: float) -> List[Dict]:
+        """Two searches fused in Python, for clusters without hybrid search"""
         
         # Semantic search dengan kNN
         semantic_results = await self.search_similar_async(query, top_k)
         
         # Keyword search
         keyword_search = {
-            "query": {
-                "multi_match": {
-                    "query": query,
-                    "fields": ["content^2", "title^1.5"],
-                    "type": "best_fields",
-                    "fuzziness": "AUTO"
-                }
-            },
+            "query": self._keyword_query(query),
             "size": top_k,
-            "_source": [
-                "content", "title", "document_type", "category", 
-                "entities", "quality_score", "metadata"
-            ]
+            "_source": SEARCH_SOURCE_FIELDS
         }
         
         try:
@@ -699,84 +862,58 @@ class VectorDatabase:
                 index=self.index_name, 
                 body=keyword_search
             )
-            
-            keyword_results = []
-            for hit in keyword_response['hits']['hits']:
-                keyword_results.append({
-                    "content": hit['_source']['content'],
-                    "title": hit['_source']['title'],
-                    "document_type": hit['_source']['document_type'],
-                    "category": hit['_source']['category'],
-                    "entities": hit['_source']['entities'],
-                    "quality_score": hit['_source']['quality_score'],
-                    "metadata": hit['_source']['metadata'],
-                    "score": hit['_score']
-                })
-            
-            # Combine results
-            combined_results = self._combine_search_results(
-                semantic_results, keyword_results,
-                semantic_weight, keyword_weight
-            )
-            
-            return combined_results[:top_k]
-            
+            keyword_results = [self._format_hit(hit) for hit in keyword_response['hits']['hits']]
         except Exception as e:
+            # Semantic results only, scored like a fusion without keyword hits
             logger.error(f"Error in hybrid search: {str(e)}")
-            return semantic_results
+            keyword_results = []
+        
+        # Combine results
+        combined_results = self._combine_search_results(
+            semantic_results, keyword_results,
+            semantic_weight, keyword_weight
+        )
+        for result in combined_results:
+            result['search_mode'] = "client"
+        
+        return combined_results[:top_k]
     
     def _combine_search_results(self, 
                                semantic_results: List[Dict],
                                keyword_results: List[Dict],
                                semantic_weight: float,
                                keyword_weight: float) -> List[Dict]:
-        """Combine dan rerank search results"""
+        """Combine dan rerank search results (keyed by document id)"""
         
         # Normalize scores
-        if semantic_results:
-            max_semantic = max(r['score'] for r in semantic_results)
-            for r in semantic_results:
-                r['normalized_semantic_score'] = r['score'] / max_semantic if max_semantic > 0 else 0
-        
-        if keyword_results:
-            max_keyword = max(r['score'] for r in keyword_results)
-            for r in keyword_results:
-                r['normalized_keyword_score'] = r['score'] / max_keyword if max_keyword > 0 else 0
-        
-        # Create lookup maps
+        max_semantic = max((r['score'] for r in semantic_results), default=0)
+        max_keyword = max((r['score'] for r in keyword_results), default=0)
         semantic_lookup = {
-            r['content'][:100]: r['normalized_semantic_score'] 
+            r['id']: r['score'] / max_semantic if max_semantic > 0 else 0
             for r in semantic_results
         }
         keyword_lookup = {
-            r['content'][:100]: r['normalized_keyword_score'] 
+            r['id']: r['score'] / max_keyword if max_keyword > 0 else 0
             for r in keyword_results
         }
         
         # Combine unique results
-        all_contents = set()
         all_results = {}
-        
         for result in semantic_results + keyword_results:
-            content_key = result['content'][:100]
-            if content_key not in all_results:
-                all_results[content_key] = result
-                all_contents.add(content_key)
+            all_results.setdefault(result['id'], result)
         
         # Calculate combined scores
         final_results = []
-        for content_key in all_contents:
-            result = all_results[content_key].copy()
+        for doc_id, result in all_results.items():
+            result = result.copy()
             
-            semantic_score = semantic_lookup.get(content_key, 0)
-            keyword_score = keyword_lookup.get(content_key, 0)
+            semantic_score = semantic_lookup.get(doc_id, 0)
+            keyword_score = keyword_lookup.get(doc_id, 0)
             
-            combined_score = (
+            result['combined_score'] = (
                 semantic_weight * semantic_score + 
                 keyword_weight * keyword_score
             )
-            
-            result['combined_score'] = combined_score
             result['semantic_score'] = semantic_score
             result['keyword_score'] = keyword_score
             
@@ -801,7 +938,8 @@ class VectorDatabase:
                     "total_embeddings": total_docs,
                     "index_name": self.index_name,
                     "index_size": stats['indices'][self.index_name]['total']['store']['size_in_bytes'],
-                    "embedding_model": "all-MiniLM-L6-v2" if not hasattr(self.embedding_model, 'model_name') else self.embedding_model.model_name
+                    "embedding_model": self.embedding_service.model_name,
+                    "embedding_cache": self.embedding_service.stats()
                 }
             else:
                 return {
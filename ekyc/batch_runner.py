@@ -0,0 +1,260 @@
+"""
+Batch document analysis untuk eKYC System
+Fan-out ke process pool, hasil ditulis ke JSONL saat selesai, bisa dilanjutkan dari checkpoint
+Usage: python batch_runner.py SOURCE --output results.jsonl [--workers N] [--document-type ktp]
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.pdf')
+
+# Per-process analyzer, built once by the pool initializer
+_worker_analyzer = None
+
+
+def _init_worker():
+    """Load the analyzer (and its OCR engines) inside the worker process"""
+    global _worker_analyzer
+    from document_analyzer import EKYCDocumentAnalyzer
+    _worker_analyzer = EKYCDocumentAnalyzer()
+
+
+def _analyze(file_path: str, document_type: Optional[str]) -> Dict[str, Any]:
+    """Analyze one document in a worker process"""
+    return _worker_analyzer.analyze_document(file_path, document_type).model_dump()
+
+
+def _check_archive_size(source: str, members: int, unpacked_bytes: int):
+    """Refuse archives that would unpack into too many files or too many bytes"""
+    if members > settings.batch_max_archive_members:
+        raise ValueError(f"Archive {source} has {members} members; "
+                         f"maximum {settings.batch_max_archive_members}")
+    if unpacked_bytes > settings.batch_max_extracted_size:
+        raise ValueError(f"Archive {source} unpacks to {unpacked_bytes} bytes; "
+                         f"maximum {settings.batch_max_extracted_size}")
+
+
+def collect_documents(source: str, extract_dir: Optional[str] = None) -> Tuple[str, List[str]]:
+    """Supported documents under a directory or inside a zip/tar archive
+
+    Returns the root directory and the document paths relative to it, sorted
+    so the order (and therefore the checkpoint) is stable between runs.
+    Archives are extracted into extract_dir (a temporary directory by default)
+    after their member count and unpacked size are checked against the
+    batch_max_archive_members / batch_max_extracted_size limits.
+    """
+    if os.path.isdir(source):
+        root = source
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            members = archive.infolist()
+            _check_archive_size(source, len(members), sum(member.file_size for member in members))
+            root = extract_dir or tempfile.mkdtemp(prefix="ekyc_batch_")
+            archive.extractall(root)
+    elif tarfile.is_tarfile(source):
+        with tarfile.open(source) as archive:
+            members = archive.getmembers()
+            _check_archive_size(source, len(members), sum(member.size for member in members if member.isfile()))
+            root = extract_dir or tempfile.mkdtemp(prefix="ekyc_batch_")
+            archive.extractall(root, filter='data')
+    else:
+        raise ValueError(f"Source must be a directory or a zip/tar archive: {source}")
+
+    documents = []
+    for directory, _, files in os.walk(root):
+        for name in files:
+            if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                documents.append(os.path.relpath(os.path.join(directory, name), root))
+    return root, sorted(documents)
+
+
+def load_checkpoint(output_path: str) -> Set[str]:
+    """Documents already written to the output JSONL (a torn last line is ignored)"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)['document'])
+            except (ValueError, KeyError):
+                continue
+    return done
+
+
+class BatchRunner:
+    """Analyzes a set of documents on a process pool, appending results to JSONL
+
+    Each output line holds the document's path relative to the source root, so
+    re-running with the same output file skips documents that already finished.
+    """
+
+    def __init__(self, workers: Optional[int] = None, document_type: Optional[str] = None,
+                 progress_interval: float = 10.0):
+        self.workers = workers or settings.batch_workers
+        self.document_type = document_type
+        self.progress_interval = progress_interval
+        self._progress: Dict[str, Any] = {'status': 'idle'}
+        self._lock = threading.Lock()
+
+    def progress(self) -> Dict[str, Any]:
+        """Counts, throughput and ETA of the current run"""
+        with self._lock:
+            return dict(self._progress)
+
+    def _update_progress(self, start_time: float, total: int, skipped: int, processed: int, failed: int,
+                         status: str = 'running'):
+        elapsed = time.perf_counter() - start_time
+        throughput = processed / elapsed if elapsed > 0 else 0.0
+        remaining = total - skipped - processed
+        with self._lock:
+            self._progress = {
+                'status': status,
+                'total': total,
+                'skipped': skipped,
+                'processed': processed,
+                'failed': failed,
+                'remaining': remaining,
+                'elapsed_seconds': round(elapsed, 1),
+                'docs_per_second': round(throughput, 2),
+                'eta_seconds': round(remaining / throughput, 1) if throughput > 0 else None
+            }
+
+    def run(self, source: str, output_path: str,
+            on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Analyze every document under source that is not in output_path yet"""
+        root, documents = collect_documents(source)
+        try:
+            return self._run(root, documents, output_path, on_progress)
+        finally:
+            if root != source:
+                shutil.rmtree(root, ignore_errors=True)
+
+    def _run(self, root: str, documents: List[str], output_path: str,
+             on_progress: Optional[Callable[[Dict[str, Any]], None]]) -> Dict[str, Any]:
+        done = load_checkpoint(output_path)
+        pending = [document for document in documents if document not in done]
+        total, skipped = len(documents), len(documents) - len(pending)
+        logger.info(f"Batch: {total} documents, {skipped} already in {output_path}, "
+                    f"{len(pending)} to analyze on {self.workers} workers")
+
+        start_time = time.perf_counter()
+        processed = failed = 0
+        last_report = start_time
+        self._update_progress(start_time, total, skipped, processed, failed)
+
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker
+        )
+        in_flight: Dict[Future, str] = {}
+        queue = iter(pending)
+        try:
+            with open(output_path, 'a+', encoding='utf-8') as output:
+                # Terminate a line torn by an interrupted run so new records start on their own line
+                if output.tell() > 0:
+                    output.seek(output.tell() - 1)
+                    if output.read(1) != '\n':
+                        output.write('\n')
+                while True:
+                    # Keep a bounded number of documents submitted
+                    while len(in_flight) < self.workers * 2:
+                        document = next(queue, None)
+                        if document is None:
+                            break
+                        future = executor.submit(_analyze, os.path.join(root, document), self.document_type)
+                        in_flight[future] = document
+                    if not in_flight:
+                        break
+
+                    finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        document = in_flight.pop(future)
+                        record = {'document': document, 'analyzed_at': datetime.now().isoformat()}
+                        try:
+                            record['result'] = future.result()
+                            if record['result'].get('verification_status') == 'ERROR':
+                                failed += 1
+                        except Exception as e:
+                            logger.error(f"Batch analysis failed for {document}: {e}")
+                            record['error'] = str(e)
+                            failed += 1
+                        output.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+                        output.flush()
+                        processed += 1
+
+                    self._update_progress(start_time, total, skipped, processed, failed)
+                    now = time.perf_counter()
+                    if now - last_report >= self.progress_interval:
+                        last_report = now
+                        progress = self.progress()
+                        logger.info(f"Batch progress: {processed + skipped}/{total} "
+                                    f"({progress['docs_per_second']} docs/s, ETA {progress['eta_seconds']}s)")
+                        if on_progress:
+                            on_progress(progress)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        self._update_progress(start_time, total, skipped, processed, failed, status='completed')
+        summary = {**self.progress(), 'output': output_path}
+        logger.info(f"Batch completed: {processed} analyzed ({failed} failed), {skipped} skipped "
+                    f"in {summary['elapsed_seconds']}s")
+        return summary
+
+
+def analyze_files(file_paths: List[str], workers: int,
+                  document_type: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Analyze a list of files on a process pool (no JSONL, no checkpoint)"""
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker) as executor:
+        futures = {executor.submit(_analyze, file_path, document_type): file_path for file_path in file_paths}
+        for future, file_path in futures.items():
+            try:
+                results[file_path] = future.result()
+            except Exception as e:
+                logger.error(f"Failed to analyze {file_path}: {e}")
+                results[file_path] = {'error': str(e)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch eKYC document analysis")
+    parser.add_argument('source', help="Directory or zip/tar archive of documents")
+    parser.add_argument('--output', default='outputs/batch_results.jsonl',
+                        help="JSONL results file; existing entries are skipped (resume)")
+    parser.add_argument('--workers', type=int, default=settings.batch_workers)
+    parser.add_argument('--document-type', help="Force a document type (e.g. ktp)")
+    parser.add_argument('--progress-interval', type=float, default=10.0, help="Seconds between progress logs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    runner = BatchRunner(workers=args.workers, document_type=args.document_type,
+                         progress_interval=args.progress_interval)
+    summary = runner.run(args.source, args.output)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark field extraction: per-pattern re.search (lama) vs CompiledFieldExtractor
+Usage: python benchmark_field_extraction.py [--corpus DIR] [--documents N] [--repeat R]
+"""
+import argparse
+import os
+import random
+import re
+import time
+from typing import Dict, List, Tuple
+
+from field_extraction import FIELD_PATTERNS, FIELDS_BY_DOCUMENT_TYPE, CompiledFieldExtractor
+
+
+def legacy_extract(text: str, document_type: str) -> Dict[str, str]:
+    """The previous DocumentFieldExtractor.extract_fields loop (before post-processing)"""
+    fields = {}
+    text = text.upper().strip()
+    relevant = FIELDS_BY_DOCUMENT_TYPE.get(document_type, FIELDS_BY_DOCUMENT_TYPE['ktp'])
+    for field in relevant:
+        for pattern in FIELD_PATTERNS.get(field, []):
+            match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
+            if match:
+                fields[field] = match.group(1).strip()
+                break
+    return fields
+
+
+def compiled_extract(engine: CompiledFieldExtractor, text: str, document_type: str) -> Dict[str, str]:
+    matches = engine.extract(text.upper().strip(), document_type)
+    return {field: match['value'] for field, match in matches.items()}
+
+
+NAMES = ['BUDI SANTOSO', 'SITI AMINAH', 'JOHN SMITH DOE', 'DEWI LESTARI', 'AGUS PRASETYO']
+CITIES = ['JAKARTA', 'BANDUNG', 'SURABAYA', 'MEDAN', 'MAKASSAR']
+NOISE = ['REPUBLIK INDONESIA', 'PROVINSI DKI JAKARTA', 'KOTA ADMINISTRASI', '~ ,. !', 'GOL. DARAH O']
+
+
+def _noisy(rng: random.Random, line: str) -> str:
+    """Mimic common OCR damage: case, separators, stray characters"""
+    if rng.random() < 0.3:
+        line = line.replace(':', rng.choice([' :', '', ';']))
+    if rng.random() < 0.2:
+        line = line.lower()
+    if rng.random() < 0.2:
+        line += ' ' + rng.choice(NOISE)
+    return line
+
+
+def synthetic_ktp(rng: random.Random) -> str:
+    nik = ''.join(rng.choice('0123456789') for _ in range(16))
+    lines = [
+        'PROVINSI ' + rng.choice(CITIES),
+        f'NIK : {nik}',
+        f'Nama : {rng.choice(NAMES)}',
+        f'Tempat/Tgl Lahir : {rng.choice(CITIES)}, {rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-{rng.randint(1950, 2005)}',
+        f'Jenis Kelamin : {rng.choice(["LAKI-LAKI", "PEREMPUAN"])}',
+        f'Alamat : JL. MERDEKA NO. {rng.randint(1, 200)}',
+        f'RT/RW : 00{rng.randint(1, 9)}/00{rng.randint(1, 9)}',
+        f'Agama : {rng.choice(["ISLAM", "KRISTEN", "HINDU", "BUDDHA"])}',
+        f'Pekerjaan : {rng.choice(["PEGAWAI SWASTA", "WIRASWASTA", "PELAJAR"])}',
+        'Kewarganegaraan : WNI',
+        'Berlaku Hingga : SEUMUR HIDUP'
+    ]
+    return '\n'.join(_noisy(rng, line) for line in lines)
+
+
+def synthetic_akta(rng: random.Random) -> str:
+    paragraphs = [
+        f'AKTA NOMOR : {rng.randint(1, 99)}',
+        f'Pada hari ini, tanggal {rng.randint(1, 28)} Maret {rng.randint(2000, 2024)}, menghadap kepada saya',
+        f'DIHADAPAN {rng.choice(NAMES)}, S.H., Notaris di {rng.choice(CITIES)}',
+        f'NAMA PERUSAHAAN : PT {rng.choice(["MAJU JAYA", "SINAR TERANG", "KARYA ABADI"])} TBK',
+        f'BERKEDUDUKAN DI {rng.choice(CITIES)}',
+        f'MODAL DASAR : RP {rng.randint(1, 900)}.000.000.000',
+        'MAKSUD DAN TUJUAN : PERDAGANGAN UMUM DAN JASA'
+    ]
+    filler = 'Para penghadap menerangkan bahwa anggaran dasar perseroan adalah sebagai berikut. ' * rng.randint(5, 30)
+    return '\n'.join(_noisy(rng, p) + '\n' + filler for p in paragraphs)
+
+
+def load_corpus(corpus_dir: str, documents: int, seed: int) -> List[Tuple[str, str]]:
+    """OCR outputs from a directory (akta files contain 'akta' in their name) or a synthetic set"""
+    if corpus_dir:
+        corpus = []
+        for name in sorted(os.listdir(corpus_dir)):
+            if name.endswith('.txt'):
+                with open(os.path.join(corpus_dir, name), encoding='utf-8') as f:
+                    corpus.append(('akta_perusahaan' if 'akta' in name.lower() else 'ktp', f.read()))
+        return corpus
+
+    rng = random.Random(seed)
+    return [
+        ('akta_perusahaan', synthetic_akta(rng)) if rng.random() < 0.3 else ('ktp', synthetic_ktp(rng))
+        for _ in range(documents)
+    ]
+
+
+def time_extractor(extract, corpus: List[Tuple[str, str]], repeat: int) -> float:
+    """Mean microseconds per document over the best of `repeat` runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        for document_type, text in corpus:
+            extract(text, document_type)
+        best = min(best, time.perf_counter() - start_time)
+    return best / len(corpus) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark field extraction")
+    parser.add_argument('--corpus', help="Directory of OCR output .txt files")
+    parser.add_argument('--documents', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus, args.documents, args.seed)
+    engine = CompiledFieldExtractor()
+
+    mismatches = 0
+    for document_type, text in corpus:
+        if legacy_extract(text, document_type) != compiled_extract(engine, text, document_type):
+            mismatches += 1
+
+    legacy_us = time_extractor(legacy_extract, corpus, args.repeat)
+    compiled_us = time_extractor(lambda text, doc: compiled_extract(engine, text, doc), corpus, args.repeat)
+
+    print(f"Documents:  {len(corpus)} (avg {sum(len(t) for _, t in corpus) / len(corpus):.0f} chars)")
+    print(f"Legacy:     {legacy_us:8.1f} us/doc")
+    print(f"Compiled:   {compiled_us:8.1f} us/doc  ({legacy_us / compiled_us:.2f}x)")
+    print(f"Mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark vector index profiles: recall vs latency vs size per HNSW / int8 setting and num_candidates
+Usage: python benchmark_index_profiles.py [--documents N] [--queries Q] [--k 5 10] [--factors 2 5 10 20]
+                                          [--profiles accurate balanced compact] [--output results.json]
+"""
+import argparse
+import json
+import time
+from typing import Dict, List
+
+import numpy as np
+from elasticsearch.helpers import bulk
+
+from es_pool import es_pool
+from index_profiles import (INDEX_PROFILES, MAX_NUM_CANDIDATES, create_index, get_profile, num_candidates,
+                            vector_field)
+
+
+def synthetic_vectors(rng: np.random.Generator, count: int, dims: int, clusters: int = 50) -> np.ndarray:
+    """Unit vectors grouped around random centres (closer to sentence embeddings than uniform noise)"""
+    centres = rng.normal(size=(clusters, dims))
+    vectors = centres[rng.integers(0, clusters, size=count)] + rng.normal(scale=0.6, size=(count, dims))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> List[set]:
+    """Brute-force cosine neighbours (vectors are unit length)"""
+    scores = queries @ vectors.T
+    top = np.argpartition(-scores, k, axis=1)[:, :k]
+    return [set(str(i) for i in row) for row in top]
+
+
+def load_index(client, index_name: str, profile_name: str, vectors: np.ndarray) -> Dict[str, float]:
+    """Create the benchmark index for a profile and bulk load the vectors"""
+    profile = get_profile(profile_name)
+    body = {
+        "mappings": {"properties": {"vector": vector_field(profile, vectors.shape[1])}},
+        "settings": {"number_of_shards": 1, "number_of_replicas": 0, "refresh_interval": "-1"}
+    }
+    create_index(client, index_name, profile_name, vectors.shape[1], body=body, recreate=True)
+
+    start_time = time.perf_counter()
+    bulk(client, ({"_index": index_name, "_id": str(i), "vector": vector.tolist()}
+                  for i, vector in enumerate(vectors)), chunk_size=500)
+    client.indices.refresh(index=index_name)
+    # One segment so latency reflects a single HNSW graph, not segment count
+    client.options(request_timeout=600).indices.forcemerge(index=index_name, max_num_segments=1)
+    index_seconds = time.perf_counter() - start_time
+
+    stats = client.indices.stats(index=index_name)['indices'][index_name]['total']['store']
+    return {'index_seconds': round(index_seconds, 1), 'size_mb': round(stats['size_in_bytes'] / (1024 * 1024), 1)}
+
+
+def run_queries(client, index_name: str, queries: np.ndarray, truth: List[set], k: int,
+                candidates: int) -> Dict[str, float]:
+    """Mean recall@k and latency percentiles for one num_candidates setting"""
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        response = client.search(
+            index=index_name,
+            knn={"field": "vector", "query_vector": query.tolist(), "k": k, "num_candidates": candidates},
+            size=k,
+            source=False,
+            filter_path="hits.hits._id"
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+        found = {hit['_id'] for hit in response.get('hits', {}).get('hits', [])}
+        recalls.append(len(found & expected) / k)
+
+    return {
+        'recall': round(float(np.mean(recalls)), 4),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 2),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vector index profiles")
+    parser.add_argument('--url', help="Elasticsearch URL (default ELASTICSEARCH_URL)")
+    parser.add_argument('--documents', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--dims', type=int, default=384)
+    parser.add_argument('--k', type=int, nargs='+', default=[5, 10])
+    parser.add_argument('--factors', type=int, nargs='+', default=[2, 5, 10, 20],
+                        help="num_candidates = k * factor; the profile's own setting is always included")
+    parser.add_argument('--profiles', nargs='+', default=list(INDEX_PROFILES), choices=list(INDEX_PROFILES))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--keep', action='store_true', help="Keep the benchmark indices")
+    parser.add_argument('--output', help="Write results as JSON")
+    args = parser.parse_args()
+
+    client = es_pool.get_client(args.url)
+    rng = np.random.default_rng(args.seed)
+    vectors = synthetic_vectors(rng, args.documents, args.dims)
+    queries = synthetic_vectors(rng, args.queries, args.dims)
+    truth = {k: exact_top_k(vectors, queries, k) for k in args.k}
+
+    print(f"Documents: {args.documents} x {args.dims} dims, {args.queries} queries")
+    print(f"{'profile':<10} {'type':<10} {'m':>3} {'efc':>4} {'size MB':>8} {'k':>3} {'cands':>6} "
+          f"{'recall':>7} {'p50 ms':>7} {'p95 ms':>7}")
+    results = []
+    for profile_name in args.profiles:
+        profile = get_profile(profile_name)
+        index_name = f"bench_vectors_{profile_name}"
+        loaded = load_index(client, index_name, profile_name, vectors)
+        try:
+            for k in args.k:
+                default = num_candidates(k, profile)
+                sweep = sorted({min(k * factor, MAX_NUM_CANDIDATES) for factor in args.factors} | {default})
+                for candidates in sweep:
+                    measured = run_queries(client, index_name, queries, truth[k], k, candidates)
+                    results.append({'profile': profile_name, **profile, **loaded, 'k': k,
+                                    'num_candidates': candidates, 'profile_default': candidates == default,
+                                    **measured})
+                    print(f"{profile_name:<10} {profile['index_type']:<10} {profile['m']:>3} "
+                          f"{profile['ef_construction']:>4} {loaded['size_mb']:>8} {k:>3} {candidates:>6} "
+                          f"{measured['recall']:>7.3f} {measured['p50_ms']:>7.2f} {measured['p95_ms']:>7.2f}"
+                          f"{'  (profile default)' if candidates == default else ''}")
+        finally:
+            if not args.keep:
+                client.indices.delete(index=index_name)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,12 @@ Configuration settings untuk eKYC application
 """
 import os
 from typing import Optional
+from pydantic import field_validator
 from pydantic_settings import BaseSettings
 
+# Relative data paths are resolved against this directory, not the working directory
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 class Settings(BaseSettings):
     """Application settings"""
     
@@ -34,6 +38,66 @@ class Settings(BaseSettings):
     # File Upload Configuration
     max_file_size: int = int(os.getenv("MAX_FILE_SIZE", "10485760"))  # 10MB
     allowed_extensions: list = [".pdf", ".jpg", ".jpeg", ".png", ".docx"]
+    max_request_size: int = int(os.getenv("MAX_REQUEST_SIZE", "22020096"))  # 21MB: two files plus form fields
+    upload_chunk_size: int = int(os.getenv("UPLOAD_CHUNK_SIZE", "1048576"))  # 1MB per read
+    max_concurrent_ingestions: int = int(os.getenv("MAX_CONCURRENT_INGESTIONS", "4"))
+    
+    # OCR Worker Pool Configuration
+    ocr_workers: int = int(os.getenv("OCR_WORKERS", "2"))
+    ocr_queue_depth: int = int(os.getenv("OCR_QUEUE_DEPTH", "8"))
+    ocr_submit_timeout: float = float(os.getenv("OCR_SUBMIT_TIMEOUT", "30"))
+    
+    # OCR Engine Configuration
+    ocr_parallel_engines: bool = os.getenv("OCR_PARALLEL_ENGINES", "true").lower() == "true"
+    ocr_race_engines: bool = os.getenv("OCR_RACE_ENGINES", "false").lower() == "true"
+    ocr_race_min_confidence: float = float(os.getenv("OCR_RACE_MIN_CONFIDENCE", "0.75"))
+    ocr_race_min_length: int = int(os.getenv("OCR_RACE_MIN_LENGTH", "50"))
+    tesseract_single_pass: bool = os.getenv("TESSERACT_SINGLE_PASS", "true").lower() == "true"
+    
+    # OCR Result Cache (content hash + pipeline config, LRU on disk)
+    ocr_cache_enabled: bool = os.getenv("OCR_CACHE_ENABLED", "true").lower() == "true"
+    ocr_cache_path: str = os.path.join(BASE_DIR, os.getenv("OCR_CACHE_PATH", "cache/ocr_cache.db"))
+    ocr_cache_max_mb: int = int(os.getenv("OCR_CACHE_MAX_MB", "256"))
+    
+    # Resolution normalisation before OCR preprocessing (downscale only)
+    ocr_target_text_height: float = float(os.getenv("OCR_TARGET_TEXT_HEIGHT", "32"))
+    ocr_max_image_side: int = int(os.getenv("OCR_MAX_IMAGE_SIDE", "2500"))
+    
+    # KTP Layout OCR (card detection + per-field zone OCR, falls back to full-page OCR)
+    ktp_layout_ocr: bool = os.getenv("KTP_LAYOUT_OCR", "false").lower() == "true"
+    ktp_layout_min_fields: int = int(os.getenv("KTP_LAYOUT_MIN_FIELDS", "4"))
+    
+    # Batch analysis (process pool fan-out, JSONL output with resume)
+    batch_workers: int = int(os.getenv("BATCH_WORKERS", "2"))
+    # Upper bound for the workers an API caller may request (each loads its own OCR models)
+    batch_max_workers: int = int(os.getenv("BATCH_MAX_WORKERS", "4"))
+    # /api/batch/analyze only reads server-side sources under this directory (empty: uploads only)
+    batch_source_root: str = os.getenv("BATCH_SOURCE_ROOT", "")
+    batch_max_archive_size: int = int(os.getenv("BATCH_MAX_ARCHIVE_SIZE", "524288000"))  # 500MB uploaded
+    batch_max_extracted_size: int = int(os.getenv("BATCH_MAX_EXTRACTED_SIZE", "2147483648"))  # 2GB unpacked
+    batch_max_archive_members: int = int(os.getenv("BATCH_MAX_ARCHIVE_MEMBERS", "10000"))
+    batch_archive_extensions: list = [".zip", ".tar", ".gz", ".tgz"]
+    
+    # Embedding cache (LRU keyed by model + text hash; empty path keeps it in memory only)
+    embedding_cache_size: int = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+    embedding_cache_path: str = os.getenv("EMBEDDING_CACHE_PATH", "cache/embeddings.db")
+    embedding_batch_size: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+    
+    # Shared Elasticsearch clients (one keep-alive pool per cluster per process)
+    es_connections_per_node: int = int(os.getenv("ES_CONNECTIONS_PER_NODE", "10"))
+    es_request_timeout: float = float(os.getenv("ES_REQUEST_TIMEOUT", "30"))
+    es_max_retries: int = int(os.getenv("ES_MAX_RETRIES", "3"))
+    
+    # Vector index profile (index_profiles.py): accurate, balanced or compact (int8 quantised)
+    es_index_profile: str = os.getenv("ES_INDEX_PROFILE", "balanced")
+    
+    # Hybrid search: "rrf" (retriever, ES 8.14+), "combined" (knn + query, ES 8.4+) or "client"
+    hybrid_search_mode: str = os.getenv("HYBRID_SEARCH_MODE", "rrf")
+    
+    # Elasticsearch bulk indexing (refresh is paused for loads of at least the threshold)
+    es_bulk_batch_size: int = int(os.getenv("ES_BULK_BATCH_SIZE", "500"))
+    es_bulk_concurrency: int = int(os.getenv("ES_BULK_CONCURRENCY", "4"))
+    es_bulk_refresh_threshold: int = int(os.getenv("ES_BULK_REFRESH_THRESHOLD", "5000"))
     
     # Document Processing Configuration
     chunk_size: int = int(os.getenv("CHUNK_SIZE", "1000"))
@@ -48,6 +112,12 @@ class Settings(BaseSettings):
     llm_temperature: float = float(os.getenv("LLM_TEMPERATURE", "0.1"))
     llm_max_tokens: int = int(os.getenv("LLM_MAX_TOKENS", "1500"))
     
+    @field_validator("ocr_cache_path")
+    @classmethod
+    def _resolve_data_path(cls, value: str) -> str:
+        """Values read from the environment or .env are relative to BASE_DIR too"""
+        return os.path.join(BASE_DIR, value)
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -91,6 +161,8 @@ ELASTICSEARCH_INDEX=document_vectors
 # Application Configuration
 DEBUG=true
 MAX_FILE_SIZE=10485760
+OCR_WORKERS=2
+OCR_QUEUE_DEPTH=8
 CHUNK_SIZE=1000
 CHUNK_OVERLAP=200
 SIMILARITY_THRESHOLD=0.7
@@ -9,6 +9,7 @@ from typing import Dict, Any, Optional, List
 from datetime import datetime
 from models import AnalysisResult, DocumentType
 from ocr_processor import ocr_processor, field_extractor
+from config import settings
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,8 +20,12 @@ class EKYCDocumentAnalyzer:
     def __init__(self):
         self.supported_types = [doc_type.value for doc_type in DocumentType]
         
-    def analyze_document(self, file_path: str, document_type: Optional[str] = None) -> AnalysisResult:
-        """Analyze dokumen dengan real OCR dan ekstraksi"""
+    def analyze_document(self, file_path: str, document_type: Optional[str] = None,
+                         ocr_result: Optional[Dict[str, Any]] = None) -> AnalysisResult:
+        """Analyze dokumen dengan real OCR dan ekstraksi
+        
+        ocr_result can be passed in when OCR already ran elsewhere (e.g. the OCR worker pool).
+        """
         try:
             start_time = datetime.now()
             
@@ -39,8 +44,11 @@ class EKYCDocumentAnalyzer:
             detected_type = self._detect_document_type(file_path, document_type)
             
             # Perform real OCR extraction
-            logger.info(f"Starting OCR processing for {file_path}")
-            ocr_result = ocr_processor.extract_text(file_path, use_both_engines=True)
+            if ocr_result is None:
+                logger.info(f"Starting OCR processing for {file_path}")
+                ocr_result = ocr_processor.extract_text(
+                    file_path, use_both_engines=True, layout=self.ocr_layout_for(file_path, detected_type)
+                )
             
             # Extract text from best OCR result
             best_result = ocr_result['best_result']
@@ -49,8 +57,11 @@ class EKYCDocumentAnalyzer:
             
             logger.info(f"OCR completed. Confidence: {ocr_confidence:.2f}, Text length: {len(extracted_text)}")
             
-            # Extract structured fields
-            detected_fields = field_extractor.extract_fields(extracted_text, detected_type)
+            # Extract structured fields (layout OCR already read them per zone)
+            if ocr_result.get('layout_fields'):
+                detected_fields = field_extractor.extract_layout_fields(ocr_result['layout_fields'], detected_type)
+            else:
+                detected_fields = field_extractor.extract_fields(extracted_text, detected_type)
             
             # Calculate overall confidence based on OCR and field extraction
             field_confidence = self._calculate_field_confidence(detected_fields, detected_type)
@@ -105,6 +116,14 @@ class EKYCDocumentAnalyzer:
                 metadata={'error_details': str(e)}
             )
     
+    def ocr_layout_for(self, file_path: str, document_type: Optional[str] = None) -> Optional[str]:
+        """Layout-aware OCR mode for a document, if enabled"""
+        if not settings.ktp_layout_ocr:
+            return None
+        if self._detect_document_type(file_path, document_type) == DocumentType.KTP.value:
+            return 'ktp'
+        return None
+    
     def _detect_document_type(self, file_path: str, suggested_type: Optional[str] = None) -> str:
         """Detect document type from file"""
         if suggested_type and suggested_type in self.supported_types:
@@ -343,10 +362,25 @@ class EKYCDocumentAnalyzer:
         else:
             return "NEEDS_VERIFICATION"
     
-    def batch_analyze(self, file_paths: List[str]) -> Dict[str, AnalysisResult]:
-        """Analyze multiple documents"""
+    def batch_analyze(self, file_paths: List[str], workers: int = 1) -> Dict[str, AnalysisResult]:
+        """Analyze multiple documents (on a process pool when workers > 1)"""
         results = {}
         
+        if workers > 1:
+            from batch_runner import analyze_files
+            for file_path, result in analyze_files(file_paths, workers).items():
+                if 'error' in result:
+                    results[file_path] = AnalysisResult(
+                        document_type="unknown",
+                        confidence_score=0.0,
+                        verification_status="ERROR",
+                        extracted_text="",
+                        anomalies=[f"Batch analysis error: {result['error']}"]
+                    )
+                else:
+                    results[file_path] = AnalysisResult(**result)
+            return results
+        
         for file_path in file_paths:
             try:
                 result = self.analyze_document(file_path)
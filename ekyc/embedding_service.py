@@ -0,0 +1,223 @@
+"""
+Embedding service untuk eKYC System
+Batch encoding chunk dan query dengan LRU cache (hash teks + nama model), opsional disimpan di SQLite
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    from langchain_core.embeddings import Embeddings
+except ImportError:
+    Embeddings = object
+
+
+class EmbeddingService(Embeddings):
+    """Wraps a LangChain embedding model with batching and an LRU cache
+
+    Texts missing from the cache are deduplicated and encoded together, in
+    batches of batch_size, so a document's chunks (or a set of queries) cost
+    one forward pass per batch instead of one per text. Cached vectors are
+    keyed by the model name and the sha256 of the text. With a cache_path,
+    vectors are also kept in SQLite so they survive restarts.
+    """
+
+    def __init__(self, model, model_name: str, max_entries: int = 10000,
+                 cache_path: Optional[str] = None, batch_size: int = 64):
+        self.model = model
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.cache_path = cache_path or None
+        self.batch_size = batch_size
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._initialized = False
+        self._metrics = {
+            'hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'encode_calls': 0,
+            'encoded_texts': 0,
+            'encode_seconds': 0.0,
+            'errors': 0
+        }
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}:{text}".encode('utf-8')).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            directory = os.path.dirname(self.cache_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.cache_path, timeout=10)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embedding_cache ("
+                "key TEXT PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_embedding_cache_access ON embedding_cache(last_access)")
+            self._initialized = True
+        return conn
+
+    def _remember(self, key: str, vector: List[float]):
+        self._cache[key] = vector
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def _load_from_disk(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Vectors for keys found in the SQLite cache"""
+        found = {}
+        try:
+            conn = self._connect()
+            try:
+                for start in range(0, len(keys), 500):
+                    batch = keys[start:start + 500]
+                    rows = conn.execute(
+                        f"SELECT key, vector FROM embedding_cache WHERE key IN ({','.join('?' * len(batch))})",
+                        batch
+                    ).fetchall()
+                    for key, blob in rows:
+                        found[key] = array('f', blob).tolist()
+                if found:
+                    now = time.time()
+                    conn.executemany("UPDATE embedding_cache SET last_access = ? WHERE key = ?",
+                                     [(now, key) for key in found])
+                    conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            self._metrics['errors'] += 1
+            logger.warning(f"Embedding cache read failed: {e}")
+        return found
+
+    def _store_to_disk(self, vectors: Dict[str, List[float]]):
+        try:
+            now = time.time()
+            conn = self._connect()
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embedding_cache (key, model, vector, last_access) VALUES (?, ?, ?, ?)",
+                    [(key, self.model_name, array('f', vector).tobytes(), now) for key, vector in vectors.items()]
+                )
+                # Disk keeps at most max_entries per model, least recently used go first
+                conn.execute(
+                    "DELETE FROM embedding_cache WHERE model = ? AND key NOT IN ("
+                    "SELECT key FROM embedding_cache WHERE model = ? ORDER BY last_access DESC LIMIT ?)",
+                    (self.model_name, self.model_name, self.max_entries)
+                )
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            self._metrics['errors'] += 1
+            logger.warning(f"Embedding cache write failed: {e}")
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        """Run the model over texts, batch_size texts per call"""
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            started = time.perf_counter()
+            vectors.extend(list(map(list, self.model.embed_documents(batch))))
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._metrics['encode_calls'] += 1
+                self._metrics['encoded_texts'] += len(batch)
+                self._metrics['encode_seconds'] += elapsed
+        return vectors
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embeddings for texts, in order, encoding only the ones not cached"""
+        keys = [self._key(text) for text in texts]
+        results: Dict[str, List[float]] = {}
+        with self._lock:
+            for key in keys:
+                vector = self._cache.get(key)
+                if vector is not None:
+                    self._cache.move_to_end(key)
+                    results[key] = vector
+            self._metrics['hits'] += sum(1 for key in keys if key in results)
+
+        missing = list(dict.fromkeys(key for key in keys if key not in results))
+        if missing and self.cache_path:
+            from_disk = self._load_from_disk(missing)
+            with self._lock:
+                for key, vector in from_disk.items():
+                    self._remember(key, vector)
+                self._metrics['disk_hits'] += sum(1 for key in keys if key in from_disk)
+            results.update(from_disk)
+            missing = [key for key in missing if key not in from_disk]
+
+        if missing:
+            texts_by_key = dict(zip(keys, texts))
+            encoded = dict(zip(missing, self._encode([texts_by_key[key] for key in missing])))
+            with self._lock:
+                for key, vector in encoded.items():
+                    self._remember(key, vector)
+                self._metrics['misses'] += sum(1 for key in keys if key in encoded)
+            if self.cache_path:
+                self._store_to_disk(encoded)
+            results.update(encoded)
+
+        return [results[key] for key in keys]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """LangChain Embeddings interface"""
+        return self.embed(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        """LangChain Embeddings interface"""
+        return self.embed([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed off the event loop"""
+        return await asyncio.to_thread(self.embed, texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Embed a query off the event loop"""
+        return (await asyncio.to_thread(self.embed, [text]))[0]
+
+    def clear(self):
+        """Drop cached vectors for this model (memory and disk)"""
+        with self._lock:
+            self._cache.clear()
+        if self.cache_path:
+            conn = self._connect()
+            try:
+                conn.execute("DELETE FROM embedding_cache WHERE model = ?", (self.model_name,))
+                conn.commit()
+            finally:
+                conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate and encode latency for the health endpoint"""
+        with self._lock:
+            metrics = dict(self._metrics)
+            entries = len(self._cache)
+        lookups = metrics['hits'] + metrics['disk_hits'] + metrics['misses']
+        calls = metrics['encode_calls'] or 1
+        texts = metrics['encoded_texts'] or 1
+        return {
+            'model': self.model_name,
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'persistent': bool(self.cache_path),
+            'batch_size': self.batch_size,
+            'hit_rate': round((metrics['hits'] + metrics['disk_hits']) / lookups, 3) if lookups else 0.0,
+            'avg_batch_ms': round(metrics['encode_seconds'] / calls * 1000, 1),
+            'avg_text_ms': round(metrics['encode_seconds'] / texts * 1000, 2),
+            **metrics,
+            'encode_seconds': round(metrics['encode_seconds'], 3)
+        }
@@ -0,0 +1,134 @@
+"""
+Elasticsearch bulk indexing untuk eKYC System
+Dokumen dikirim lewat _bulk API per batch, beberapa request berjalan paralel, dengan laporan kegagalan per item
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Failed items kept in a report; the counts cover all of them
+MAX_REPORTED_ERRORS = 100
+
+
+# Loads holding refresh off, per index: the first saves the setting, the last restores it
+_refresh_holds: Dict[str, Dict[str, Any]] = {}
+_refresh_locks: Dict[str, asyncio.Lock] = {}
+
+
+@asynccontextmanager
+async def refresh_disabled(client, index_name: str):
+    """Turn off periodic refresh while loading, then restore it and refresh once
+
+    Overlapping loads into the same index share one hold, so a second load
+    never saves the first one's "-1" as the setting to restore.
+    """
+    lock = _refresh_locks.setdefault(index_name, asyncio.Lock())
+    async with lock:
+        hold = _refresh_holds.get(index_name)
+        if hold is None:
+            response = await client.indices.get_settings(index=index_name, name="index.refresh_interval")
+            previous = (response.get(index_name, {}).get('settings', {})
+                        .get('index', {}).get('refresh_interval'))
+            await client.indices.put_settings(index=index_name, settings={"index": {"refresh_interval": "-1"}})
+            hold = _refresh_holds[index_name] = {'loads': 0, 'previous': previous}
+        hold['loads'] += 1
+    try:
+        yield
+    finally:
+        async with lock:
+            hold['loads'] -= 1
+            if hold['loads'] == 0:
+                del _refresh_holds[index_name]
+                # None resets the setting to the index default
+                await client.indices.put_settings(index=index_name,
+                                                  settings={"index": {"refresh_interval": hold['previous']}})
+                await client.indices.refresh(index=index_name)
+
+
+async def _send_batch(client, index_name: str, batch: List[Tuple[Optional[str], Dict[str, Any]]],
+                      op_type: str, report: Dict[str, Any]):
+    operations = []
+    for doc_id, doc in batch:
+        action = {"_index": index_name}
+        if doc_id is not None:
+            action["_id"] = doc_id
+        operations.append({op_type: action})
+        operations.append(doc)
+
+    try:
+        response = await client.bulk(operations=operations)
+    except Exception as e:
+        # The whole request failed: every item in it failed
+        report['failed'] += len(batch)
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'id': None, 'status': None, 'error': str(e), 'items': len(batch)})
+        return
+
+    for item in response['items']:
+        result = item[op_type]
+        status = result.get('status', 0)
+        if 200 <= status < 300:
+            report['indexed'] += 1
+            report['ids'].append(result['_id'])
+        elif status == 409 and op_type == 'create':
+            # Already indexed (same content hash); re-ingestion skips it
+            report['skipped'] += 1
+            report['ids'].append(result['_id'])
+        else:
+            report['failed'] += 1
+            if len(report['errors']) < MAX_REPORTED_ERRORS:
+                report['errors'].append({'id': result.get('_id'), 'status': status, 'error': result.get('error')})
+
+
+async def bulk_index(client, index_name: str, documents: List[Dict[str, Any]],
+                     ids: Optional[List[str]] = None, op_type: str = 'index',
+                     batch_size: Optional[int] = None, concurrency: Optional[int] = None,
+                     disable_refresh: Optional[bool] = None) -> Dict[str, Any]:
+    """Index documents through the _bulk API
+
+    Documents are sent batch_size at a time with up to concurrency requests in
+    flight. With op_type 'create', documents whose id already exists are
+    counted as skipped rather than failed. Refresh is turned off for the load
+    when disable_refresh is set, or by default when there are at least
+    es_bulk_refresh_threshold documents. Returns counts, the ids of indexed
+    and skipped documents, and the per-item errors.
+    """
+    batch_size = batch_size or settings.es_bulk_batch_size
+    concurrency = concurrency or settings.es_bulk_concurrency
+    if disable_refresh is None:
+        disable_refresh = len(documents) >= settings.es_bulk_refresh_threshold
+
+    items = list(zip(ids or [None] * len(documents), documents))
+    batches = [items[start:start + batch_size] for start in range(0, len(items), batch_size)]
+    report = {'indexed': 0, 'skipped': 0, 'failed': 0, 'ids': [], 'errors': [],
+              'batches': len(batches), 'refresh_disabled': disable_refresh}
+    if not batches:
+        report['seconds'] = 0.0
+        return report
+
+    slots = asyncio.Semaphore(concurrency)
+
+    async def send(batch):
+        async with slots:
+            await _send_batch(client, index_name, batch, op_type, report)
+
+    start_time = time.perf_counter()
+    if disable_refresh:
+        async with refresh_disabled(client, index_name):
+            await asyncio.gather(*(send(batch) for batch in batches))
+    else:
+        await asyncio.gather(*(send(batch) for batch in batches))
+    report['seconds'] = round(time.perf_counter() - start_time, 3)
+
+    logger.info(f"Bulk indexed {report['indexed']} documents into {index_name} "
+                f"({report['skipped']} skipped, {report['failed']} failed) "
+                f"in {report['seconds']}s, {len(batches)} batches")
+    if report['failed']:
+        logger.warning(f"Bulk indexing into {index_name}: first errors {report['errors'][:3]}")
+    return report
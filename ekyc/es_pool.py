@@ -0,0 +1,183 @@
+"""
+Elasticsearch connection pool untuk eKYC System
+Satu client sync dan satu client async per cluster per proses, berbagi keep-alive pool, dengan metrik latency
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from elastic_transport import AiohttpHttpNode, Urllib3HttpNode
+from elasticsearch import AsyncElasticsearch, Elasticsearch
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Request counters per node (base URL), shared by the sync and async node classes
+_node_stats: Dict[str, Dict[str, Any]] = {}
+_stats_lock = threading.Lock()
+
+
+def _record_start(base_url: str):
+    with _stats_lock:
+        stats = _node_stats.setdefault(base_url, {
+            'requests': 0, 'failed': 0, 'in_flight': 0, 'max_in_flight': 0, 'total_seconds': 0.0
+        })
+        stats['in_flight'] += 1
+        stats['max_in_flight'] = max(stats['max_in_flight'], stats['in_flight'])
+
+
+def _record_end(base_url: str, seconds: float, failed: bool):
+    with _stats_lock:
+        stats = _node_stats[base_url]
+        stats['in_flight'] -= 1
+        stats['requests'] += 1
+        stats['total_seconds'] += seconds
+        if failed:
+            stats['failed'] += 1
+
+
+class InstrumentedUrllib3Node(Urllib3HttpNode):
+    """Sync node that records request latency and concurrent requests"""
+
+    def perform_request(self, *args, **kwargs):
+        _record_start(self.base_url)
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = super().perform_request(*args, **kwargs)
+            failed = False
+            return response
+        finally:
+            _record_end(self.base_url, time.perf_counter() - started, failed)
+
+
+class InstrumentedAiohttpNode(AiohttpHttpNode):
+    """Async node that records request latency and concurrent requests"""
+
+    async def perform_request(self, *args, **kwargs):
+        _record_start(self.base_url)
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = await super().perform_request(*args, **kwargs)
+            failed = False
+            return response
+        finally:
+            _record_end(self.base_url, time.perf_counter() - started, failed)
+
+
+class ESClientPool:
+    """Hands out one shared sync and one shared async client per cluster
+
+    Every module asking for the same cluster (URL + user) gets the same
+    client, so HTTP keep-alive connections are reused instead of each
+    VectorDatabase, vector store or script opening its own pool. Each node
+    keeps up to connections_per_node connections. The async client is bound
+    to the event loop it was created on and is recreated if that loop closed.
+    """
+
+    def __init__(self, connections_per_node: int = 10, request_timeout: float = 30,
+                 max_retries: int = 3):
+        self.connections_per_node = connections_per_node
+        self.request_timeout = request_timeout
+        self.max_retries = max_retries
+        self._clients: Dict[Tuple, Elasticsearch] = {}
+        self._async_clients: Dict[Tuple, Tuple[AsyncElasticsearch, asyncio.AbstractEventLoop]] = {}
+        self._lock = threading.Lock()
+
+    def _options(self, username: Optional[str], password: Optional[str]) -> Dict[str, Any]:
+        options = {
+            'connections_per_node': self.connections_per_node,
+            'request_timeout': self.request_timeout,
+            'max_retries': self.max_retries,
+            'retry_on_timeout': True
+        }
+        if username:
+            options['basic_auth'] = (username, password)
+        return options
+
+    @staticmethod
+    def _key(url: Optional[str], username: Optional[str]) -> Tuple:
+        return (url or settings.elasticsearch_url, username)
+
+    def get_client(self, url: Optional[str] = None, username: Optional[str] = None,
+                   password: Optional[str] = None) -> Elasticsearch:
+        """Shared sync client for a cluster (defaults to ELASTICSEARCH_URL)"""
+        if username is None:
+            username, password = settings.elasticsearch_username, settings.elasticsearch_password
+        key = self._key(url, username)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = Elasticsearch(key[0], node_class=InstrumentedUrllib3Node,
+                                       **self._options(username, password))
+                self._clients[key] = client
+                logger.info(f"Created shared Elasticsearch client for {key[0]}")
+            return client
+
+    def get_async_client(self, url: Optional[str] = None, username: Optional[str] = None,
+                         password: Optional[str] = None) -> AsyncElasticsearch:
+        """Shared async client for a cluster, bound to the running event loop"""
+        if username is None:
+            username, password = settings.elasticsearch_username, settings.elasticsearch_password
+        key = self._key(url, username)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        with self._lock:
+            entry = self._async_clients.get(key)
+            if entry is not None:
+                client, client_loop = entry
+                if client_loop is None or not client_loop.is_closed():
+                    # A client created outside a loop binds to the first loop that uses it
+                    self._async_clients[key] = (client, client_loop or loop)
+                    return client
+            client = AsyncElasticsearch(key[0], node_class=InstrumentedAiohttpNode,
+                                        **self._options(username, password))
+            self._async_clients[key] = (client, loop)
+            logger.info(f"Created shared async Elasticsearch client for {key[0]}")
+            return client
+
+    async def close(self):
+        """Close every client (application shutdown)"""
+        with self._lock:
+            clients = list(self._clients.values())
+            async_clients = [client for client, _ in self._async_clients.values()]
+            self._clients.clear()
+            self._async_clients.clear()
+        for client in clients:
+            client.close()
+        for client in async_clients:
+            await client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Clients per cluster plus request latency and pool utilisation per node"""
+        with _stats_lock:
+            nodes = {url: dict(stats) for url, stats in _node_stats.items()}
+        for stats in nodes.values():
+            requests = stats['requests'] or 1
+            stats['avg_ms'] = round(stats['total_seconds'] / requests * 1000, 1)
+            stats['utilisation'] = round(stats['in_flight'] / self.connections_per_node, 2)
+            stats['total_seconds'] = round(stats['total_seconds'], 3)
+        with self._lock:
+            clusters = sorted({key[0] for key in list(self._clients) + list(self._async_clients)})
+            sync_count, async_count = len(self._clients), len(self._async_clients)
+        return {
+            'connections_per_node': self.connections_per_node,
+            'clusters': clusters,
+            'sync_clients': sync_count,
+            'async_clients': async_count,
+            'nodes': nodes
+        }
+
+
+# Shared by VectorDatabase, the RAG system and scripts in this process
+es_pool = ESClientPool(
+    connections_per_node=settings.es_connections_per_node,
+    request_timeout=settings.es_request_timeout,
+    max_retries=settings.es_max_retries
+)
@@ -0,0 +1,152 @@
+"""
+Index profiles untuk vector index Elasticsearch
+Parameter HNSW (m, ef_construction), kuantisasi int8 opsional, dan tuning num_candidates per query
+"""
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Elasticsearch rejects num_candidates above this
+MAX_NUM_CANDIDATES = 10000
+
+# index_type: 'hnsw' keeps float32 vectors; 'int8_hnsw' quantises them (about 4x less memory)
+# m / ef_construction: graph degree and build-time beam; higher is better recall, slower indexing
+# num_candidates_factor / min_num_candidates: per-shard candidates examined for a top-k query
+INDEX_PROFILES = {
+    'accurate': {
+        'index_type': 'hnsw',
+        'm': 32,
+        'ef_construction': 200,
+        'num_candidates_factor': 20,
+        'min_num_candidates': 100
+    },
+    'balanced': {
+        'index_type': 'hnsw',
+        'm': 16,
+        'ef_construction': 100,
+        'num_candidates_factor': 10,
+        'min_num_candidates': 50
+    },
+    'compact': {
+        'index_type': 'int8_hnsw',
+        'm': 16,
+        'ef_construction': 100,
+        'num_candidates_factor': 10,
+        'min_num_candidates': 50
+    }
+}
+
+
+def get_profile(name: str) -> Dict[str, Any]:
+    """Profile settings by name"""
+    profile = INDEX_PROFILES.get(name)
+    if profile is None:
+        raise ValueError(f"Unknown index profile: {name}. Available: {', '.join(INDEX_PROFILES)}")
+    return profile
+
+
+def num_candidates(k: int, profile: Dict[str, Any], factor: Optional[int] = None) -> int:
+    """num_candidates for a top-k kNN query under a profile
+
+    Small k still examines min_num_candidates, so recall does not collapse
+    when only a handful of results are requested.
+    """
+    factor = factor or profile['num_candidates_factor']
+    return min(max(k * factor, profile['min_num_candidates'], k), MAX_NUM_CANDIDATES)
+
+
+def vector_field(profile: Dict[str, Any], dims: int) -> Dict[str, Any]:
+    """dense_vector mapping with explicit HNSW options"""
+    return {
+        "type": "dense_vector",
+        "dims": dims,
+        "index": True,
+        "similarity": "cosine",
+        "index_options": {
+            "type": profile['index_type'],
+            "m": profile['m'],
+            "ef_construction": profile['ef_construction']
+        }
+    }
+
+
+def index_body(profile: Dict[str, Any], dims: int) -> Dict[str, Any]:
+    """Mappings and settings for the VectorDatabase document index"""
+    return {
+        "mappings": {
+            "properties": {
+                "content": {"type": "text", "analyzer": "standard"},
+                "title": {"type": "text", "analyzer": "standard"},
+                "document_type": {"type": "keyword"},
+                "category": {"type": "keyword"},
+                "vector": vector_field(profile, dims),
+                "entities": {
+                    "type": "object",
+                    "properties": {
+                        "names": {"type": "keyword"},
+                        "dates": {"type": "keyword"},
+                        "numbers": {"type": "keyword"},
+                        "emails": {"type": "keyword"},
+                        "phones": {"type": "keyword"}
+                    }
+                },
+                "quality_score": {"type": "float"},
+                "classification_scores": {"type": "object"},
+                "metadata": {"type": "object"},
+                "created_at": {"type": "date"},
+                "document_hash": {"type": "keyword"}
+            }
+        },
+        "settings": {
+            "number_of_shards": 1,
+            "number_of_replicas": 0
+        }
+    }
+
+
+def create_index(client, index_name: str, profile_name: str, dims: int,
+                 body: Optional[Dict[str, Any]] = None, recreate: bool = False) -> bool:
+    """Create index_name with the profile's vector settings; returns False if it already existed
+
+    body defaults to the VectorDatabase mapping; pass another body (built
+    with vector_field) for other indices. With recreate, an existing index
+    is deleted first.
+    """
+    profile = get_profile(profile_name)
+    if client.indices.exists(index=index_name):
+        if not recreate:
+            return False
+        client.indices.delete(index=index_name)
+
+    body = body or index_body(profile, dims)
+    client.indices.create(index=index_name, mappings=body["mappings"], settings=body.get("settings"))
+    logger.info(f"Created index {index_name} with profile '{profile_name}' "
+                f"({profile['index_type']}, m={profile['m']}, ef_construction={profile['ef_construction']})")
+    return True
+
+
+def check_index(client, index_name: str, profile_name: str, dims: int) -> List[str]:
+    """Differences between an existing index's vector mapping and a profile (empty if it matches)
+
+    Index options are fixed at creation, so an index created by another
+    profile, or auto-created with dynamic mappings, keeps its own settings
+    until it is recreated.
+    """
+    profile = get_profile(profile_name)
+    expected = vector_field(profile, dims)
+    response = client.indices.get_mapping(index=index_name)
+    mappings = next(iter(response.values()), {}).get('mappings', {})
+    actual = mappings.get('properties', {}).get('vector')
+    if actual is None:
+        return ["no 'vector' field mapping"]
+
+    mismatches = []
+    for key in ('type', 'dims', 'similarity'):
+        if actual.get(key) != expected[key]:
+            mismatches.append(f"{key}={actual.get(key)} (profile: {expected[key]})")
+    actual_options = actual.get('index_options') or {}
+    for key, value in expected['index_options'].items():
+        if actual_options.get(key) != value:
+            mismatches.append(f"index_options.{key}={actual_options.get(key)} (profile: {value})")
+    return mismatches
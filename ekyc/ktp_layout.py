@@ -0,0 +1,190 @@
+"""
+KTP Layout OCR untuk eKYC System
+Deteksi kartu, deskew, lalu OCR hanya pada zona field KTP yang sudah diketahui posisinya
+"""
+import re
+import cv2
+import pytesseract
+import numpy as np
+from typing import Dict, Any, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ID-1 card (85.6 x 54 mm), normalised so zone coordinates are stable
+CARD_WIDTH = 1012
+CARD_HEIGHT = 638
+
+# Value zones as (x0, y0, x1, y1) fractions of the deskewed card.
+# Labels sit at x < 0.25 and the photo at x > 0.72, so neither is OCR'd.
+KTP_FIELD_ZONES = {
+    'nik': (0.20, 0.155, 0.72, 0.250),
+    'nama': (0.25, 0.250, 0.72, 0.310),
+    'tempat_tanggal_lahir': (0.25, 0.305, 0.72, 0.365),
+    'jenis_kelamin': (0.25, 0.360, 0.50, 0.415),
+    'alamat': (0.25, 0.410, 0.72, 0.465),
+    'rt_rw': (0.25, 0.460, 0.72, 0.515),
+    'kel_desa': (0.25, 0.510, 0.72, 0.565),
+    'kecamatan': (0.25, 0.560, 0.72, 0.615),
+    'agama': (0.25, 0.610, 0.72, 0.665),
+    'status_perkawinan': (0.25, 0.660, 0.72, 0.715),
+    'pekerjaan': (0.25, 0.710, 0.72, 0.765),
+    'kewarganegaraan': (0.25, 0.760, 0.72, 0.815),
+    'berlaku_hingga': (0.25, 0.810, 0.72, 0.870)
+}
+
+# Single text line per zone; NIK is digits only
+LINE_CONFIG = '--oem 3 --psm 7'
+DIGIT_CONFIG = '--oem 3 --psm 7 -c tessedit_char_whitelist=0123456789'
+
+
+class KTPLayoutExtractor:
+    """Reads KTP fields from fixed zones of a detected, deskewed card"""
+
+    def __init__(self, easyocr_reader=None, min_confidence: float = 0.5):
+        self.easyocr_reader = easyocr_reader
+        self.min_confidence = min_confidence
+
+    def _order_corners(self, points: np.ndarray) -> np.ndarray:
+        """Order corners as top-left, top-right, bottom-right, bottom-left"""
+        points = points.reshape(4, 2).astype(np.float32)
+        sums = points.sum(axis=1)
+        diffs = np.diff(points, axis=1).ravel()
+        return np.array([
+            points[np.argmin(sums)],
+            points[np.argmin(diffs)],
+            points[np.argmax(sums)],
+            points[np.argmax(diffs)]
+        ], dtype=np.float32)
+
+    def detect_card(self, image: np.ndarray) -> Tuple[np.ndarray, bool]:
+        """Find the card outline and warp it to CARD_WIDTH x CARD_HEIGHT
+
+        Returns the normalised card and whether an outline was found. When no
+        outline is found the upload is assumed to be a tightly cropped card.
+        """
+        height, width = image.shape[:2]
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+
+        # Find contours on a downscaled copy
+        scale = 800.0 / max(height, width)
+        small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1 else gray
+        scale = min(scale, 1.0)
+
+        edges = cv2.Canny(cv2.GaussianBlur(small, (5, 5), 0), 50, 150)
+        edges = cv2.dilate(edges, np.ones((3, 3), np.uint8), iterations=2)
+        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        min_area = 0.2 * small.shape[0] * small.shape[1]
+        for contour in sorted(contours, key=cv2.contourArea, reverse=True)[:5]:
+            if cv2.contourArea(contour) < min_area:
+                break
+            approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+            if len(approx) != 4:
+                continue
+
+            corners = self._order_corners(approx) / scale
+            # Portrait photos of a landscape card: rotate corner order
+            top = np.linalg.norm(corners[1] - corners[0])
+            side = np.linalg.norm(corners[3] - corners[0])
+            if side > top:
+                corners = np.roll(corners, -1, axis=0)
+
+            target = np.array([[0, 0], [CARD_WIDTH - 1, 0],
+                               [CARD_WIDTH - 1, CARD_HEIGHT - 1], [0, CARD_HEIGHT - 1]], dtype=np.float32)
+            matrix = cv2.getPerspectiveTransform(corners, target)
+            return cv2.warpPerspective(gray, matrix, (CARD_WIDTH, CARD_HEIGHT)), True
+
+        return self._deskew(cv2.resize(gray, (CARD_WIDTH, CARD_HEIGHT), interpolation=cv2.INTER_AREA)), False
+
+    def _deskew(self, gray: np.ndarray) -> np.ndarray:
+        """Correct small rotations using the angle of the text pixels"""
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        points = cv2.findNonZero(binary)
+        if points is None or len(points) < 100:
+            return gray
+
+        # minAreaRect reports angles in (-90, 0] or (0, 90] depending on the OpenCV version
+        angle = cv2.minAreaRect(points)[-1]
+        if angle > 45:
+            angle -= 90
+        elif angle < -45:
+            angle += 90
+        if abs(angle) < 0.5 or abs(angle) > 15:
+            return gray
+
+        center = (gray.shape[1] // 2, gray.shape[0] // 2)
+        matrix = cv2.getRotationMatrix2D(center, angle, 1.0)
+        return cv2.warpAffine(gray, matrix, (gray.shape[1], gray.shape[0]),
+                              flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
+
+    def crop_zone(self, card: np.ndarray, zone: Tuple[float, float, float, float]) -> np.ndarray:
+        """Crop a field zone and prepare it for single-line OCR"""
+        x0, y0, x1, y1 = zone
+        crop = card[int(y0 * CARD_HEIGHT):int(y1 * CARD_HEIGHT), int(x0 * CARD_WIDTH):int(x1 * CARD_WIDTH)]
+        crop = cv2.resize(crop, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
+        _, crop = cv2.threshold(crop, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        return crop
+
+    def _ocr_zone(self, crop: np.ndarray, digits_only: bool) -> Tuple[str, float]:
+        """OCR a single-line crop with Tesseract, falling back to EasyOCR"""
+        data = pytesseract.image_to_data(
+            crop,
+            config=DIGIT_CONFIG if digits_only else LINE_CONFIG,
+            output_type=pytesseract.Output.DICT,
+            lang='eng' if digits_only else 'ind+eng'
+        )
+        words = [(word, float(conf)) for word, conf in zip(data['text'], data['conf'])
+                 if word.strip() and float(conf) > 0]
+        text = ' '.join(word for word, _ in words)
+        confidence = sum(conf for _, conf in words) / len(words) / 100.0 if words else 0.0
+
+        if confidence < self.min_confidence and self.easyocr_reader is not None:
+            results = self.easyocr_reader.readtext(
+                crop, detail=1, allowlist='0123456789' if digits_only else None
+            )
+            if results:
+                easy_confidence = sum(r[2] for r in results) / len(results)
+                if easy_confidence > confidence:
+                    text = ' '.join(r[1] for r in results)
+                    confidence = easy_confidence
+
+        return text, confidence
+
+    def _clean_value(self, field: str, text: str) -> str:
+        """Drop label remnants and separators left at the start of a zone"""
+        text = re.sub(r'^[\s:;.\-]+', '', text).strip()
+        if field == 'nik':
+            text = re.sub(r'\D', '', text)
+        return text
+
+    def extract(self, image: np.ndarray) -> Dict[str, Any]:
+        """Detect the card and OCR each field zone"""
+        card, card_detected = self.detect_card(image)
+
+        fields = {}
+        zone_pixels = 0
+        for field, zone in KTP_FIELD_ZONES.items():
+            crop = self.crop_zone(card, zone)
+            zone_pixels += crop.shape[0] * crop.shape[1] // 4  # Before the 2x upscale
+            text, confidence = self._ocr_zone(crop, digits_only=(field == 'nik'))
+            text = self._clean_value(field, text)
+            if text:
+                fields[field] = {'text': text, 'confidence': confidence}
+
+        # Split "JAKARTA, 17-08-1990" into the fields the extractor already knows
+        ttl = fields.pop('tempat_tanggal_lahir', None)
+        if ttl:
+            place, _, date = ttl['text'].partition(',')
+            if place.strip():
+                fields['tempat_lahir'] = {'text': place.strip(), 'confidence': ttl['confidence']}
+            date_match = re.search(r'\d{1,2}[-/]\d{1,2}[-/]\d{4}', date)
+            if date_match:
+                fields['tanggal_lahir'] = {'text': date_match.group(0), 'confidence': ttl['confidence']}
+
+        return {
+            'fields': fields,
+            'card_detected': card_detected,
+            'pixels_processed': zone_pixels,
+            'pixels_total': image.shape[0] * image.shape[1]
+        }
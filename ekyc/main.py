@@ -7,9 +7,9 @@ from fastapi.templating import Jinja2Templates
 from fastapi.requests import Request
 from fastapi.responses import FileResponse, JSONResponse
 import os
-import aiofiles
+import asyncio
 import logging
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 import uuid
 from datetime import datetime
 from dotenv import load_dotenv
@@ -21,6 +21,14 @@ from models import EKYCFormData, PersonalInfo, Address, ContactInfo, DocumentSub
 from document_generator import EKYCDocumentGenerator
 from document_analyzer import EKYCDocumentAnalyzer
 from ai_document_analyzer import VectorDatabase, AIDocumentAnalyzer, initialize_knowledge_base
+from ocr_worker_pool import ocr_pool, OCRQueueFullError
+from ocr_processor import ocr_processor
+from ingestion import (save_upload, save_validated_upload, ingest_pdf, ingestion_stats, known_upload_hash,
+                       UploadRejectedError, UploadSizeLimitMiddleware)
+from batch_runner import BatchRunner
+from config import settings
+import model_registry
+from es_pool import es_pool
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -31,6 +39,14 @@ from rag_system import EKYCKnowledgeBase, EKYCRAGSystem, initialize_ekyc_knowled
 RAG_UNAVAILABLE_MSG = "RAG system not available"
 
 app = FastAPI(title="eKYC System", description="Electronic Know Your Customer System")
+# Oversize multipart bodies are refused before the form is parsed
+app.add_middleware(UploadSizeLimitMiddleware,
+                   paths=["/upload-document/", "/submit-ekyc", "/analyze-document",
+                          "/api/knowledge/embed-pdf"])
+# Batch archives have their own limit, plus room for the form fields
+app.add_middleware(UploadSizeLimitMiddleware,
+                   paths=["/api/batch/analyze"],
+                   max_body_bytes=settings.batch_max_archive_size + 65536)
 
 # Setup directories
 UPLOAD_DIR = "uploads"
@@ -79,6 +95,12 @@ rag_system = None
 async def startup_event():
     """Initialize knowledge base saat aplikasi start"""
     global rag_system
+    
+    # Start OCR workers so their engines are warm before the first upload
+    ocr_pool.start()
+    # In-process OCR (submit-ekyc) shares one reader; load it in the background
+    model_registry.warm_up(['id', 'en'], gpu=False)
+    
     try:
         await initialize_knowledge_base(vector_db, api_key, llm_provider)
         logger.info(f"Knowledge base initialized successfully with {llm_provider}")
@@ -90,6 +112,37 @@ async def startup_event():
         logger.error(f"Failed to initialize knowledge base: {str(e)}")
         rag_system = None
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers"""
+    ocr_pool.shutdown()
+    await es_pool.close()
+
+async def analyze_with_ocr_pool(file_path: str, document_type: Optional[str] = None):
+    """Run OCR on the worker pool, then field extraction and scoring"""
+    layout = document_analyzer.ocr_layout_for(file_path, document_type)
+    
+    # Repeat uploads are answered from the OCR cache without queueing on the pool
+    content_hash = None
+    ocr_result = None
+    if ocr_processor.cache is not None and ocr_processor.cache.enabled:
+        # Hashed while the upload was streamed to disk, unless it has been forgotten since
+        content_hash = known_upload_hash(file_path)
+        if content_hash is None:
+            content_hash = await asyncio.to_thread(ocr_processor.cache.hash_file, file_path)
+        cache_key = ocr_processor.cache_key(file_path, use_both_engines=True,
+                                            content_hash=content_hash, layout=layout)
+        ocr_result = await asyncio.to_thread(ocr_processor.cache.get, cache_key)
+        if ocr_result is not None:
+            ocr_result['cache_hit'] = True
+    
+    if ocr_result is None:
+        # A miss here is final: the worker only stores the result, so hit/miss counts stay in this process
+        ocr_result = await ocr_pool.submit(file_path, use_both_engines=True,
+                                           content_hash=content_hash, layout=layout,
+                                           check_cache=content_hash is None)
+    return await asyncio.to_thread(document_analyzer.analyze_document, file_path, document_type, ocr_result)
+
 @app.get("/")
 async def home(request: Request):
     """Homepage dengan form eKYC"""
@@ -120,17 +173,18 @@ async def upload_document(file: UploadFile = File(...), document_type: str = For
         unique_filename = f"{uuid.uuid4()}{file_extension}"
         file_path = os.path.join(UPLOAD_DIR, unique_filename)
         
-        # Save file
-        async with aiofiles.open(file_path, 'wb') as f:
-            content = await file.read()
-            await f.write(content)
+        # Save file in chunks, checking type and size on the way
+        saved = await save_validated_upload(file, file_path)
         
         return {
             "message": "File uploaded successfully",
             "filename": unique_filename,
             "document_type": document_type,
-            "file_size": len(content)
+            "file_size": saved['size'],
+            "sha256": saved['sha256']
         }
+    except UploadRejectedError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
@@ -143,8 +197,10 @@ async def analyze_document_by_filename_post(filename: str, document_type: str =
             raise HTTPException(status_code=404, detail="File not found")
         
         # Use document analyzer for image/PDF files
-        result = document_analyzer.analyze_document(file_path, document_type)
+        result = await analyze_with_ocr_pool(file_path, document_type)
         return result
+    except OCRQueueFullError as e:
+        raise HTTPException(status_code=503, detail=f"OCR workers busy: {str(e)}", headers={"Retry-After": "5"})
     except Exception as e:
         logger.error(f"Analysis error: {e}")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
@@ -157,8 +213,10 @@ async def analyze_document_by_filename(filename: str, document_type: str = None)
         if not os.path.exists(file_path):
             raise HTTPException(status_code=404, detail="File not found")
         
-        result = document_analyzer.analyze_document(file_path, document_type)
+        result = await analyze_with_ocr_pool(file_path, document_type)
         return result
+    except OCRQueueFullError as e:
+        raise HTTPException(status_code=503, detail=f"OCR workers busy: {str(e)}", headers={"Retry-After": "5"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
@@ -170,8 +228,10 @@ async def api_analyze_document_by_filename(filename: str, document_type: str = N
         if not os.path.exists(file_path):
             raise HTTPException(status_code=404, detail="File not found")
         
-        result = document_analyzer.analyze_document(file_path, document_type)
+        result = await analyze_with_ocr_pool(file_path, document_type)
         return result
+    except OCRQueueFullError as e:
+        raise HTTPException(status_code=503, detail=f"OCR workers busy: {str(e)}", headers={"Retry-After": "5"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
@@ -183,8 +243,10 @@ async def api_analyze_document_by_filename_post(filename: str, document_type: st
         if not os.path.exists(file_path):
             raise HTTPException(status_code=404, detail="File not found")
         
-        result = document_analyzer.analyze_document(file_path, document_type)
+        result = await analyze_with_ocr_pool(file_path, document_type)
         return result
+    except OCRQueueFullError as e:
+        raise HTTPException(status_code=503, detail=f"OCR workers busy: {str(e)}", headers={"Retry-After": "5"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
@@ -363,16 +425,12 @@ async def submit_ekyc(request: Request):
         
         if selfie and hasattr(selfie, 'filename') and selfie.filename:
             selfie_path = os.path.join(UPLOAD_DIR, f"{file_id}_selfie_{selfie.filename}")
-            async with aiofiles.open(selfie_path, "wb") as buffer:
-                content = await selfie.read()
-                await buffer.write(content)
+            await save_validated_upload(selfie, selfie_path)
             form_data.photo_selfie_path = selfie_path
         
         if document_image and hasattr(document_image, 'filename') and document_image.filename:
             document_path = os.path.join(UPLOAD_DIR, f"{file_id}_document_{document_image.filename}")
-            async with aiofiles.open(document_path, "wb") as buffer:
-                content = await document_image.read()
-                await buffer.write(content)
+            await save_validated_upload(document_image, document_path)
         
         # Generate PDF document
         pdf_path = os.path.join(OUTPUT_DIR, f"ekyc_{file_id}.pdf")
@@ -441,16 +499,12 @@ async def analyze_document_endpoint(
         file_id = str(uuid.uuid4())
         
         document_path = os.path.join(UPLOAD_DIR, f"{file_id}_doc_{document.filename}")
-        async with aiofiles.open(document_path, "wb") as buffer:
-            content = await document.read()
-            await buffer.write(content)
+        await save_validated_upload(document, document_path)
         
         selfie_path = None
         if selfie:
             selfie_path = os.path.join(UPLOAD_DIR, f"{file_id}_selfie_{selfie.filename}")
-            async with aiofiles.open(selfie_path, "wb") as buffer:
-                content = await selfie.read()
-                await buffer.write(content)
+            await save_validated_upload(selfie, selfie_path)
         
         # Analyze document dengan AI RAG
         ai_analysis = await ai_analyzer.analyze_document_with_rag(
@@ -460,6 +514,8 @@ async def analyze_document_endpoint(
         
         return JSONResponse(content=ai_analysis)
     
+    except UploadRejectedError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -515,6 +571,30 @@ async def add_knowledge_endpoint(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/add-knowledge/bulk")
+async def add_knowledge_bulk_endpoint(entries: List[Dict[str, Any]]):
+    """Endpoint untuk menambah banyak knowledge sekaligus (_bulk API)"""
+    
+    if not entries or any(not entry.get("content") for entry in entries):
+        raise HTTPException(status_code=400, detail="Every entry needs content")
+    
+    try:
+        report = await vector_db.add_documents_bulk_async(entries)
+        
+        return JSONResponse(content={
+            "message": "Knowledge bulk load finished",
+            "documents": report["documents"],
+            "chunks": report["chunks"],
+            "indexed": report["indexed"],
+            "skipped": report["skipped"],
+            "failed": report["failed"],
+            "errors": report["errors"],
+            "seconds": report["seconds"]
+        })
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/search-knowledge")
 async def search_knowledge_endpoint(
     q: str,
@@ -636,12 +716,130 @@ async def health_check():
             "services": {
                 "vector_database": vector_status,
                 "rag_system": rag_status,
-                "ai_analyzer": "healthy"
+                "ai_analyzer": "healthy",
+                "ocr_pool": ocr_pool.stats(),
+                "ocr_models": model_registry.registry_stats(),
+                "ocr_cache": ocr_processor.cache.stats() if ocr_processor.cache else None,
+                "pdf_ingestion": ingestion_stats(),
+                "embeddings": vector_db.embedding_service.stats(),
+                "elasticsearch_pool": es_pool.stats()
             }
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Health check failed: {str(e)}")
 
+# Batch runs started from the API; results live in their JSONL files
+batch_runs: Dict[str, Dict[str, Any]] = {}
+# Finished runs kept for status queries; older ones are dropped when a new run starts
+MAX_FINISHED_BATCH_RUNS = 100
+
+def _resolve_batch_source(source: str) -> str:
+    """Resolve a server-side batch source, which must lie under batch_source_root"""
+    if not settings.batch_source_root:
+        raise HTTPException(status_code=403,
+                            detail="Server-side batch sources are disabled; upload an archive instead")
+    root = os.path.realpath(settings.batch_source_root)
+    path = os.path.realpath(os.path.join(root, source))
+    if os.path.commonpath([root, path]) != root:
+        raise HTTPException(status_code=403, detail="Batch source must be inside the batch source root")
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail=f"Source not found: {source}")
+    return path
+
+def _check_output_free(output_name: str):
+    """Two runs appending to one JSONL would interleave their records"""
+    if any(run["output"] == output_name and not run["task"].done() for run in batch_runs.values()):
+        raise HTTPException(status_code=409, detail=f"A running batch is already writing {output_name}")
+
+def _prune_batch_runs():
+    finished = [batch_id for batch_id, run in batch_runs.items() if run["task"].done()]
+    for batch_id in finished[:max(0, len(finished) - MAX_FINISHED_BATCH_RUNS)]:
+        del batch_runs[batch_id]
+
+async def _run_batch(runner: BatchRunner, source: str, output_path: str, uploaded: bool) -> Dict[str, Any]:
+    try:
+        return await asyncio.to_thread(runner.run, source, output_path)
+    finally:
+        if uploaded and os.path.exists(source):
+            os.remove(source)
+
+@app.post("/api/batch/analyze")
+async def start_batch_analysis(
+    source: Optional[str] = Form(None),
+    archive: Optional[UploadFile] = File(None),
+    document_type: Optional[str] = Form(None),
+    workers: Optional[int] = Form(None),
+    output: Optional[str] = Form(None)
+):
+    """Analyze an uploaded zip/tar, or a directory/archive under BATCH_SOURCE_ROOT, in the background
+    
+    Pass the .jsonl output name of an earlier run to resume it (not while that
+    run is still going). workers is capped at BATCH_MAX_WORKERS. Uploaded
+    archives are deleted when the run ends.
+    """
+    if not source and archive is None:
+        raise HTTPException(status_code=400, detail="Provide a source path or an archive upload")
+    if workers is not None:
+        if workers < 1:
+            raise HTTPException(status_code=400, detail="workers must be at least 1")
+        workers = min(workers, settings.batch_max_workers)
+    
+    output_name = os.path.basename(output) if output else None
+    if output_name is not None:
+        if not output_name.endswith(".jsonl"):
+            raise HTTPException(status_code=400, detail="output must be a .jsonl file name")
+        _check_output_free(output_name)
+    
+    batch_id = str(uuid.uuid4())
+    if archive is not None:
+        source = os.path.join(UPLOAD_DIR, f"batch_{batch_id}{os.path.splitext(archive.filename or '')[1].lower()}")
+        try:
+            await save_upload(archive, source, max_bytes=settings.batch_max_archive_size,
+                              allowed_extensions=settings.batch_archive_extensions)
+        except UploadRejectedError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+    else:
+        source = _resolve_batch_source(source)
+    
+    _prune_batch_runs()
+    if output_name is not None:
+        # Checked again: another request may have claimed the name during the upload
+        _check_output_free(output_name)
+    output_name = output_name or f"batch_{batch_id}.jsonl"
+    output_path = os.path.join(OUTPUT_DIR, output_name)
+    runner = BatchRunner(workers=workers, document_type=document_type)
+    batch_runs[batch_id] = {
+        "runner": runner,
+        "task": asyncio.create_task(_run_batch(runner, source, output_path, uploaded=archive is not None)),
+        "output": output_name,
+        "started_at": datetime.now().isoformat()
+    }
+    
+    return {
+        "batch_id": batch_id,
+        "status_url": f"/api/batch/{batch_id}",
+        "results_url": f"/outputs/{output_name}"
+    }
+
+@app.get("/api/batch/{batch_id}")
+async def get_batch_status(batch_id: str):
+    """Progress, throughput and ETA of a batch run"""
+    run = batch_runs.get(batch_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    status = run["runner"].progress()
+    task = run["task"]
+    if task.done() and task.exception() is not None:
+        status.update(status="failed", error=str(task.exception()))
+    
+    return {
+        "batch_id": batch_id,
+        "started_at": run["started_at"],
+        "results_url": f"/outputs/{run['output']}",
+        **status
+    }
+
 @app.get("/api/statistics")
 async def get_statistics():
     """Get system statistics"""
@@ -805,22 +1003,17 @@ async def embed_pdf_to_knowledge(file: UploadFile = File(...), document_type: st
         file_id = str(uuid.uuid4())
         temp_file_path = os.path.join(UPLOAD_DIR, f"{file_id}.pdf")
         
-        async with aiofiles.open(temp_file_path, 'wb') as f:
-            content = await file.read()
-            await f.write(content)
-        
-        # Extract text from PDF (you might need to implement PDF text extraction)
-        # For now, we'll use a placeholder
-        pdf_content = extract_pdf_text(temp_file_path)
+        # Stream to disk and extract text page by page
+        ingested = await ingest_pdf(file, temp_file_path)
         
         # Add to knowledge base
         chunks_created = await rag_system.knowledge_base.add_document({
             "title": file.filename,
-            "content": pdf_content,
+            "content": ingested['text'],
             "document_type": "pdf",
             "source": file.filename,
             "metadata": {
-                "file_size": len(content),
+                "file_size": ingested['size'],
                 "upload_date": datetime.now().isoformat(),
                 "file_id": file_id
             }
@@ -833,9 +1026,16 @@ async def embed_pdf_to_knowledge(file: UploadFile = File(...), document_type: st
             "message": "PDF embedded successfully",
             "filename": file.filename,
             "chunks_created": chunks_created,
-            "file_id": file_id
+            "file_id": file_id,
+            "pages": ingested['pages'],
+            "memory": ingested['memory']
         }
         
+    except HTTPException:
+        raise
+    except UploadRejectedError as e:
+        # save_upload has already removed the partial file
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         logger.error(f"PDF embedding error: {e}")
         # Clean up temp file if exists
@@ -1094,27 +1294,6 @@ async def get_document_image(document_id: str):
         logger.error(f"Document image error: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get document image: {str(e)}")
 
-def extract_pdf_text(file_path: str) -> str:
-    """Extract text from PDF file"""
-    try:
-        # Try to use PyMuPDF if available, otherwise fallback
-        try:
-            import fitz  # PyMuPDF
-            doc = fitz.open(file_path)
-            text = ""
-            for page in doc:
-                text += page.get_text()
-            doc.close()
-            return text
-        except ImportError:
-            # Fallback: return file info if PyMuPDF not available
-            file_size = os.path.getsize(file_path)
-            return f"PDF Document: {os.path.basename(file_path)}\nFile Size: {file_size} bytes\nNote: Full text extraction requires PyMuPDF library"
-            
-    except Exception as e:
-        logger.error(f"PDF text extraction error: {e}")
-        return f"Error extracting text from PDF: {str(e)}"
-
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
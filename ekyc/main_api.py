@@ -17,7 +17,6 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import aiofiles
 import logging
 from dotenv import load_dotenv
 
@@ -26,8 +25,10 @@ load_dotenv()
 
 # Import our modules
 from document_analyzer import EKYCDocumentAnalyzer
-from ai_document_analyzer import DocumentProcessor, VectorDatabase
+from ai_document_analyzer import DocumentProcessor
 from config import Settings
+from es_pool import es_pool
+from ingestion import save_validated_upload, UploadRejectedError, UploadSizeLimitMiddleware
 from models import KnowledgeBaseEntry
 from add_knowledge import KnowledgeManager
 
@@ -49,6 +50,8 @@ class DocumentUploadResponse(BaseModel):
     file_id: str
     status: str
     message: str
+    size: Optional[int] = None
+    sha256: Optional[str] = None
 
 class DocumentAnalysisResponse(BaseModel):
     file_id: str
@@ -93,6 +96,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Oversize multipart bodies are refused before the form is parsed
+app.add_middleware(UploadSizeLimitMiddleware, paths=["/api/upload-document/"])
+
 # Setup directories
 UPLOAD_DIR = Path("uploads")
 OUTPUT_DIR = Path("outputs")
@@ -136,12 +142,8 @@ async def startup_event():
         )
         logger.info("Document processor initialized")
         
-        # Initialize vector database
-        vector_db = VectorDatabase(
-            index_name="ekyc_knowledge_base",
-            api_key=settings.deepseek_api_key,
-            llm_provider=settings.llm_provider
-        )
+        # Reuse the knowledge manager's vector database (same index, same clients)
+        vector_db = knowledge_manager.vector_db
         logger.info("Vector database initialized")
         
         logger.info("🚀 eKYC System startup completed successfully!")
@@ -150,6 +152,11 @@ async def startup_event():
         logger.error(f"❌ Startup failed: {str(e)}")
         raise
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close shared Elasticsearch clients"""
+    await es_pool.close()
+
 # ========== WEB ROUTES ==========
 
 @app.get("/", response_class=HTMLResponse)
@@ -184,7 +191,8 @@ async def health_check():
         "services": {
             "knowledge_manager": knowledge_manager is not None,
             "document_processor": document_processor is not None,
-            "vector_db": vector_db is not None
+            "vector_db": vector_db is not None,
+            "elasticsearch_pool": es_pool.stats()
         }
     }
 
@@ -196,39 +204,27 @@ async def upload_document(file: UploadFile = File(...)):
         if not file.filename:
             raise HTTPException(status_code=400, detail="No file provided")
         
-        # Check file type
-        allowed_types = [".jpg", ".jpeg", ".png", ".pdf"]
-        file_ext = Path(file.filename).suffix.lower()
-        if file_ext not in allowed_types:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"File type not supported. Allowed: {', '.join(allowed_types)}"
-            )
-        
-        # Check file size (10MB limit)
-        max_size = 10 * 1024 * 1024  # 10MB
-        if file.size and file.size > max_size:
-            raise HTTPException(status_code=400, detail="File too large. Maximum 10MB allowed")
-        
         # Generate unique filename
         file_id = str(uuid.uuid4())
-        safe_filename = f"{file_id}_{file.filename}"
+        safe_filename = f"{file_id}_{Path(file.filename).name}"
         file_path = UPLOAD_DIR / safe_filename
         
-        # Save file
-        async with aiofiles.open(file_path, 'wb') as f:
-            content = await file.read()
-            await f.write(content)
+        # Stream to disk; type (extension + magic bytes) and size are checked as it arrives
+        saved = await save_validated_upload(file, str(file_path))
         
-        logger.info(f"File uploaded: {safe_filename} ({len(content)} bytes)")
+        logger.info(f"File uploaded: {safe_filename} ({saved['size']} bytes)")
         
         return DocumentUploadResponse(
             filename=safe_filename,
             file_id=file_id,
             status="uploaded",
-            message="File uploaded successfully"
+            message="File uploaded successfully",
+            size=saved['size'],
+            sha256=saved['sha256']
         )
         
+    except UploadRejectedError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except HTTPException:
         raise
     except Exception as e:
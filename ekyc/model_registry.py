@@ -0,0 +1,99 @@
+"""
+Model registry: one shared OCR model per (engine, languages) in each process
+The same copy lives in ekyc_ai/model_registry.py: the two apps are installed and run separately
+(own requirements, setup, bare imports from their own folder), so they share no package. Change both together.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+_models: Dict[Tuple, object] = {}
+_model_stats: Dict[str, Dict] = {}
+_key_locks: Dict[Tuple, threading.Lock] = {}
+_registry_lock = threading.Lock()
+_warm_up_thread: Optional[threading.Thread] = None
+
+
+def _rss_mb() -> Optional[float]:
+    """Current resident set size in MB, if psutil is installed"""
+    if not PSUTIL_AVAILABLE:
+        return None
+    return psutil.Process(os.getpid()).memory_info().rss / (1024 * 1024)
+
+
+def _key_name(key: Tuple) -> str:
+    engine, languages, gpu = key
+    return f"{engine}[{'+'.join(languages)}]{'@gpu' if gpu else ''}"
+
+
+def get_easyocr_reader(languages: List[str] = ('id', 'en'), gpu: bool = True):
+    """Get the shared EasyOCR reader for a language set, loading it on first use"""
+    key = ('easyocr', tuple(sorted(languages)), gpu)
+
+    reader = _models.get(key)
+    if reader is not None:
+        return reader
+
+    with _registry_lock:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+
+    # Only one thread loads a given model; others wait and reuse it
+    with key_lock:
+        reader = _models.get(key)
+        if reader is not None:
+            return reader
+
+        import easyocr
+
+        rss_before = _rss_mb()
+        start_time = time.perf_counter()
+        reader = easyocr.Reader(list(languages), gpu=gpu)
+        load_seconds = time.perf_counter() - start_time
+        rss_after = _rss_mb()
+
+        _models[key] = reader
+        _model_stats[_key_name(key)] = {
+            'load_seconds': round(load_seconds, 3),
+            'rss_delta_mb': round(rss_after - rss_before, 1) if rss_after is not None else None,
+            'loaded_at': time.time()
+        }
+        logger.info(f"Loaded {_key_name(key)} in {load_seconds:.2f}s")
+        return reader
+
+
+def warm_up(languages: List[str] = ('id', 'en'), gpu: bool = True, background: bool = True):
+    """Load the default OCR models ahead of the first request"""
+    global _warm_up_thread
+
+    def _load():
+        try:
+            get_easyocr_reader(languages, gpu)
+        except Exception as e:
+            logger.error(f"OCR model warm-up failed: {str(e)}")
+
+    if not background:
+        _load()
+        return
+
+    if _warm_up_thread is None or not _warm_up_thread.is_alive():
+        _warm_up_thread = threading.Thread(target=_load, name="ocr-model-warm-up", daemon=True)
+        _warm_up_thread.start()
+
+
+def registry_stats() -> Dict:
+    """Loaded models with their load time and memory cost"""
+    return {
+        'models': dict(_model_stats),
+        'warming_up': _warm_up_thread is not None and _warm_up_thread.is_alive(),
+        'rss_mb': round(_rss_mb(), 1) if PSUTIL_AVAILABLE else None
+    }
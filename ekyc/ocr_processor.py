@@ -4,42 +4,115 @@ Real OCR implementation using Tesseract and EasyOCR
 """
 import os
 import re
+import threading
+import time
 import cv2
 import pytesseract
-import easyocr
 import numpy as np
 from PIL import Image
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 import logging
 
+from config import settings
+from model_registry import get_easyocr_reader
+from ocr_cache import OCRResultCache
+from ktp_layout import KTPLayoutExtractor
+from resolution import normalize_resolution
+from field_extraction import FIELD_PATTERNS, FIELDS_BY_DOCUMENT_TYPE, field_engine
+
 logger = logging.getLogger(__name__)
 
+# Race-mode losers still running in the background; beyond this the race waits for both engines
+MAX_RACE_STRAGGLERS = 2
+
+# Labels used when turning KTP layout fields back into text
+KTP_FIELD_LABELS = {
+    'nik': 'NIK',
+    'nama': 'Nama',
+    'tempat_lahir': 'Tempat Lahir',
+    'tanggal_lahir': 'Tanggal Lahir',
+    'jenis_kelamin': 'Jenis Kelamin',
+    'alamat': 'Alamat',
+    'rt_rw': 'RT/RW',
+    'kel_desa': 'Kel/Desa',
+    'kecamatan': 'Kecamatan',
+    'agama': 'Agama',
+    'status_perkawinan': 'Status Perkawinan',
+    'pekerjaan': 'Pekerjaan',
+    'kewarganegaraan': 'Kewarganegaraan',
+    'berlaku_hingga': 'Berlaku Hingga'
+}
+
 class OCRProcessor:
     """Real OCR processor using multiple OCR engines"""
     
-    def __init__(self):
+    def __init__(self, parallel_engines: bool = False, race_engines: bool = False,
+                 race_min_confidence: float = 0.75, race_min_length: int = 50,
+                 tesseract_single_pass: bool = True, cache: Optional[OCRResultCache] = None,
+                 ktp_layout_min_fields: int = 4, target_text_height: float = 32,
+                 max_image_side: int = 2500):
         self.tesseract_config = '--oem 3 --psm 6'  # Use LSTM OCR Engine with uniform text block
-        self.easyocr_reader = None
-        self._init_easyocr()
+        self.tesseract_single_pass = tesseract_single_pass  # Derive text from image_to_data only
+        self._easyocr_reader = None
+        self._easyocr_failed = False
         
-    def _init_easyocr(self):
-        """Initialize EasyOCR reader"""
-        try:
-            # Initialize with Indonesian and English
-            self.easyocr_reader = easyocr.Reader(['id', 'en'], gpu=False)
-            logger.info("EasyOCR initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize EasyOCR: {e}")
-            self.easyocr_reader = None
+        # Dual-engine mode: run Tesseract and EasyOCR at the same time on one decoded image
+        self.parallel_engines = parallel_engines
+        self.race_engines = race_engines
+        self.race_min_confidence = race_min_confidence
+        self.race_min_length = race_min_length
+        self._stragglers = 0
+        self._stragglers_lock = threading.Lock()
+        
+        # Results are cached by image content + pipeline config
+        self.cache = cache
+        
+        # Layout-aware KTP mode: OCR only the known field zones of the card
+        self.ktp_layout_min_fields = ktp_layout_min_fields
+        self._layout_extractor = None
+        
+        # Downscale before preprocessing so phone photos are not denoised at full resolution
+        self.target_text_height = target_text_height
+        self.max_image_side = max_image_side
+        
+    @property
+    def easyocr_reader(self):
+        """Shared EasyOCR reader from the model registry, loaded on first use"""
+        if self._easyocr_reader is None and not self._easyocr_failed:
+            try:
+                # Indonesian and English
+                self._easyocr_reader = get_easyocr_reader(['id', 'en'], gpu=False)
+            except Exception as e:
+                logger.error(f"Failed to initialize EasyOCR: {e}")
+                self._easyocr_failed = True
+        return self._easyocr_reader
+    
+    def load_image(self, image_path: str) -> np.ndarray:
+        """Decode image file once so it can be shared between engines"""
+        image = cv2.imread(image_path)
+        if image is None:
+            raise ValueError(f"Could not read image: {image_path}")
+        return image
+    
+    def prepare_image(self, image_path: str) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """Decode and normalise resolution once; the result is shared by both engines"""
+        start_time = time.perf_counter()
+        image = self.load_image(image_path)
+        decoded_time = time.perf_counter()
+        
+        image, info = normalize_resolution(image, self.target_text_height, self.max_image_side)
+        info['decode_seconds'] = round(decoded_time - start_time, 4)
+        info['normalize_seconds'] = round(time.perf_counter() - decoded_time, 4)
+        return image, info
     
-    def preprocess_image(self, image_path: str) -> Tuple[np.ndarray, np.ndarray]:
+    def preprocess_image(self, image_path: str, image: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
         """Preprocess image for better OCR results"""
         try:
             # Read image
-            image = cv2.imread(image_path)
             if image is None:
-                raise ValueError(f"Could not read image: {image_path}")
+                image, _ = self.prepare_image(image_path)
             
             # Convert to grayscale
             gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
@@ -63,10 +136,40 @@ class OCRProcessor:
             logger.error(f"Error preprocessing image {image_path}: {e}")
             raise
     
-    def extract_text_tesseract(self, image_path: str) -> Dict[str, Any]:
+    def _text_from_tesseract_data(self, data: Dict[str, List]) -> str:
+        """Rebuild full text from image_to_data output, keeping line and block structure"""
+        blocks = []
+        current_block = None
+        current_line = None
+        
+        for i, word in enumerate(data['text']):
+            if data['level'][i] != 5 or not str(word).strip():
+                continue
+            
+            block_key = (data['page_num'][i], data['block_num'][i], data['par_num'][i])
+            line_key = block_key + (data['line_num'][i],)
+            
+            if block_key != current_block:
+                blocks.append([])
+                current_block = block_key
+                current_line = None
+            if line_key != current_line:
+                blocks[-1].append([])
+                current_line = line_key
+            blocks[-1][-1].append(str(word))
+        
+        # Same layout as image_to_string: words by space, lines by newline, paragraphs by blank line
+        return '\n\n'.join(
+            '\n'.join(' '.join(line) for line in block)
+            for block in blocks
+        )
+    
+    def extract_text_tesseract(self, image_path: str, image: Optional[np.ndarray] = None) -> Dict[str, Any]:
         """Extract text using Tesseract OCR"""
         try:
-            original, processed = self.preprocess_image(image_path)
+            start_time = time.perf_counter()
+            original, processed = self.preprocess_image(image_path, image)
+            preprocessed_time = time.perf_counter()
             
             # Extract text with confidence data
             data = pytesseract.image_to_data(
@@ -77,23 +180,28 @@ class OCRProcessor:
             )
             
             # Extract full text
-            text = pytesseract.image_to_string(
-                processed, 
-                config=self.tesseract_config,
-                lang='ind+eng'
-            )
+            if self.tesseract_single_pass:
+                # Rebuild text from the same LSTM run instead of calling image_to_string
+                text = self._text_from_tesseract_data(data)
+            else:
+                text = pytesseract.image_to_string(
+                    processed, 
+                    config=self.tesseract_config,
+                    lang='ind+eng'
+                )
             
-            # Calculate average confidence
-            confidences = [int(conf) for conf in data['conf'] if int(conf) > 0]
+            # Calculate average confidence (newer Tesseract reports float confidences)
+            word_confidences = [float(conf) for conf in data['conf']]
+            confidences = [conf for conf in word_confidences if conf > 0]
             avg_confidence = sum(confidences) / len(confidences) if confidences else 0
             
             # Extract word-level data
             words = []
             for i in range(len(data['text'])):
-                if int(data['conf'][i]) > 30:  # Filter low confidence words
+                if word_confidences[i] > 30:  # Filter low confidence words
                     words.append({
                         'text': data['text'][i],
-                        'confidence': int(data['conf'][i]),
+                        'confidence': int(word_confidences[i]),
                         'bbox': {
                             'x': data['left'][i],
                             'y': data['top'][i],
@@ -107,7 +215,11 @@ class OCRProcessor:
                 'text': text.strip(),
                 'confidence': avg_confidence / 100.0,  # Normalize to 0-1
                 'words': words,
-                'word_count': len([w for w in words if w['text'].strip()])
+                'word_count': len([w for w in words if w['text'].strip()]),
+                'stage_timings': {
+                    'preprocess': round(preprocessed_time - start_time, 4),
+                    'ocr': round(time.perf_counter() - preprocessed_time, 4)
+                }
             }
             
         except Exception as e:
@@ -121,14 +233,18 @@ class OCRProcessor:
                 'error': str(e)
             }
     
-    def extract_text_easyocr(self, image_path: str) -> Dict[str, Any]:
+    def extract_text_easyocr(self, image_path: str, image: Optional[np.ndarray] = None) -> Dict[str, Any]:
         """Extract text using EasyOCR"""
         try:
             if self.easyocr_reader is None:
                 raise ValueError("EasyOCR not initialized")
             
+            start_time = time.perf_counter()
+            if image is None:
+                image, _ = self.prepare_image(image_path)
+            
             # Read and process results
-            results = self.easyocr_reader.readtext(image_path)
+            results = self.easyocr_reader.readtext(image)
             
             # Extract text and calculate confidence
             all_text = []
@@ -155,7 +271,8 @@ class OCRProcessor:
                 'text': extracted_text.strip(),
                 'confidence': avg_confidence,
                 'words': words,
-                'word_count': len(words)
+                'word_count': len(words),
+                'stage_timings': {'ocr': round(time.perf_counter() - start_time, 4)}
             }
             
         except Exception as e:
@@ -169,35 +286,214 @@ class OCRProcessor:
                 'error': str(e)
             }
     
-    def extract_text(self, image_path: str, use_both_engines: bool = True) -> Dict[str, Any]:
-        """Extract text using one or both OCR engines"""
+    def _select_best_result(self, tesseract_result: Dict[str, Any], easyocr_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Choose best result based on confidence and text length"""
+        if (easyocr_result['confidence'] > tesseract_result['confidence'] and 
+            len(easyocr_result['text']) > len(tesseract_result['text']) * 0.8):
+            return easyocr_result
+        return tesseract_result
+    
+    def _meets_race_threshold(self, result: Dict[str, Any]) -> bool:
+        """Check whether a single engine result is good enough to stop early"""
+        return (result['confidence'] >= self.race_min_confidence and
+                len(result['text']) >= self.race_min_length)
+    
+    def _abandon(self, pending) -> bool:
+        """Leave race losers running unless too many earlier losers are still busy"""
+        with self._stragglers_lock:
+            if self._stragglers + len(pending) > MAX_RACE_STRAGGLERS:
+                return False
+            self._stragglers += len(pending)
+        for future in pending:
+            future.add_done_callback(self._straggler_done)
+        return True
+    
+    def _straggler_done(self, future):
+        with self._stragglers_lock:
+            self._stragglers -= 1
+    
+    def _extract_text_parallel(self, image_path: str, race: bool,
+                               image: Optional[np.ndarray] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Run both engines concurrently on a single decoded image"""
+        if image is None:
+            image, _ = self.prepare_image(image_path)
+        
+        # A fresh pair of threads per call, so a race loser that is still running
+        # (engine calls cannot be interrupted) never delays the next request's engines
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ocr-engine")
         try:
-            results = {}
+            futures = {
+                executor.submit(self.extract_text_tesseract, image_path, image): 'tesseract',
+                executor.submit(self.extract_text_easyocr, image_path, image): 'easyocr'
+            }
+        finally:
+            executor.shutdown(wait=False)
+        
+        results = {}
+        if race:
+            done, pending = wait(futures, return_when=FIRST_COMPLETED)
+            first = done.pop()
+            first_result = first.result()
+            if self._meets_race_threshold(first_result) and self._abandon(pending):
+                # The slower engine finishes in its own thread; its result is discarded
+                results[futures[first]] = first_result
+                return first_result, results
+        
+        for future, engine in futures.items():
+            results[engine] = future.result()
+        
+        return self._select_best_result(results['tesseract'], results['easyocr']), results
+    
+    def extract_ktp_layout(self, image_path: str, image: Optional[np.ndarray] = None) -> Optional[Dict[str, Any]]:
+        """OCR only the KTP field zones of a detected, deskewed card
+        
+        Returns an extract_text-style result with 'layout_fields', or None when
+        too few fields were read for the layout to be trusted.
+        """
+        try:
+            if image is None:
+                image = self.load_image(image_path)
+            if self._layout_extractor is None:
+                self._layout_extractor = KTPLayoutExtractor(easyocr_reader=self.easyocr_reader)
             
-            # Try Tesseract
-            tesseract_result = self.extract_text_tesseract(image_path)
-            results['tesseract'] = tesseract_result
+            layout = self._layout_extractor.extract(image)
+        except Exception as e:
+            logger.warning(f"KTP layout OCR failed for {image_path}: {e}")
+            return None
+        
+        fields = layout.pop('fields')
+        if len(fields) < self.ktp_layout_min_fields:
+            logger.info(f"KTP layout OCR found {len(fields)} fields in {image_path}, using full-page OCR")
+            return None
+        
+        # Labelled lines keep the text usable by the regex extractor and the LLM analyzer
+        text = '\n'.join(f"{KTP_FIELD_LABELS.get(field, field)} : {value['text']}" for field, value in fields.items())
+        confidences = [value['confidence'] for value in fields.values()]
+        best_result = {
+            'engine': 'ktp_layout',
+            'text': text,
+            'confidence': sum(confidences) / len(confidences),
+            'words': [],
+            'word_count': sum(len(value['text'].split()) for value in fields.values())
+        }
+        
+        return {
+            'best_result': best_result,
+            'all_results': {'ktp_layout': best_result},
+            'processing_time': datetime.now().isoformat(),
+            'engines_used': ['ktp_layout'],
+            'layout_fields': fields,
+            'layout': layout
+        }
+    
+    def pipeline_config(self, use_both_engines: bool, parallel: bool, race: bool,
+                        layout: Optional[str] = None) -> Dict[str, Any]:
+        """Settings that affect OCR output, used in the cache key"""
+        config = {
+            'pipeline': 'ocr_processor.extract_text',
+            'version': 2,
+            'use_both_engines': use_both_engines,
+            'tesseract_config': self.tesseract_config,
+            'tesseract_single_pass': self.tesseract_single_pass,
+            'target_text_height': self.target_text_height,
+            'max_image_side': self.max_image_side,
+            'race': race and use_both_engines and parallel
+        }
+        if config['race']:
+            config['race_min_confidence'] = self.race_min_confidence
+            config['race_min_length'] = self.race_min_length
+        if layout:
+            config['layout'] = layout
+            config['layout_min_fields'] = self.ktp_layout_min_fields
+        return config
+    
+    def cache_key(self, image_path: str, use_both_engines: bool = True,
+                  content_hash: Optional[str] = None, layout: Optional[str] = None) -> Optional[str]:
+        """Cache key for extract_text with the processor's default engine settings"""
+        if self.cache is None or not self.cache.enabled:
+            return None
+        pipeline = self.pipeline_config(use_both_engines, self.parallel_engines, self.race_engines, layout)
+        return self.cache.key_for_file(image_path, pipeline, content_hash)
+    
+    def extract_text(self, image_path: str, use_both_engines: bool = True,
+                     parallel: Optional[bool] = None, race: Optional[bool] = None,
+                     content_hash: Optional[str] = None, layout: Optional[str] = None,
+                     check_cache: bool = True) -> Dict[str, Any]:
+        """Extract text using one or both OCR engines
+        
+        With parallel=True both engines run at the same time; race=True additionally
+        returns the first engine result that meets the confidence and length threshold.
+        layout='ktp' reads the KTP field zones first and falls back to full-page OCR.
+        Results are served from the OCR cache when the same image was seen before;
+        check_cache=False skips the lookup (the caller already missed) but still stores.
+        """
+        if parallel is None:
+            parallel = self.parallel_engines
+        if race is None:
+            race = self.race_engines
+        
+        cache_key = None
+        if self.cache is not None and self.cache.enabled:
+            try:
+                pipeline = self.pipeline_config(use_both_engines, parallel, race, layout)
+                cache_key = self.cache.key_for_file(image_path, pipeline, content_hash)
+                cached = self.cache.get(cache_key) if check_cache else None
+                if cached is not None:
+                    cached['cache_hit'] = True
+                    return cached
+            except OSError as e:
+                logger.warning(f"OCR cache lookup skipped for {image_path}: {e}")
+        
+        result = None
+        if layout == 'ktp':
+            result = self.extract_ktp_layout(image_path)
+        if result is None:
+            result = self._extract_text_uncached(image_path, use_both_engines, parallel, race)
+        
+        # Only successful runs are cached
+        if cache_key is not None and result['engines_used']:
+            self.cache.put(cache_key, result)
+        result['cache_hit'] = False
+        return result
+    
+    def _extract_text_uncached(self, image_path: str, use_both_engines: bool,
+                               parallel: bool, race: bool) -> Dict[str, Any]:
+        """Run the OCR engines"""
+        try:
+            results = {}
+            image, resolution = self.prepare_image(image_path)
             
-            # Try EasyOCR if available and requested
-            if use_both_engines and self.easyocr_reader:
-                easyocr_result = self.extract_text_easyocr(image_path)
-                results['easyocr'] = easyocr_result
+            if use_both_engines and self.easyocr_reader and parallel:
+                best_result, results = self._extract_text_parallel(image_path, race, image)
+            else:
+                # Try Tesseract
+                tesseract_result = self.extract_text_tesseract(image_path, image)
+                results['tesseract'] = tesseract_result
                 
-                # Choose best result based on confidence and text length
-                if (easyocr_result['confidence'] > tesseract_result['confidence'] and 
-                    len(easyocr_result['text']) > len(tesseract_result['text']) * 0.8):
-                    best_result = easyocr_result
+                # Try EasyOCR if available and requested
+                if use_both_engines and self.easyocr_reader:
+                    easyocr_result = self.extract_text_easyocr(image_path, image)
+                    results['easyocr'] = easyocr_result
+                    best_result = self._select_best_result(tesseract_result, easyocr_result)
                 else:
                     best_result = tesseract_result
-            else:
-                best_result = tesseract_result
+            
+            stage_timings = {
+                'decode': resolution.pop('decode_seconds'),
+                'normalize': resolution.pop('normalize_seconds')
+            }
+            for engine, engine_result in results.items():
+                for stage, seconds in engine_result.get('stage_timings', {}).items():
+                    stage_timings[f"{engine}_{stage}"] = seconds
             
             # Return combined results
             return {
                 'best_result': best_result,
                 'all_results': results,
                 'processing_time': datetime.now().isoformat(),
-                'engines_used': list(results.keys())
+                'engines_used': list(results.keys()),
+                'resolution': resolution,
+                'stage_timings': stage_timings
             }
             
         except Exception as e:
@@ -221,141 +517,47 @@ class DocumentFieldExtractor:
     
     def __init__(self):
         # Indonesian ID patterns
-        self.patterns = {
-            'nik': [
-                r'\b(\d{16})\b',  # 16-digit NIK
-                r'NIK\s*:?\s*(\d{16})',
-                r'No\.\s*KTP\s*:?\s*(\d{16})'
-            ],
-            'nama': [
-                r'Nama\s*:?\s*([A-Z\s]+)',
-                r'NAMA\s*:?\s*([A-Z\s]+)',
-                r'Name\s*:?\s*([A-Z\s]+)'
-            ],
-            'tempat_lahir': [
-                r'Tempat[/\s]*Tgl\s*Lahir\s*:?\s*([A-Z\s]+),',
-                r'TTL\s*:?\s*([A-Z\s]+),',
-                r'Tempat\s*Lahir\s*:?\s*([A-Z\s]+)'
-            ],
-            'tanggal_lahir': [
-                r'(\d{1,2}[-/]\d{1,2}[-/]\d{4})',
-                r'(\d{1,2}\s+\w+\s+\d{4})',
-                r',\s*(\d{1,2}[-/]\d{1,2}[-/]\d{4})'
-            ],
-            'jenis_kelamin': [
-                r'Jenis\s*Kelamin\s*:?\s*(LAKI-LAKI|PEREMPUAN)',
-                r'Sex\s*:?\s*(MALE|FEMALE)',
-                r'Gender\s*:?\s*(L|P|M|F)'
-            ],
-            'alamat': [
-                r'Alamat\s*:?\s*([^\n]+)',
-                r'Address\s*:?\s*([^\n]+)'
-            ],
-            'agama': [
-                r'Agama\s*:?\s*([A-Z\s]+)',
-                r'Religion\s*:?\s*([A-Z\s]+)'
-            ],
-            'pekerjaan': [
-                r'Pekerjaan\s*:?\s*([A-Z\s]+)',
-                r'Occupation\s*:?\s*([A-Z\s]+)'
-            ],
-            'kewarganegaraan': [
-                r'Kewarganegaraan\s*:?\s*([A-Z\s]+)',
-                r'Nationality\s*:?\s*([A-Z\s]+)'
-            ],
-            'berlaku_hingga': [
-                r'Berlaku\s*Hingga\s*:?\s*(\d{1,2}[-/]\d{1,2}[-/]\d{4})',
-                r'Valid\s*Until\s*:?\s*(\d{1,2}[-/]\d{1,2}[-/]\d{4})',
-                r'Berlaku\s*Hingga\s*:?\s*(SEUMUR\s*HIDUP)'
-            ],
-            # Company Deed (Akta Perusahaan) patterns
-            'company_name': [
-                r'NAMA\s+PERUSAHAAN\s*:?\s*([A-Z\s,.\-&]+)',
-                r'COMPANY\s+NAME\s*:?\s*([A-Z\s,.\-&]+)',
-                r'PT\.?\s+([A-Z\s,.\-&]+)',
-                r'CV\.?\s+([A-Z\s,.\-&]+)',
-                r'FIRMA\s+([A-Z\s,.\-&]+)'
-            ],
-            'company_type': [
-                r'BENTUK\s+BADAN\s+HUKUM\s*:?\s*([A-Z\s]+)',
-                r'JENIS\s+PERUSAHAAN\s*:?\s*([A-Z\s]+)',
-                r'(PT|CV|FIRMA|PERSEKUTUAN)',
-                r'PERSEROAN\s+TERBATAS',
-                r'COMMANDITAIRE\s+VENNOOTSCHAP'
-            ],
-            'company_address': [
-                r'ALAMAT\s+PERUSAHAAN\s*:?\s*([^\n]+)',
-                r'DOMISILI\s*:?\s*([^\n]+)',
-                r'BERKEDUDUKAN\s+DI\s*([^\n,]+)'
-            ],
-            'notary_name': [
-                r'NOTARIS\s*:?\s*([A-Z\s,.\-]+)',
-                r'NOTARY\s*:?\s*([A-Z\s,.\-]+)',
-                r'DIHADAPAN\s+([A-Z\s,.\-]+),?\s+S\.?H\.?'
-            ],
-            'deed_number': [
-                r'NOMOR\s+AKTA\s*:?\s*(\d+)',
-                r'NO\.?\s*AKTA\s*:?\s*(\d+)',
-                r'DEED\s+NUMBER\s*:?\s*(\d+)',
-                r'AKTA\s+NOMOR\s*:?\s*(\d+)'
-            ],
-            'deed_date': [
-                r'TANGGAL\s+AKTA\s*:?\s*(\d{1,2}[-/]\d{1,2}[-/]\d{4})',
-                r'TERTANGGAL\s*:?\s*(\d{1,2}[-/]\d{1,2}[-/]\d{4})',
-                r'DATED\s*:?\s*(\d{1,2}[-/]\d{1,2}[-/]\d{4})',
-                r'(\d{1,2}\s+\w+\s+\d{4})'
-            ],
-            'authorized_capital': [
-                r'MODAL\s+DASAR\s*:?\s*([A-Z\s\d,.\-]+)',
-                r'AUTHORIZED\s+CAPITAL\s*:?\s*([A-Z\s\d,.\-]+)',
-                r'RP\.?\s*(\d{1,3}(?:[.,]\d{3})*(?:[.,]\d{2})?)'
-            ],
-            'business_purpose': [
-                r'MAKSUD\s+DAN\s+TUJUAN\s*:?\s*([^\n]+)',
-                r'KEGIATAN\s+USAHA\s*:?\s*([^\n]+)',
-                r'BIDANG\s+USAHA\s*:?\s*([^\n]+)',
-                r'BUSINESS\s+PURPOSE\s*:?\s*([^\n]+)'
-            ]
-        }
+        self.patterns = FIELD_PATTERNS
+        self.engine = field_engine
     
     def extract_fields(self, text: str, document_type: str = 'ktp') -> Dict[str, Any]:
         """Extract structured fields from OCR text"""
-        extracted_fields = {}
-        
         # Clean text
         text = text.upper().strip()
         
-        # Determine which patterns to use based on document type
-        relevant_patterns = self._get_relevant_patterns(document_type)
-        
-        # Extract fields based on patterns
-        for field in relevant_patterns:
-            patterns = self.patterns.get(field, [])
-            for pattern in patterns:
-                match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
-                if match:
-                    extracted_fields[field] = match.group(1).strip()
-                    break
+        # One label scan, then patterns are matched at label positions (see field_extraction)
+        matches = self.engine.extract(text, document_type)
+        extracted_fields = {field: match['value'] for field, match in matches.items()}
         
         # Post-process fields
         extracted_fields = self._post_process_fields(extracted_fields, document_type)
         
+        for field, match in matches.items():
+            extracted_fields[field]['span'] = match['span']
+            extracted_fields[field]['extraction_confidence'] = match['confidence']
+        
         return extracted_fields
     
+    def extract_layout_fields(self, layout_fields: Dict[str, Dict[str, Any]],
+                              document_type: str = 'ktp') -> Dict[str, Any]:
+        """Build structured fields from zone-level KTP layout OCR (no regex search)"""
+        relevant = set(self._get_relevant_patterns(document_type))
+        fields = {
+            field: value['text'].upper().strip()
+            for field, value in layout_fields.items()
+            if field in relevant
+        }
+        processed = self._post_process_fields(fields, document_type)
+        for field, value in processed.items():
+            value['ocr_confidence'] = layout_fields[field]['confidence']
+        return processed
+    
     def _get_relevant_patterns(self, document_type: str) -> list:
         """Get relevant field patterns based on document type"""
         if document_type.lower() == 'akta_perusahaan':
-            return [
-                'company_name', 'company_type', 'company_address', 
-                'notary_name', 'deed_number', 'deed_date', 
-                'authorized_capital', 'business_purpose'
-            ]
+            return FIELDS_BY_DOCUMENT_TYPE['akta_perusahaan']
         else:  # Default to KTP fields
-            return [
-                'nik', 'nama', 'tempat_lahir', 'tanggal_lahir',
-                'jenis_kelamin', 'alamat', 'agama', 'pekerjaan',
-                'kewarganegaraan', 'berlaku_hingga'
-            ]
+            return FIELDS_BY_DOCUMENT_TYPE['ktp']
     
     def _post_process_fields(self, fields: Dict[str, str], document_type: str) -> Dict[str, Any]:
         """Post-process extracted fields"""
@@ -458,5 +660,19 @@ class DocumentFieldExtractor:
         return ' '.join(text.split())
 
 # Create global instances
-ocr_processor = OCRProcessor()
+ocr_processor = OCRProcessor(
+    parallel_engines=settings.ocr_parallel_engines,
+    race_engines=settings.ocr_race_engines,
+    race_min_confidence=settings.ocr_race_min_confidence,
+    race_min_length=settings.ocr_race_min_length,
+    tesseract_single_pass=settings.tesseract_single_pass,
+    ktp_layout_min_fields=settings.ktp_layout_min_fields,
+    target_text_height=settings.ocr_target_text_height,
+    max_image_side=settings.ocr_max_image_side,
+    cache=OCRResultCache(
+        settings.ocr_cache_path,
+        max_bytes=settings.ocr_cache_max_mb * 1024 * 1024,
+        enabled=settings.ocr_cache_enabled
+    )
+)
 field_extractor = DocumentFieldExtractor()
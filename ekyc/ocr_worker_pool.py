@@ -0,0 +1,168 @@
+"""
+OCR Worker Pool untuk eKYC System
+Long-lived worker processes, masing-masing dengan Tesseract dan EasyOCR reader sendiri
+"""
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Per-process OCR engine, built once by the pool initializer
+_worker_processor = None
+
+
+def _init_worker():
+    """Load a warm OCRProcessor inside the worker process"""
+    global _worker_processor
+    from ocr_processor import ocr_processor
+    _worker_processor = ocr_processor
+
+
+def _warm_up() -> bool:
+    """Force worker start-up and load the EasyOCR model"""
+    return _worker_processor is not None and _worker_processor.easyocr_reader is not None
+
+
+def _run_extract_text(image_path: str, use_both_engines: bool,
+                      content_hash: Optional[str] = None, layout: Optional[str] = None,
+                      check_cache: bool = True) -> Dict[str, Any]:
+    """Run OCR on the worker's own engine"""
+    return _worker_processor.extract_text(image_path, use_both_engines=use_both_engines,
+                                          content_hash=content_hash, layout=layout,
+                                          check_cache=check_cache)
+
+
+class OCRQueueFullError(RuntimeError):
+    """Raised when the OCR pool has no free queue slot"""
+
+
+class OCRWorkerPool:
+    """Pool of OCR worker processes behind an awaitable submit() API"""
+
+    def __init__(self, max_workers: int = 2, max_queue_depth: int = 8,
+                 submit_timeout: Optional[float] = 30.0):
+        self.max_workers = max_workers
+        self.max_queue_depth = max(max_queue_depth, max_workers)
+        self.submit_timeout = submit_timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        self._stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'rejected': 0,
+            'total_seconds': 0.0
+        }
+
+    def start(self):
+        """Start worker processes and warm up their OCR engines"""
+        if self._executor is not None:
+            return
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker
+        )
+        for _ in range(self.max_workers):
+            self._executor.submit(_warm_up)
+        logger.info(f"OCR worker pool started with {self.max_workers} workers "
+                    f"(queue depth {self.max_queue_depth})")
+
+    def shutdown(self):
+        """Stop worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logger.info("OCR worker pool stopped")
+
+    async def _acquire_slot(self, timeout: Optional[float]):
+        """Wait for a queue slot, applying backpressure when the pool is saturated"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_queue_depth)
+
+        if self._slots.locked():
+            if timeout is not None and timeout <= 0:
+                raise OCRQueueFullError("OCR queue is full")
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout=timeout)
+            except asyncio.TimeoutError:
+                raise OCRQueueFullError(f"OCR queue is still full after {timeout}s")
+        else:
+            await self._slots.acquire()
+
+    async def submit(self, image_path: str, use_both_engines: bool = True,
+                     timeout: Optional[float] = None,
+                     content_hash: Optional[str] = None,
+                     layout: Optional[str] = None,
+                     check_cache: bool = True) -> Dict[str, Any]:
+        """Run OCRProcessor.extract_text on a worker process
+
+        Pass check_cache=False when the caller already looked the image up in
+        the OCR cache, so the miss is not counted (and looked up) twice.
+        """
+        if self._executor is None:
+            self.start()
+
+        if timeout is None:
+            timeout = self.submit_timeout
+
+        try:
+            await self._acquire_slot(timeout)
+        except OCRQueueFullError:
+            self._stats['rejected'] += 1
+            raise
+
+        self._in_flight += 1
+        self._stats['submitted'] += 1
+        start_time = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self._executor, _run_extract_text, image_path, use_both_engines, content_hash, layout,
+                check_cache
+            )
+            self._stats['completed'] += 1
+            return result
+        except BrokenProcessPool:
+            self._stats['failed'] += 1
+            logger.error("OCR worker process died, restarting pool")
+            self.shutdown()
+            raise
+        except Exception:
+            self._stats['failed'] += 1
+            raise
+        finally:
+            self._stats['total_seconds'] += time.perf_counter() - start_time
+            self._in_flight -= 1
+            self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get pool utilisation statistics"""
+        finished = self._stats['completed'] + self._stats['failed']
+        return {
+            'running': self._executor is not None,
+            'workers': self.max_workers,
+            'max_queue_depth': self.max_queue_depth,
+            'in_flight': self._in_flight,
+            'submitted': self._stats['submitted'],
+            'completed': self._stats['completed'],
+            'failed': self._stats['failed'],
+            'rejected': self._stats['rejected'],
+            'avg_seconds': self._stats['total_seconds'] / finished if finished else 0.0
+        }
+
+
+# Global pool instance
+ocr_pool = OCRWorkerPool(
+    max_workers=settings.ocr_workers,
+    max_queue_depth=settings.ocr_queue_depth,
+    submit_timeout=settings.ocr_submit_timeout
+)
@@ -1,9 +1,11 @@
 from fastapi import FastAPI, File, UploadFile, HTTPException, Form
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import uvicorn
 import os
+import asyncio
+import json
 import tempfile
 import shutil
 import statistics
@@ -11,7 +13,13 @@ from typing import Optional
 import logging
 
 from document_validator import DocumentValidator
+from enhanced_ktp_processor import EnhancedImageProcessor
 from config import Config
+import model_registry
+import easyocr_batcher
+import es_pool
+from execution import stage_executor, PIPELINE, OCR
+from job_queue import JobQueue, JobQueueFullError, COMPLETED, FAILED, validate_webhook_url
 from ekyc_metrics import eKYCMetricsCollector, ProcessType
 
 # Setup logging
@@ -45,6 +53,45 @@ except Exception as e:
     logger.error(f"Failed to initialize document validator: {str(e)}")
     validator = None
 
+# KTP processor is shared across requests; its OCR model comes from the model registry
+ktp_processor = EnhancedImageProcessor()
+
+# Background jobs run the same validator outside the request
+job_queue = JobQueue(
+    Config.JOB_QUEUE_PATH,
+    Config.JOB_UPLOAD_DIR,
+    workers=Config.JOB_WORKERS,
+    max_queued=Config.JOB_MAX_QUEUED,
+    max_attempts=Config.JOB_MAX_ATTEMPTS,
+    webhook_allowed_hosts=Config.JOB_WEBHOOK_ALLOWED_HOSTS,
+    retention_days=Config.JOB_RETENTION_DAYS
+)
+# Uploaded files each job kind needs
+JOB_FILES = {
+    'ktp': ['file'],
+    'akta': ['file'],
+    'single': ['file'],
+    'comprehensive': ['ktp_file', 'akta_file']
+}
+if validator:
+    job_queue.register('ktp', lambda files, params: validator.validate_ktp(files['file']))
+    job_queue.register('akta', lambda files, params: validator.validate_akta(files['file']))
+    job_queue.register('single', lambda files, params: validator.validate_single_document(files['file'], params.get('document_type')))
+    job_queue.register('comprehensive', lambda files, params: validator.validate_documents(files['ktp_file'], files['akta_file']))
+
+@app.on_event("startup")
+async def startup_event():
+    """Load OCR models in the background so the first request does not pay for it"""
+    model_registry.warm_up(['id', 'en'])
+    if validator:
+        job_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop picking up jobs; unfinished ones are requeued on the next start"""
+    job_queue.stop()
+    es_pool.close_clients()
+
 @app.get("/")
 async def serve_frontend():
     """Serve the frontend application"""
@@ -65,11 +112,17 @@ async def serve_metrics():
 async def health_check():
     return {
         "status": "healthy" if validator else "unhealthy",
-        "validator_ready": validator is not None
+        "validator_ready": validator is not None,
+        "models": model_registry.registry_stats(),
+        "ocr_cache": ktp_processor.cache.stats(),
+        "easyocr_batching": easyocr_batcher.batcher_stats(),
+        "stages": stage_executor.stats(),
+        "jobs": job_queue.stats(),
+        "elasticsearch": es_pool.pool_stats()
     }
 
 @app.post("/validate/ktp")
-async def validate_ktp(file: UploadFile = File(...)):
+async def validate_ktp(file: UploadFile = File(...), source: Optional[str] = Form(None)):
     """Validate KTP image file using enhanced processor"""
     if not validator:
         raise HTTPException(status_code=500, detail="Validator not initialized")
@@ -79,19 +132,24 @@ async def validate_ktp(file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail="File must be an image")
     
     try:
-        # Import enhanced processor
-        from enhanced_ktp_processor import EnhancedImageProcessor
         from datetime import datetime
         start_time = datetime.now()
-        processor = EnhancedImageProcessor()
+        processor = ktp_processor
         
         # Save uploaded file temporarily
         with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as temp_file:
             shutil.copyfileobj(file.file, temp_file)
             temp_path = temp_file.name
         
-        # Extract text with enhanced processor
-        extraction_result = processor.extract_text_multiple_methods(temp_path)
+        # Extract text with enhanced processor (on the OCR stage pool so concurrent
+        # uploads can share EasyOCR batches without blocking the event loop)
+        extraction_result = await stage_executor.run_async(
+            OCR,
+            processor.extract_text_multiple_methods,
+            temp_path,
+            adaptive=Config.KTP_ADAPTIVE_OCR,
+            source=source
+        )
         
         if not extraction_result['success']:
             raise HTTPException(status_code=400, detail=f"Text extraction failed: {extraction_result.get('error', 'Unknown error')}")
@@ -118,6 +176,7 @@ async def validate_ktp(file: UploadFile = File(...)):
                 "extraction_quality": "Excellent" if best_result['avg_confidence'] >= 0.9 else "Good" if best_result['avg_confidence'] >= 0.7 else "Fair",
                 "ai_analysis": f"Enhanced OCR processing successfully extracted {len(ktp_fields)} fields from ID card with accuracy rate {round(best_result['avg_confidence'] * 100, 1)}%. Best method: {best_result['method']} with {best_result['ocr_engine']}.",
                 "processing_details": {
+                    "ocr_passes": extraction_result.get('adaptive', {}).get('passes', len(extraction_result['extraction_results'])),
                     "total_methods_tried": len(extraction_result['extraction_results']),
                     "successful_extractions": len([r for r in extraction_result['extraction_results'] if r['success']]),
                     "confidence_range": [min(extraction_result['confidence_scores']), max(extraction_result['confidence_scores'])] if extraction_result['confidence_scores'] else [0, 0]
@@ -160,7 +219,7 @@ async def validate_akta(file: UploadFile = File(...)):
         start_time = datetime.now()
         
         # Validate document
-        raw_result = validator.validate_akta(temp_path)
+        raw_result = await stage_executor.run_async(PIPELINE, validator.validate_akta, temp_path)
         
         # Calculate processing time
         end_time = datetime.now()
@@ -258,7 +317,7 @@ async def validate_comprehensive(
             akta_temp_path = temp_file.name
         
         # Validate both documents
-        result = validator.validate_documents(ktp_temp_path, akta_temp_path)
+        result = await stage_executor.run_async(PIPELINE, validator.validate_documents, ktp_temp_path, akta_temp_path)
         
         # Clean up temporary files
         os.unlink(ktp_temp_path)
@@ -296,7 +355,7 @@ async def validate_single(
             temp_path = temp_file.name
         
         # Validate document
-        result = validator.validate_single_document(temp_path, document_type)
+        result = await stage_executor.run_async(PIPELINE, validator.validate_single_document, temp_path, document_type)
         
         # Clean up temporary file
         os.unlink(temp_path)
@@ -310,6 +369,97 @@ async def validate_single(
             os.unlink(temp_path)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/jobs/{kind}", status_code=202)
+async def submit_job(
+    kind: str,
+    file: Optional[UploadFile] = File(None),
+    ktp_file: Optional[UploadFile] = File(None),
+    akta_file: Optional[UploadFile] = File(None),
+    document_type: Optional[str] = Form(None),
+    webhook_url: Optional[str] = Form(None)
+):
+    """Queue a validation job and return its id immediately"""
+    if not validator:
+        raise HTTPException(status_code=500, detail="Validator not initialized")
+    if kind not in JOB_FILES:
+        raise HTTPException(status_code=404, detail=f"Unknown job type: {kind}")
+    
+    uploads = {'file': file, 'ktp_file': ktp_file, 'akta_file': akta_file}
+    missing = [name for name in JOB_FILES[kind] if uploads[name] is None]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Missing file(s): {', '.join(missing)}")
+    if webhook_url:
+        try:
+            await asyncio.to_thread(validate_webhook_url, webhook_url, Config.JOB_WEBHOOK_ALLOWED_HOSTS)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid webhook_url: {str(e)}")
+    
+    temp_paths = {}
+    try:
+        for name in JOB_FILES[kind]:
+            upload = uploads[name]
+            with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(upload.filename)[1]) as temp_file:
+                shutil.copyfileobj(upload.file, temp_file)
+                temp_paths[name] = temp_file.name
+        
+        job = await asyncio.to_thread(
+            job_queue.submit, kind, temp_paths, {'document_type': document_type}, webhook_url
+        )
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=f"Job queue is full: {str(e)}")
+    except Exception as e:
+        logger.error(f"Error queueing {kind} job: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # Submitted files were moved into the job directory
+        for temp_path in temp_paths.values():
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+    
+    return JSONResponse(status_code=202, content={
+        **job,
+        "status_url": f"/jobs/{job['job_id']}",
+        "events_url": f"/jobs/{job['job_id']}/events"
+    })
+
+@app.get("/jobs")
+async def list_jobs(status: Optional[str] = None, limit: int = 50):
+    """Recent jobs, optionally filtered by status"""
+    return JSONResponse(content=await asyncio.to_thread(job_queue.list, status, limit))
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Job status, current stage and result once finished"""
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JSONResponse(content=job)
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Server-sent events: one 'stage' event per stage start/finish, then the final job"""
+    if await asyncio.to_thread(job_queue.get, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def event_stream():
+        last_id = 0
+        while True:
+            for event in await asyncio.to_thread(job_queue.events, job_id, last_id):
+                last_id = event['id']
+                yield f"event: stage\ndata: {json.dumps(event)}\n\n"
+            job = await asyncio.to_thread(job_queue.get, job_id)
+            if job['status'] in (COMPLETED, FAILED):
+                yield f"event: {job['status']}\ndata: {json.dumps(job, default=str)}\n\n"
+                return
+            await asyncio.sleep(0.5)
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+@app.get("/metrics/stages")
+async def get_stage_metrics():
+    """Concurrency limits, queue depth and timings of each pipeline stage"""
+    return JSONResponse(content=stage_executor.stats())
+
 @app.get("/metrics/summary")
 async def get_metrics_summary():
     """Get summary of eKYC metrics for comparison"""
@@ -12,6 +12,10 @@ class Config:
     ELASTICSEARCH_USERNAME = os.getenv("ELASTICSEARCH_USERNAME", "elastic")
     ELASTICSEARCH_PASSWORD = os.getenv("ELASTICSEARCH_PASSWORD")
     ELASTICSEARCH_INDEX = os.getenv("ELASTICSEARCH_INDEX", "document_validation")
+    # Shared client per cluster (see es_pool.py)
+    ES_CONNECTIONS_PER_NODE = int(os.getenv("ES_CONNECTIONS_PER_NODE", "10"))
+    ES_REQUEST_TIMEOUT = float(os.getenv("ES_REQUEST_TIMEOUT", "30"))
+    ES_MAX_RETRIES = int(os.getenv("ES_MAX_RETRIES", "3"))
     
     # Application Configuration
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -21,6 +25,80 @@ class Config:
     CONFIDENCE_THRESHOLD = 0.8
     SIMILARITY_THRESHOLD = 0.75
     
+    # Adaptive KTP OCR: stop once text_length * confidence * keyword bonus reaches the target
+    KTP_ADAPTIVE_OCR = os.getenv("KTP_ADAPTIVE_OCR", "true").lower() == "true"
+    KTP_ADAPTIVE_TARGET_SCORE = float(os.getenv("KTP_ADAPTIVE_TARGET_SCORE", "300"))
+    KTP_ADAPTIVE_MAX_PASSES = int(os.getenv("KTP_ADAPTIVE_MAX_PASSES", "6"))
+    # Relative paths are resolved against this directory, not the working directory
+    KTP_VARIANT_STATS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                          os.getenv("KTP_VARIANT_STATS_PATH", "ktp_variant_stats.json"))
+    # Win counts are written at most this often (and at exit)
+    KTP_VARIANT_STATS_FLUSH_SECONDS = float(os.getenv("KTP_VARIANT_STATS_FLUSH_SECONDS", "30"))
+    # Client-supplied document sources: comma-separated whitelist (empty = any short [a-z0-9_-] name),
+    # at most KTP_VARIANT_MAX_SOURCES distinct sources are learned; anything else counts as "default"
+    KTP_VARIANT_SOURCES = [s.strip().lower() for s in os.getenv("KTP_VARIANT_SOURCES", "").split(",") if s.strip()]
+    KTP_VARIANT_MAX_SOURCES = int(os.getenv("KTP_VARIANT_MAX_SOURCES", "50"))
+    # Share of adaptive searches that ignore learned wins, so other variants keep getting a chance
+    KTP_VARIANT_EXPLORATION = float(os.getenv("KTP_VARIANT_EXPLORATION", "0.1"))
+    
+    # OCR result cache (content hash + pipeline config, LRU on disk)
+    OCR_CACHE_ENABLED = os.getenv("OCR_CACHE_ENABLED", "true").lower() == "true"
+    OCR_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                  os.getenv("OCR_CACHE_PATH", "cache/ocr_cache.db"))
+    OCR_CACHE_MAX_MB = int(os.getenv("OCR_CACHE_MAX_MB", "256"))
+    
+    # Resolution normalisation before building preprocessing variants (downscale only)
+    OCR_TARGET_TEXT_HEIGHT = float(os.getenv("OCR_TARGET_TEXT_HEIGHT", "32"))
+    OCR_MAX_IMAGE_SIDE = int(os.getenv("OCR_MAX_IMAGE_SIDE", "2500"))
+    
+    # EasyOCR micro-batching: crops from concurrent requests share one recognizer pass
+    EASYOCR_BATCHING = os.getenv("EASYOCR_BATCHING", "true").lower() == "true"
+    EASYOCR_BATCH_SIZE = int(os.getenv("EASYOCR_BATCH_SIZE", "32"))
+    EASYOCR_BATCH_WAIT_MS = float(os.getenv("EASYOCR_BATCH_WAIT_MS", "10"))
+    
+    # PDF page extraction: large PDFs are split into page chunks across worker processes
+    PDF_PAGE_WORKERS = int(os.getenv("PDF_PAGE_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "40"))
+    PDF_PAGE_CHUNK_SIZE = int(os.getenv("PDF_PAGE_CHUNK_SIZE", "8"))
+    
+    # Scanned PDF pages (text layer shorter than the minimum) are rasterised and OCR'd
+    PDF_TEXT_LAYER_MIN_CHARS = int(os.getenv("PDF_TEXT_LAYER_MIN_CHARS", "20"))
+    PDF_OCR_TARGET_LONG_SIDE = int(os.getenv("PDF_OCR_TARGET_LONG_SIDE", "2400"))
+    PDF_OCR_MIN_DPI = int(os.getenv("PDF_OCR_MIN_DPI", "150"))
+    PDF_OCR_MAX_DPI = int(os.getenv("PDF_OCR_MAX_DPI", "300"))
+    PDF_OCR_WORKERS = int(os.getenv("PDF_OCR_WORKERS", "2"))
+    
+    # Incremental akta extraction stops matching fields once required fields reach this confidence
+    AKTA_INCREMENTAL_EXTRACTION = os.getenv("AKTA_INCREMENTAL_EXTRACTION", "true").lower() == "true"
+    AKTA_FIELD_MIN_CONFIDENCE = float(os.getenv("AKTA_FIELD_MIN_CONFIDENCE", "0.8"))
+    # Also stop reading / OCR-ing pages at that point; the text is then truncated and not indexed
+    AKTA_STOP_AT_REQUIRED_FIELDS = os.getenv("AKTA_STOP_AT_REQUIRED_FIELDS", "false").lower() == "true"
+    
+    # Per-stage concurrency limits for the validation pipeline (see execution.py)
+    STAGE_PIPELINE_WORKERS = int(os.getenv("STAGE_PIPELINE_WORKERS", "16"))
+    STAGE_OCR_WORKERS = int(os.getenv("STAGE_OCR_WORKERS", "2"))
+    STAGE_PDF_WORKERS = int(os.getenv("STAGE_PDF_WORKERS", "2"))
+    STAGE_LLM_WORKERS = int(os.getenv("STAGE_LLM_WORKERS", "8"))
+    STAGE_INDEX_WORKERS = int(os.getenv("STAGE_INDEX_WORKERS", "4"))
+    
+    # /validate/comprehensive: run the KTP and Akta pipelines at the same time
+    COMPREHENSIVE_CONCURRENT = os.getenv("COMPREHENSIVE_CONCURRENT", "true").lower() == "true"
+    
+    # Background validation jobs (SQLite-backed, survive restarts); relative paths are
+    # resolved against this directory so restarts from elsewhere find the same queue
+    JOB_QUEUE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                  os.getenv("JOB_QUEUE_PATH", "cache/jobs.db"))
+    JOB_UPLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                  os.getenv("JOB_UPLOAD_DIR", "uploads/jobs"))
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "200"))
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    # Finished jobs and their events are deleted after this many days (0 keeps them)
+    JOB_RETENTION_DAYS = float(os.getenv("JOB_RETENTION_DAYS", "7"))
+    # Comma-separated webhook hosts; empty allows any host that resolves to public addresses
+    JOB_WEBHOOK_ALLOWED_HOSTS = [host.strip() for host in os.getenv("JOB_WEBHOOK_ALLOWED_HOSTS", "").split(",")
+                                 if host.strip()]
+    
     @classmethod
     def validate(cls):
         """Validate required configuration"""
@@ -1,7 +1,10 @@
 import os
+import contextvars
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 
 from config import Config
@@ -10,6 +13,7 @@ from pdf_processor import PDFProcessor
 from elasticsearch_rag import ElasticsearchRAG
 from openai_validator import OpenAIValidator
 from ekyc_metrics import eKYCMetricsCollector, ProcessType
+from execution import stage_executor, OCR, PDF, LLM, INDEX
 
 class DocumentValidator:
     def __init__(self):
@@ -22,6 +26,7 @@ class DocumentValidator:
         self.rag = ElasticsearchRAG()
         self.openai_validator = OpenAIValidator()
         self.metrics_collector = eKYCMetricsCollector()
+        self.stages = stage_executor
         
         # Setup logging
         self.setup_logging()
@@ -61,12 +66,12 @@ class DocumentValidator:
         try:
             # Step 1: Extract text from image
             self.logger.info("Extracting text from KTP image...")
-            ocr_result = self.image_processor.extract_text_easyocr(image_path)
+            ocr_result = self.stages.run(OCR, self.image_processor.extract_text_easyocr, image_path)
             
             if not ocr_result['success']:
                 # Fallback to Tesseract
                 self.logger.warning("EasyOCR failed, trying Tesseract...")
-                ocr_result = self.image_processor.extract_text_tesseract(image_path)
+                ocr_result = self.stages.run(OCR, self.image_processor.extract_text_tesseract, image_path)
             
             if not ocr_result['success']:
                 raise RuntimeError(f"OCR extraction failed: {ocr_result.get('error', 'Unknown error')}")
@@ -93,7 +98,7 @@ class DocumentValidator:
             
             # Step 3: Get validation context from RAG
             self.logger.info("Getting validation context from RAG...")
-            rag_context = self.rag.get_validation_context("ktp", ktp_fields)
+            rag_context = self.stages.run(INDEX, self.rag.get_validation_context, "ktp", ktp_fields)
             
             result["processing_steps"]["rag_context"] = {
                 "success": True,
@@ -102,14 +107,16 @@ class DocumentValidator:
             
             # Step 4: Validate with OpenAI
             self.logger.info("Validating with OpenAI...")
-            validation_result = self.openai_validator.validate_ktp(ktp_fields, rag_context)
+            validation_result = self.stages.run(LLM, self.openai_validator.validate_ktp, ktp_fields, rag_context)
             
             result["validation_result"] = validation_result
             result["success"] = True
             
             # Step 5: Index document for future reference
             try:
-                self.rag.index_document(
+                self.stages.run(
+                    INDEX,
+                    self.rag.index_document,
                     text=ocr_result.get('full_text', ''),
                     metadata={
                         "file_path": image_path,
@@ -148,7 +155,11 @@ class DocumentValidator:
         try:
             # Step 1: Extract text from PDF with OCR fallback
             self.logger.info("Extracting text from Akta PDF with OCR fallback...")
-            pdf_result = self.pdf_processor.extract_text_with_ocr_fallback(pdf_path)
+            if Config.AKTA_INCREMENTAL_EXTRACTION:
+                # Matches fields only until the required ones are found (see AKTA_STOP_AT_REQUIRED_FIELDS)
+                pdf_result = self.stages.run(PDF, self.pdf_processor.extract_akta_from_pdf, pdf_path)
+            else:
+                pdf_result = self.stages.run(PDF, self.pdf_processor.extract_text_with_ocr_fallback, pdf_path)
             
             if not pdf_result['success']:
                 raise RuntimeError(f"PDF extraction failed: {pdf_result.get('error', 'Unknown error')}")
@@ -163,25 +174,31 @@ class DocumentValidator:
                 "extracted_text": pdf_result.get('full_text', ''),
                 "extraction_method": pdf_result.get('method', 'Unknown'),
                 "character_count": pdf_result.get('character_count', len(pdf_result.get('full_text', ''))),
-                "pages_processed": pdf_result.get('pages_processed', pdf_result.get('total_pages', 0))
+                "pages_processed": pdf_result.get('pages_processed', pdf_result.get('total_pages', 0)),
+                "truncated": pdf_result.get('truncated', False)
             }
             
             # Step 2: Extract Akta fields
             self.logger.info("Extracting Akta fields...")
-            akta_fields = self.pdf_processor.extract_akta_fields(pdf_result['full_text'])
-            
-            # Step 3: Validate Akta structure
-            structure_validation = self.pdf_processor.validate_akta_structure(pdf_result['full_text'])
+            if 'akta_fields' in pdf_result:
+                akta_fields = pdf_result['akta_fields']
+                structure_validation = pdf_result['structure_validation']
+            else:
+                akta_fields = self.pdf_processor.extract_akta_fields(pdf_result['full_text'])
+                
+                # Step 3: Validate Akta structure
+                structure_validation = self.pdf_processor.validate_akta_structure(pdf_result['full_text'])
             
             result["processing_steps"]["field_extraction"] = {
                 "success": True,
                 "extracted_fields": akta_fields,
+                "field_sources": pdf_result.get('field_sources', {}),
                 "structure_validation": structure_validation
             }
             
             # Step 4: Get validation context from RAG
             self.logger.info("Getting validation context from RAG...")
-            rag_context = self.rag.get_validation_context("akta", akta_fields)
+            rag_context = self.stages.run(INDEX, self.rag.get_validation_context, "akta", akta_fields)
             
             result["processing_steps"]["rag_context"] = {
                 "success": True,
@@ -190,7 +207,9 @@ class DocumentValidator:
             
             # Step 5: Validate with OpenAI and complete missing data
             self.logger.info("Validating with OpenAI and completing missing data...")
-            validation_result = self.openai_validator.validate_akta(
+            validation_result = self.stages.run(
+                LLM,
+                self.openai_validator.validate_akta,
                 akta_fields, 
                 rag_context, 
                 pdf_result.get('full_text', '')
@@ -225,21 +244,28 @@ class DocumentValidator:
             )
             
             # Step 6: Index document for future reference
-            try:
-                self.rag.index_document(
-                    text=pdf_result.get('full_text', ''),
-                    metadata={
-                        "file_path": pdf_path,
-                        "document_type": "akta",
-                        "validation_score": validation_result.get('confidence_score', 0),
-                        "is_valid": validation_result.get('valid', False),
-                        "structure_score": structure_validation.get('confidence_score', 0)
-                    },
-                    document_type="processed_akta",
-                    document_id=f"akta_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                )
-            except Exception as e:
-                self.logger.warning(f"Failed to index document: {str(e)}")
+            if pdf_result.get('truncated'):
+                # Partial deeds would be retrieved as if they were complete
+                self.logger.info(f"Not indexing akta: only {pdf_result.get('pages_processed')} of "
+                                 f"{pdf_result.get('total_pages')} pages were read")
+            else:
+                try:
+                    self.stages.run(
+                        INDEX,
+                        self.rag.index_document,
+                        text=pdf_result.get('full_text', ''),
+                        metadata={
+                            "file_path": pdf_path,
+                            "document_type": "akta",
+                            "validation_score": validation_result.get('confidence_score', 0),
+                            "is_valid": validation_result.get('valid', False),
+                            "structure_score": structure_validation.get('confidence_score', 0)
+                        },
+                        document_type="processed_akta",
+                        document_id=f"akta_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                    )
+                except Exception as e:
+                    self.logger.warning(f"Failed to index document: {str(e)}")
             
             self.logger.info(f"Akta validation completed. Valid: {validation_result.get('valid', False)}")
             
@@ -250,18 +276,45 @@ class DocumentValidator:
         
         return result
     
-    def validate_documents(self, ktp_path: str, akta_path: str) -> Dict[str, any]:
-        """Validate both KTP and Akta documents and generate comprehensive report"""
-        self.logger.info("Starting comprehensive document validation...")
+    def _timed(self, fn, *args) -> Tuple[Dict[str, any], float]:
+        """Run fn and return its result with the elapsed seconds"""
+        start_time = time.perf_counter()
+        result = fn(*args)
+        return result, time.perf_counter() - start_time
+    
+    def validate_documents(self, ktp_path: str, akta_path: str,
+                           concurrent: Optional[bool] = None) -> Dict[str, any]:
+        """Validate both KTP and Akta documents and generate comprehensive report
+        
+        With concurrent (default Config.COMPREHENSIVE_CONCURRENT) the two document
+        pipelines run at the same time, so their OCR, RAG lookups and LLM calls
+        overlap; they only meet again at generate_validation_report.
+        """
+        if concurrent is None:
+            concurrent = Config.COMPREHENSIVE_CONCURRENT
+        self.logger.info(f"Starting comprehensive document validation ({'concurrent' if concurrent else 'sequential'})...")
+        start_time = time.perf_counter()
         
         # Validate individual documents
-        ktp_result = self.validate_ktp(ktp_path)
-        akta_result = self.validate_akta(akta_path)
+        if concurrent:
+            # A dedicated thread: the akta pipeline must not wait for a slot in a pool we may be running in
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="akta-validation") as executor:
+                # Copy the context so stage listeners (job progress) follow the Akta pipeline
+                akta_future = executor.submit(contextvars.copy_context().run, self._timed, self.validate_akta, akta_path)
+                ktp_result, ktp_seconds = self._timed(self.validate_ktp, ktp_path)
+                akta_result, akta_seconds = akta_future.result()
+        else:
+            ktp_result, ktp_seconds = self._timed(self.validate_ktp, ktp_path)
+            akta_result, akta_seconds = self._timed(self.validate_akta, akta_path)
+        documents_seconds = time.perf_counter() - start_time
         
         # Generate comprehensive report
+        report_start = time.perf_counter()
         if ktp_result['success'] and akta_result['success']:
             try:
-                comprehensive_report = self.openai_validator.generate_validation_report(
+                comprehensive_report = self.stages.run(
+                    LLM,
+                    self.openai_validator.generate_validation_report,
                     ktp_result['validation_result'],
                     akta_result['validation_result']
                 )
@@ -277,11 +330,28 @@ class DocumentValidator:
                 "error": "One or both document validations failed"
             }
         
+        report_seconds = time.perf_counter() - report_start
+        
+        timing = {
+            "mode": "concurrent" if concurrent else "sequential",
+            "ktp_seconds": round(ktp_seconds, 3),
+            "akta_seconds": round(akta_seconds, 3),
+            "documents_seconds": round(documents_seconds, 3),
+            "report_seconds": round(report_seconds, 3),
+            "total_seconds": round(time.perf_counter() - start_time, 3),
+            # Time saved versus running the two document pipelines back to back
+            "overlap_seconds": round(max(0.0, ktp_seconds + akta_seconds - documents_seconds), 3)
+        }
+        self.logger.info(f"Comprehensive validation finished in {timing['total_seconds']}s "
+                         f"(KTP {timing['ktp_seconds']}s, Akta {timing['akta_seconds']}s, "
+                         f"report {timing['report_seconds']}s)")
+        
         return {
             "timestamp": datetime.now().isoformat(),
             "ktp_validation": ktp_result,
             "akta_validation": akta_result,
             "comprehensive_report": comprehensive_report,
+            "timing": timing,
             "success": ktp_result['success'] and akta_result['success']
         }
     
@@ -321,6 +391,7 @@ def main():
     parser.add_argument('--single', type=str, help='Path to single document file')
     parser.add_argument('--type', type=str, choices=['ktp', 'akta'], help='Document type for single document')
     parser.add_argument('--output', type=str, help='Output JSON file path')
+    parser.add_argument('--sequential', action='store_true', help='Validate KTP and Akta one after the other (for timing comparison)')
     
     args = parser.parse_args()
     
@@ -329,7 +400,7 @@ def main():
     try:
         if args.ktp and args.akta:
             # Validate both documents
-            result = validator.validate_documents(args.ktp, args.akta)
+            result = validator.validate_documents(args.ktp, args.akta, concurrent=not args.sequential)
         elif args.single:
             # Validate single document
             result = validator.validate_single_document(args.single, args.type)
@@ -0,0 +1,170 @@
+"""
+Micro-batching for EasyOCR recognition across concurrent requests
+"""
+import logging
+import math
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+from config import Config
+from model_registry import get_easyocr_reader
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingImage:
+    """Text-region crops of one image waiting for recognition"""
+
+    def __init__(self, crops: List[Tuple], future: Future):
+        self.crops = crops
+        self.future = future
+        self.results: List[Optional[Tuple]] = [None] * len(crops)
+
+
+class EasyOCRBatcher:
+    """Collects crops from in-flight images and recognizes them in shared batches
+
+    Detection runs in the caller's thread. Crops are queued, and a background
+    thread gathers them for up to max_wait_ms (or until max_batch_size crops are
+    pending) before running one recognizer pass. Results come back through futures
+    in the same (bbox, text, confidence) format as Reader.readtext.
+    """
+
+    def __init__(self, reader, max_batch_size: int = 32, max_wait_ms: float = 10.0):
+        from easyocr.utils import get_image_list, reformat_input
+        from easyocr.recognition import get_text
+
+        self.reader = reader
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._get_image_list = get_image_list
+        self._reformat_input = reformat_input
+        self._get_text = get_text
+        self._imgH = getattr(reader, 'imgH', 64)
+        self._ignore_char = ''.join(set(reader.character) - set(reader.lang_char))
+
+        self._stats = {'images': 0, 'crops': 0, 'batches': 0, 'recognize_seconds': 0.0}
+        self._queue: "queue.Queue[_PendingImage]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="easyocr-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, image) -> Future:
+        """Detect text regions now and queue them for batched recognition"""
+        future = Future()
+        try:
+            img, img_cv_grey = self._reformat_input(image)
+            horizontal_list, free_list = self.reader.detect(img, reformat=False)
+            image_list, _ = self._get_image_list(
+                horizontal_list[0], free_list[0], img_cv_grey, model_height=self._imgH
+            )
+        except Exception as e:
+            future.set_exception(e)
+            return future
+
+        if not image_list:
+            future.set_result([])
+            return future
+
+        self._queue.put(_PendingImage(image_list, future))
+        return future
+
+    def readtext(self, image, timeout: Optional[float] = None) -> List[Tuple]:
+        """Blocking equivalent of Reader.readtext(image, detail=1)"""
+        return self.submit(image).result(timeout=timeout)
+
+    def _collect(self) -> List[_PendingImage]:
+        """Wait for the first image, then gather more until the window closes"""
+        pending = [self._queue.get()]
+        crop_count = len(pending[0].crops)
+        deadline = time.monotonic() + self.max_wait
+
+        while crop_count < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending.append(item)
+            crop_count += len(item.crops)
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+            try:
+                self._recognize(pending)
+            except Exception as e:
+                logger.error(f"Batched EasyOCR recognition failed: {str(e)}")
+                for item in pending:
+                    if not item.future.done():
+                        item.future.set_exception(e)
+
+    def _recognize(self, pending: List[_PendingImage]):
+        # Sort crops by width so each recognizer batch pads to a similar width
+        crops = []
+        for owner, item in enumerate(pending):
+            for index, crop in enumerate(item.crops):
+                crops.append((crop[1].shape[1], owner, index, crop))
+        crops.sort(key=lambda entry: entry[0])
+
+        start_time = time.perf_counter()
+        for start in range(0, len(crops), self.max_batch_size):
+            chunk = crops[start:start + self.max_batch_size]
+            image_list = [entry[3] for entry in chunk]
+            # Same padding width get_image_list would pick for this set of crops
+            max_ratio = max(max(crop.shape[1] / crop.shape[0], 1.0) for _, crop in image_list)
+            results = self._get_text(
+                self.reader.character, self._imgH, int(math.ceil(max_ratio) * self._imgH),
+                self.reader.recognizer, self.reader.converter, image_list,
+                ignore_char=self._ignore_char, batch_size=len(image_list),
+                workers=0, device=self.reader.device
+            )
+            for (_, owner, index, _), result in zip(chunk, results):
+                pending[owner].results[index] = result
+
+        self._stats['images'] += len(pending)
+        self._stats['crops'] += len(crops)
+        self._stats['batches'] += 1
+        self._stats['recognize_seconds'] += time.perf_counter() - start_time
+
+        for item in pending:
+            item.future.set_result(item.results)
+
+    def stats(self) -> Dict:
+        """Batching statistics"""
+        batches = self._stats['batches']
+        return {
+            **self._stats,
+            'avg_images_per_batch': self._stats['images'] / batches if batches else 0.0,
+            'avg_crops_per_batch': self._stats['crops'] / batches if batches else 0.0,
+            'queued': self._queue.qsize()
+        }
+
+
+_batchers: Dict[Tuple, EasyOCRBatcher] = {}
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(languages: List[str] = ('id', 'en'), gpu: bool = True) -> EasyOCRBatcher:
+    """Shared batcher for the registry reader of a language set"""
+    key = (tuple(sorted(languages)), gpu)
+    with _batchers_lock:
+        batcher = _batchers.get(key)
+        if batcher is None:
+            batcher = EasyOCRBatcher(
+                get_easyocr_reader(languages, gpu),
+                max_batch_size=Config.EASYOCR_BATCH_SIZE,
+                max_wait_ms=Config.EASYOCR_BATCH_WAIT_MS
+            )
+            _batchers[key] = batcher
+        return batcher
+
+
+def batcher_stats() -> Dict:
+    """Stats for every active batcher"""
+    return {'+'.join(languages): batcher.stats() for (languages, _), batcher in _batchers.items()}
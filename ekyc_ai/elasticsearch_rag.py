@@ -1,4 +1,3 @@
-from elasticsearch import Elasticsearch
 from langchain_elasticsearch import ElasticsearchStore
 from langchain_openai import OpenAIEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
@@ -7,18 +6,15 @@ from typing import List, Dict, Optional
 import logging
 import json
 from config import Config
+from es_pool import get_es_client
 
 class ElasticsearchRAG:
     def __init__(self):
         self.config = Config()
         self.logger = logging.getLogger(__name__)
         
-        # Initialize Elasticsearch client
-        self.es_client = Elasticsearch(
-            [self.config.ELASTICSEARCH_URL],
-            basic_auth=(self.config.ELASTICSEARCH_USERNAME, self.config.ELASTICSEARCH_PASSWORD),
-            verify_certs=False
-        )
+        # Shared Elasticsearch client (one connection pool per cluster per process)
+        self.es_client = get_es_client()
         
         # Initialize embeddings
         self.embeddings = OpenAIEmbeddings(
@@ -6,77 +6,177 @@ Enhanced Image Processor untuk KTP dengan preprocessing kualitas rendah
 import cv2
 import numpy as np
 from PIL import Image, ImageEnhance, ImageFilter
-import easyocr
 import pytesseract
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
+import atexit
+import json
 import logging
 import os
+import random
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+
+from config import Config
+from model_registry import get_easyocr_reader
+from ocr_cache import OCRResultCache
+from easyocr_batcher import get_batcher
+from resolution import normalize_resolution
+
+# Preprocessing variants in their original (exhaustive) order
+VARIANT_METHODS = [
+    "original_gray", "denoised_sharpened", "clahe_enhanced", "otsu_threshold",
+    "adaptive_threshold", "morphological", "edge_enhanced", "histogram_equalized",
+    "bilateral_filtered", "unsharp_masked"
+]
+
+OCR_ENGINES = ["EasyOCR", "Tesseract"]
+
+# Document source names are client text and become keys in the persisted win counts
+SOURCE_PATTERN = re.compile(r"^[a-z0-9_-]{1,32}$")
+DEFAULT_SOURCE = "default"
+
+# Variants that usually help for a given image condition (used by adaptive search)
+VARIANT_PRIORS = {
+    "low_contrast": ["clahe_enhanced", "histogram_equalized", "adaptive_threshold"],
+    "blurry": ["unsharp_masked", "denoised_sharpened", "edge_enhanced"],
+    "noisy": ["bilateral_filtered", "denoised_sharpened", "otsu_threshold"],
+    "clean": ["original_gray", "otsu_threshold", "clahe_enhanced"]
+}
 
 class EnhancedImageProcessor:
-    def __init__(self):
+    def __init__(self, adaptive_target_score: Optional[float] = None,
+                 adaptive_max_passes: Optional[int] = None,
+                 variant_stats_path: Optional[str] = None,
+                 cache: Optional[OCRResultCache] = None,
+                 exploration: Optional[float] = None):
         self.logger = logging.getLogger(__name__)
-        self.easyocr_reader = easyocr.Reader(['id', 'en'])
+        
+        # Adaptive variant search settings
+        self.adaptive_target_score = adaptive_target_score if adaptive_target_score is not None else Config.KTP_ADAPTIVE_TARGET_SCORE
+        self.adaptive_max_passes = adaptive_max_passes if adaptive_max_passes is not None else Config.KTP_ADAPTIVE_MAX_PASSES
+        self.variant_stats_path = variant_stats_path if variant_stats_path is not None else Config.KTP_VARIANT_STATS_PATH
+        self.exploration = exploration if exploration is not None else Config.KTP_VARIANT_EXPLORATION
+        self._random = random.Random()
+        self._stats_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.variant_stats = self._load_variant_stats()
+        self._stats_dirty = False
+        self._stats_flushed_at = time.monotonic()
+        atexit.register(self.flush_variant_stats)
+        
+        # Results are cached by image content + pipeline config
+        if cache is None:
+            cache = OCRResultCache(
+                Config.OCR_CACHE_PATH,
+                max_bytes=Config.OCR_CACHE_MAX_MB * 1024 * 1024,
+                enabled=Config.OCR_CACHE_ENABLED
+            )
+        self.cache = cache
+        
+        # Recognize EasyOCR crops in batches shared with other in-flight requests
+        self.easyocr_batching = Config.EASYOCR_BATCHING
+        
+        # Downscale before building variants so phone photos are not filtered at full resolution
+        self.target_text_height = Config.OCR_TARGET_TEXT_HEIGHT
+        self.max_image_side = Config.OCR_MAX_IMAGE_SIDE
     
-    def enhance_image_quality(self, image_path: str) -> List[np.ndarray]:
-        """Apply multiple enhancement techniques to improve OCR accuracy"""
-        try:
-            # Read original image
-            original = cv2.imread(image_path)
-            if original is None:
-                raise ValueError("Cannot read image")
-            
-            enhanced_images = []
-            
+    @property
+    def easyocr_reader(self):
+        """Shared EasyOCR reader (Indonesian and English)"""
+        return get_easyocr_reader(['id', 'en'])
+    
+    def _build_variant(self, method_name: str, gray: np.ndarray, cache: Dict[str, np.ndarray],
+                       timings: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Build a single preprocessing variant from the grayscale image"""
+        if method_name in cache:
+            return cache[method_name]
+        
+        start_time = time.perf_counter()
+        if method_name == "original_gray":
             # 1. Original grayscale
-            gray = cv2.cvtColor(original, cv2.COLOR_BGR2GRAY)
-            enhanced_images.append(("original_gray", gray))
-            
+            variant = gray
+        elif method_name == "denoised_sharpened":
             # 2. Noise reduction + sharpening
             denoised = cv2.fastNlMeansDenoising(gray)
             kernel = np.array([[-1,-1,-1],
                               [-1, 9,-1],
                               [-1,-1,-1]])
-            sharpened = cv2.filter2D(denoised, -1, kernel)
-            enhanced_images.append(("denoised_sharpened", sharpened))
-            
+            variant = cv2.filter2D(denoised, -1, kernel)
+        elif method_name == "clahe_enhanced":
             # 3. Contrast enhancement (CLAHE)
             clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8,8))
-            clahe_enhanced = clahe.apply(gray)
-            enhanced_images.append(("clahe_enhanced", clahe_enhanced))
-            
+            variant = clahe.apply(gray)
+        elif method_name == "otsu_threshold":
             # 4. Gaussian blur + threshold
             blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-            _, thresh_otsu = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            enhanced_images.append(("otsu_threshold", thresh_otsu))
-            
+            _, variant = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        elif method_name == "adaptive_threshold":
             # 5. Adaptive threshold
-            adaptive_thresh = cv2.adaptiveThreshold(
+            variant = cv2.adaptiveThreshold(
                 gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
             )
-            enhanced_images.append(("adaptive_threshold", adaptive_thresh))
-            
+        elif method_name == "morphological":
             # 6. Morphological operations
             kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
-            morph = cv2.morphologyEx(thresh_otsu, cv2.MORPH_CLOSE, kernel)
-            enhanced_images.append(("morphological", morph))
-            
+            thresh_otsu = self._build_variant("otsu_threshold", gray, cache, timings)
+            variant = cv2.morphologyEx(thresh_otsu, cv2.MORPH_CLOSE, kernel)
+        elif method_name == "edge_enhanced":
             # 7. Edge enhancement
             edges = cv2.Canny(gray, 50, 150)
-            enhanced_edges = cv2.addWeighted(gray, 0.8, edges, 0.2, 0)
-            enhanced_images.append(("edge_enhanced", enhanced_edges))
-            
+            variant = cv2.addWeighted(gray, 0.8, edges, 0.2, 0)
+        elif method_name == "histogram_equalized":
             # 8. Histogram equalization
-            hist_eq = cv2.equalizeHist(gray)
-            enhanced_images.append(("histogram_equalized", hist_eq))
-            
+            variant = cv2.equalizeHist(gray)
+        elif method_name == "bilateral_filtered":
             # 9. Bilateral filter (preserves edges while reducing noise)
-            bilateral = cv2.bilateralFilter(gray, 9, 75, 75)
-            enhanced_images.append(("bilateral_filtered", bilateral))
-            
+            variant = cv2.bilateralFilter(gray, 9, 75, 75)
+        elif method_name == "unsharp_masked":
             # 10. Unsharp masking
             gaussian = cv2.GaussianBlur(gray, (0, 0), 2.0)
-            unsharp = cv2.addWeighted(gray, 1.5, gaussian, -0.5, 0)
-            enhanced_images.append(("unsharp_masked", unsharp))
+            variant = cv2.addWeighted(gray, 1.5, gaussian, -0.5, 0)
+        else:
+            raise ValueError(f"Unknown preprocessing method: {method_name}")
+        
+        cache[method_name] = variant
+        if timings is not None:
+            timings[f"variant_{method_name}"] = round(time.perf_counter() - start_time, 4)
+        return variant
+    
+    def _read_grayscale(self, image_path: str, timings: Optional[Dict[str, float]] = None,
+                        resolution: Optional[Dict[str, any]] = None) -> np.ndarray:
+        """Read image, convert to grayscale and downscale to the target text height
+        
+        Every variant is built from this one resized grayscale image.
+        """
+        start_time = time.perf_counter()
+        original = cv2.imread(image_path)
+        if original is None:
+            raise ValueError("Cannot read image")
+        gray = cv2.cvtColor(original, cv2.COLOR_BGR2GRAY)
+        decoded_time = time.perf_counter()
+        
+        gray, info = normalize_resolution(gray, self.target_text_height, self.max_image_side)
+        if timings is not None:
+            timings['decode'] = round(decoded_time - start_time, 4)
+            timings['normalize'] = round(time.perf_counter() - decoded_time, 4)
+        if resolution is not None:
+            resolution.update(info)
+        return gray
+    
+    def enhance_image_quality(self, image_path: str, timings: Optional[Dict[str, float]] = None,
+                              resolution: Optional[Dict[str, any]] = None) -> List[np.ndarray]:
+        """Apply multiple enhancement techniques to improve OCR accuracy"""
+        try:
+            gray = self._read_grayscale(image_path, timings, resolution)
+            
+            cache = {}
+            enhanced_images = [
+                (method_name, self._build_variant(method_name, gray, cache, timings))
+                for method_name in VARIANT_METHODS
+            ]
             
             self.logger.info(f"Generated {len(enhanced_images)} enhanced versions")
             return enhanced_images
@@ -85,8 +185,262 @@ class EnhancedImageProcessor:
             self.logger.error(f"Error enhancing image: {str(e)}")
             return []
     
-    def extract_text_multiple_methods(self, image_path: str) -> Dict[str, any]:
+    def compute_image_statistics(self, gray: np.ndarray) -> Dict[str, float]:
+        """Cheap contrast, blur and noise estimates on a downsampled copy"""
+        height, width = gray.shape[:2]
+        scale = 512.0 / max(height, width)
+        small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1 else gray
+        
+        contrast = float(small.std())
+        blur = float(cv2.Laplacian(small, cv2.CV_64F).var())  # Low variance = blurry
+        noise = float(np.mean(cv2.absdiff(small, cv2.medianBlur(small, 3))))
+        
+        return {'contrast': contrast, 'sharpness': blur, 'noise': noise}
+    
+    def _image_conditions(self, stats: Dict[str, float]) -> List[str]:
+        """Map image statistics to conditions used for ranking variants"""
+        conditions = []
+        if stats['contrast'] < 40:
+            conditions.append("low_contrast")
+        if stats['sharpness'] < 100:
+            conditions.append("blurry")
+        if stats['noise'] > 8:
+            conditions.append("noisy")
+        return conditions or ["clean"]
+    
+    def normalize_source(self, source: Optional[str]) -> str:
+        """Map a client-supplied document source to a bounded stats key (falls back to "default")"""
+        name = (source or "").strip().lower()
+        if not SOURCE_PATTERN.match(name):
+            return DEFAULT_SOURCE
+        if Config.KTP_VARIANT_SOURCES and name not in Config.KTP_VARIANT_SOURCES:
+            return DEFAULT_SOURCE
+        with self._stats_lock:
+            if name not in self.variant_stats and len(self.variant_stats) >= Config.KTP_VARIANT_MAX_SOURCES:
+                self.logger.warning(f"Variant stats already track {len(self.variant_stats)} sources, using default for {name}")
+                return DEFAULT_SOURCE
+        return name
+    
+    def rank_variant_passes(self, stats: Dict[str, float], source: str = "default") -> List[Tuple[str, str]]:
+        """Order (variant, engine) passes from most to least promising"""
+        conditions = self._image_conditions(stats)
+        
+        # Without exploration the learned leader is always tried first, so a variant that
+        # never won early could never catch up; a share of searches rank on priors alone
+        if self._random.random() < self.exploration:
+            wins = {}
+        else:
+            with self._stats_lock:
+                wins = dict(self.variant_stats.get(source, {}))
+        total_wins = sum(wins.values())
+        
+        scored = []
+        for position, method_name in enumerate(VARIANT_METHODS):
+            # Prior from image conditions: earlier entries in a prior list score higher
+            prior = 0.0
+            for condition in conditions:
+                preferred = VARIANT_PRIORS[condition]
+                if method_name in preferred:
+                    prior += 1.0 - preferred.index(method_name) * 0.2
+            
+            for engine_index, engine in enumerate(OCR_ENGINES):
+                key = f"{method_name}|{engine}"
+                # Learned win rate for this document source dominates once we have history
+                learned = wins.get(key, 0) / total_wins if total_wins else 0.0
+                score = prior + 3.0 * learned - engine_index * 0.1 - position * 0.01
+                scored.append((score, method_name, engine))
+        
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [(method_name, engine) for _, method_name, engine in scored]
+    
+    def _load_variant_stats(self) -> Dict[str, Dict[str, int]]:
+        """Load per-source variant win counts"""
+        if self.variant_stats_path and os.path.exists(self.variant_stats_path):
+            try:
+                with open(self.variant_stats_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                self.logger.warning(f"Could not load variant stats: {str(e)}")
+        return {}
+    
+    def record_variant_win(self, source: str, method_name: str, engine: str):
+        """Remember which variant produced the best result for a document source"""
+        key = f"{method_name}|{engine}"
+        with self._stats_lock:
+            source_stats = self.variant_stats.setdefault(source, {})
+            source_stats[key] = source_stats.get(key, 0) + 1
+            self._stats_dirty = True
+            due = time.monotonic() - self._stats_flushed_at >= Config.KTP_VARIANT_STATS_FLUSH_SECONDS
+        
+        if due:
+            self.flush_variant_stats()
+    
+    def flush_variant_stats(self):
+        """Write unsaved win counts to variant_stats_path (temp file + rename, so never half-written)"""
+        if not self.variant_stats_path:
+            return
+        with self._flush_lock:
+            with self._stats_lock:
+                if not self._stats_dirty:
+                    return
+                snapshot = json.dumps(self.variant_stats, indent=2)
+                self._stats_dirty = False
+                self._stats_flushed_at = time.monotonic()
+            
+            directory = os.path.dirname(self.variant_stats_path) or '.'
+            temp_path = None
+            try:
+                os.makedirs(directory, exist_ok=True)
+                fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(snapshot)
+                os.replace(temp_path, self.variant_stats_path)
+            except Exception as e:
+                self.logger.warning(f"Could not save variant stats: {str(e)}")
+                if temp_path and os.path.exists(temp_path):
+                    os.remove(temp_path)
+                with self._stats_lock:
+                    self._stats_dirty = True
+    
+    def _score_result(self, result: Dict) -> float:
+        """Quality score: text length * confidence * keyword bonus"""
+        keyword_bonus = self._calculate_keyword_bonus(result['full_text'])
+        return result['text_length'] * result['avg_confidence'] * keyword_bonus
+    
+    def extract_text_adaptive(self, image_path: str, source: str = "default",
+                              target_score: Optional[float] = None,
+                              max_passes: Optional[int] = None) -> Dict[str, any]:
+        """Try the most promising preprocessing variants first and stop once the score is good enough"""
+        source = self.normalize_source(source)
+        target_score = target_score if target_score is not None else self.adaptive_target_score
+        max_passes = max_passes if max_passes is not None else self.adaptive_max_passes
+        
+        try:
+            results = {
+                'success': False,
+                'extraction_results': [],
+                'best_result': None,
+                'confidence_scores': [],
+                'error': None
+            }
+            
+            timings = {}
+            resolution = {}
+            gray = self._read_grayscale(image_path, timings, resolution)
+            stats = self.compute_image_statistics(gray)
+            search_order = self.rank_variant_passes(stats, source)
+            
+            cache = {}
+            all_results = []
+            best = None
+            passes = 0
+            
+            for method_name, engine in search_order[:max_passes]:
+                passes += 1
+                enhanced_img = self._build_variant(method_name, gray, cache, timings)
+                
+                ocr_start = time.perf_counter()
+                if engine == "EasyOCR":
+                    result = self._extract_with_easyocr(enhanced_img, method_name)
+                else:
+                    result = self._extract_with_tesseract(enhanced_img, method_name)
+                timings[f"ocr_{method_name}_{engine}"] = round(time.perf_counter() - ocr_start, 4)
+                
+                if result['text_length'] == 0:
+                    continue
+                
+                result['quality_score'] = self._score_result(result)
+                all_results.append(result)
+                
+                if best is None or result['quality_score'] > best['quality_score']:
+                    best = result
+                
+                if best['quality_score'] >= target_score:
+                    break
+            
+            results['adaptive'] = {
+                'source': source,
+                'image_statistics': stats,
+                'passes': passes,
+                'max_passes': max_passes,
+                'target_score': target_score,
+                'target_reached': best is not None and best['quality_score'] >= target_score,
+                'search_order': [f"{m}+{e}" for m, e in search_order[:passes]]
+            }
+            results['stage_timings'] = timings
+            results['resolution'] = resolution
+            
+            if all_results:
+                all_results.sort(key=lambda x: x['quality_score'], reverse=True)
+                results['success'] = True
+                results['extraction_results'] = all_results
+                results['best_result'] = all_results[0]
+                results['confidence_scores'] = [r['avg_confidence'] for r in all_results]
+                self.record_variant_win(source, best['method'], best['ocr_engine'])
+                
+                self.logger.info(
+                    f"Adaptive OCR: {passes} passes, best {best['method']} + {best['ocr_engine']} "
+                    f"(score {best['quality_score']:.1f}, target {target_score})"
+                )
+            else:
+                results['error'] = "No text extracted from any method"
+            
+            return results
+            
+        except Exception as e:
+            self.logger.error(f"Error in adaptive extraction: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'extraction_results': [],
+                'best_result': None
+            }
+    
+    def pipeline_config(self, adaptive: bool, source: str) -> Dict[str, any]:
+        """Settings that affect extraction output, used in the cache key"""
+        config = {
+            'pipeline': 'enhanced_ktp_processor.extract_text_multiple_methods',
+            'version': 2,
+            'adaptive': adaptive,
+            'target_text_height': self.target_text_height,
+            'max_image_side': self.max_image_side
+        }
+        if adaptive:
+            config.update({
+                'source': source,
+                'target_score': self.adaptive_target_score,
+                'max_passes': self.adaptive_max_passes
+            })
+        return config
+    
+    def extract_text_multiple_methods(self, image_path: str, adaptive: bool = False,
+                                      source: str = "default",
+                                      content_hash: Optional[str] = None) -> Dict[str, any]:
         """Extract text using multiple preprocessing methods and OCR engines"""
+        source = self.normalize_source(source)
+        cache_key = None
+        if self.cache.enabled:
+            try:
+                cache_key = self.cache.key_for_file(image_path, self.pipeline_config(adaptive, source), content_hash)
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    cached['cache_hit'] = True
+                    return cached
+            except OSError as e:
+                self.logger.warning(f"OCR cache lookup skipped for {image_path}: {str(e)}")
+        
+        if adaptive:
+            results = self.extract_text_adaptive(image_path, source=source)
+        else:
+            results = self._extract_text_all_methods(image_path)
+        
+        if cache_key is not None and results.get('success'):
+            self.cache.put(cache_key, results)
+        results['cache_hit'] = False
+        return results
+    
+    def _extract_text_all_methods(self, image_path: str) -> Dict[str, any]:
+        """Try every preprocessing variant with both OCR engines"""
         try:
             results = {
                 'success': False,
@@ -97,7 +451,11 @@ class EnhancedImageProcessor:
             }
             
             # Get enhanced images
-            enhanced_images = self.enhance_image_quality(image_path)
+            timings = {}
+            resolution = {}
+            enhanced_images = self.enhance_image_quality(image_path, timings, resolution)
+            results['stage_timings'] = timings
+            results['resolution'] = resolution
             
             if not enhanced_images:
                 results['error'] = "Failed to enhance image"
@@ -107,12 +465,22 @@ class EnhancedImageProcessor:
             
             all_results = []
             
+            # Queue every variant up front so their crops share recognizer batches
+            pending_easyocr = {}
+            if self.easyocr_batching:
+                pending_easyocr = {
+                    method_name: self._submit_easyocr(enhanced_img)
+                    for method_name, enhanced_img in enhanced_images
+                }
+            
             for method_name, enhanced_img in enhanced_images:
                 print(f"   📸 Processing: {method_name}")
                 
                 # Try EasyOCR
                 try:
-                    easyocr_result = self._extract_with_easyocr(enhanced_img, method_name)
+                    easyocr_result = self._extract_with_easyocr(
+                        enhanced_img, method_name, pending_easyocr.get(method_name)
+                    )
                     if easyocr_result['text_length'] > 0:
                         all_results.append(easyocr_result)
                         print(f"      ✅ EasyOCR: {easyocr_result['text_length']} chars, conf: {easyocr_result['avg_confidence']:.2f}")
@@ -136,12 +504,7 @@ class EnhancedImageProcessor:
             if all_results:
                 # Calculate quality score: text_length * confidence * keyword_bonus
                 for result in all_results:
-                    keyword_bonus = self._calculate_keyword_bonus(result['full_text'])
-                    result['quality_score'] = (
-                        result['text_length'] * 
-                        result['avg_confidence'] * 
-                        keyword_bonus
-                    )
+                    result['quality_score'] = self._score_result(result)
                 
                 # Sort by quality score
                 all_results.sort(key=lambda x: x['quality_score'], reverse=True)
@@ -173,19 +536,30 @@ class EnhancedImageProcessor:
                 'best_result': None
             }
     
-    def _extract_with_easyocr(self, image: np.ndarray, method_name: str) -> Dict[str, any]:
+    def _submit_easyocr(self, image: np.ndarray) -> Future:
+        """Start EasyOCR on an image; batched across requests when enabled"""
+        # Pass the array straight to EasyOCR (no JPEG round-trip, nothing shared on disk)
+        if image.dtype != np.uint8:
+            image = cv2.convertScaleAbs(image)
+        image = np.ascontiguousarray(image)
+        
+        if self.easyocr_batching:
+            return get_batcher(['id', 'en']).submit(image)
+        
+        future = Future()
+        try:
+            future.set_result(self.easyocr_reader.readtext(image, detail=1))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    
+    def _extract_with_easyocr(self, image: np.ndarray, method_name: str,
+                              pending: Optional[Future] = None) -> Dict[str, any]:
         """Extract text using EasyOCR"""
         try:
-            # Save temp image for EasyOCR
-            temp_path = f"temp_{method_name}.jpg"
-            cv2.imwrite(temp_path, image)
-            
-            # Extract with EasyOCR
-            ocr_results = self.easyocr_reader.readtext(temp_path, detail=1)
-            
-            # Clean up temp file
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+            if pending is None:
+                pending = self._submit_easyocr(image)
+            ocr_results = pending.result()
             
             # Process results
             full_text = ""
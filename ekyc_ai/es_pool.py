@@ -0,0 +1,98 @@
+"""
+Shared Elasticsearch clients: one keep-alive connection pool per cluster in each process
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from elastic_transport import Urllib3HttpNode
+from elasticsearch import Elasticsearch
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_clients: Dict[Tuple, Elasticsearch] = {}
+_clients_lock = threading.Lock()
+_node_stats: Dict[str, Dict[str, Any]] = {}
+_stats_lock = threading.Lock()
+
+
+class InstrumentedNode(Urllib3HttpNode):
+    """urllib3 node that records request latency and concurrent requests"""
+
+    def perform_request(self, *args, **kwargs):
+        with _stats_lock:
+            stats = _node_stats.setdefault(self.base_url, {
+                'requests': 0, 'failed': 0, 'in_flight': 0, 'max_in_flight': 0, 'total_seconds': 0.0
+            })
+            stats['in_flight'] += 1
+            stats['max_in_flight'] = max(stats['max_in_flight'], stats['in_flight'])
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = super().perform_request(*args, **kwargs)
+            failed = False
+            return response
+        finally:
+            with _stats_lock:
+                stats['in_flight'] -= 1
+                stats['requests'] += 1
+                stats['total_seconds'] += time.perf_counter() - started
+                if failed:
+                    stats['failed'] += 1
+
+
+def get_es_client(url: Optional[str] = None, username: Optional[str] = None,
+                  password: Optional[str] = None) -> Elasticsearch:
+    """Get the shared client for a cluster (defaults to ELASTICSEARCH_URL), creating it on first use"""
+    url = url or Config.ELASTICSEARCH_URL
+    if username is None:
+        username, password = Config.ELASTICSEARCH_USERNAME, Config.ELASTICSEARCH_PASSWORD
+    key = (url, username)
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = Elasticsearch(
+                [url],
+                basic_auth=(username, password) if username else None,
+                verify_certs=False,
+                node_class=InstrumentedNode,
+                connections_per_node=Config.ES_CONNECTIONS_PER_NODE,
+                request_timeout=Config.ES_REQUEST_TIMEOUT,
+                max_retries=Config.ES_MAX_RETRIES,
+                retry_on_timeout=True
+            )
+            _clients[key] = client
+            logger.info(f"Created shared Elasticsearch client for {url}")
+        return client
+
+
+def close_clients():
+    """Close every shared client (application shutdown)"""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Clients per cluster plus request latency and pool utilisation per node"""
+    with _stats_lock:
+        nodes = {url: dict(stats) for url, stats in _node_stats.items()}
+    for stats in nodes.values():
+        requests = stats['requests'] or 1
+        stats['avg_ms'] = round(stats['total_seconds'] / requests * 1000, 1)
+        stats['utilisation'] = round(stats['in_flight'] / Config.ES_CONNECTIONS_PER_NODE, 2)
+        stats['total_seconds'] = round(stats['total_seconds'], 3)
+    with _clients_lock:
+        clusters = sorted({key[0] for key in _clients})
+    return {
+        'connections_per_node': Config.ES_CONNECTIONS_PER_NODE,
+        'clusters': clusters,
+        'clients': len(clusters),
+        'nodes': nodes
+    }
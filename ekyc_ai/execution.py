@@ -0,0 +1,159 @@
+"""
+Per-stage executors for the validation pipeline
+"""
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Whole validation runs (they mostly wait on the stages below)
+PIPELINE = 'pipeline'
+OCR = 'ocr'
+PDF = 'pdf'
+LLM = 'llm'
+INDEX = 'index'  # Elasticsearch lookups and indexing
+
+# Receives (stage, event) with event 'started', 'finished' or 'failed' for every
+# blocking stage run in the current context; background jobs use it for progress
+stage_listener: contextvars.ContextVar[Optional[Callable[[str, str], None]]] = \
+    contextvars.ContextVar('stage_listener', default=None)
+
+
+def _notify(stage: str, event: str):
+    listener = stage_listener.get()
+    if listener is None:
+        return
+    try:
+        listener(stage, event)
+    except Exception as e:
+        logger.warning(f"Stage listener failed on {stage} {event}: {str(e)}")
+
+
+class _Stage:
+    """One bounded thread pool plus its counters"""
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"stage-{name}")
+        self.lock = threading.Lock()
+        self.stats = {
+            'queued': 0,
+            'running': 0,
+            'max_queued': 0,
+            'completed': 0,
+            'failed': 0,
+            'wait_seconds': 0.0,
+            'run_seconds': 0.0
+        }
+
+
+class StageExecutor:
+    """Runs pipeline stages on per-stage thread pools with fixed concurrency
+
+    Blocking stages (OCR, PDF parsing, LLM calls, ES indexing) each get their
+    own pool, so a burst of slow LLM calls cannot starve OCR and vice versa.
+    Work submitted while a stage is at its limit waits in that stage's queue;
+    the queue depth is reported by stats().
+    """
+
+    def __init__(self, limits: Dict[str, int]):
+        self._stages = {name: _Stage(name, workers) for name, workers in limits.items()}
+        self._local = threading.local()
+
+    def _stage(self, name: str) -> _Stage:
+        stage = self._stages.get(name)
+        if stage is None:
+            raise ValueError(f"Unknown pipeline stage: {name}")
+        return stage
+
+    def _wrap(self, stage: _Stage, fn: Callable, args, kwargs) -> Callable:
+        submitted = time.perf_counter()
+
+        def call():
+            started = time.perf_counter()
+            with stage.lock:
+                stage.stats['queued'] -= 1
+                stage.stats['running'] += 1
+                stage.stats['wait_seconds'] += started - submitted
+            self._local.stage = stage.name
+            outcome = 'failed'
+            try:
+                result = fn(*args, **kwargs)
+                outcome = 'completed'
+            finally:
+                self._local.stage = None
+                with stage.lock:
+                    stage.stats['running'] -= 1
+                    stage.stats[outcome] += 1
+                    stage.stats['run_seconds'] += time.perf_counter() - started
+            return result
+
+        return call
+
+    def submit(self, name: str, fn: Callable, *args, **kwargs) -> Future:
+        """Queue fn on the stage's pool"""
+        stage = self._stage(name)
+        with stage.lock:
+            stage.stats['queued'] += 1
+            stage.stats['max_queued'] = max(stage.stats['max_queued'], stage.stats['queued'])
+        return stage.executor.submit(self._wrap(stage, fn, args, kwargs))
+
+    def run(self, name: str, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn on the stage's pool and wait for it
+
+        Called from inside the same stage, fn runs inline so a stage never
+        waits on its own (possibly full) pool.
+        """
+        _notify(name, 'started')
+        try:
+            if getattr(self._local, 'stage', None) == name:
+                result = fn(*args, **kwargs)
+            else:
+                result = self.submit(name, fn, *args, **kwargs).result()
+        except Exception:
+            _notify(name, 'failed')
+            raise
+        _notify(name, 'finished')
+        return result
+
+    async def run_async(self, name: str, fn: Callable, *args, **kwargs) -> Any:
+        """Await fn on the stage's pool without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(name, fn, *args, **kwargs))
+
+    def stats(self) -> Dict[str, Dict]:
+        """Concurrency limit, queue depth and timings per stage"""
+        report = {}
+        for name, stage in self._stages.items():
+            with stage.lock:
+                stats = dict(stage.stats)
+            # Wait and run time cover failed calls too
+            done = stats['completed'] + stats['failed'] or 1
+            report[name] = {
+                'max_workers': stage.max_workers,
+                'queued': stats['queued'],
+                'running': stats['running'],
+                'max_queued': stats['max_queued'],
+                'completed': stats['completed'],
+                'failed': stats['failed'],
+                'avg_wait_ms': round(stats['wait_seconds'] / done * 1000, 1),
+                'avg_run_ms': round(stats['run_seconds'] / done * 1000, 1)
+            }
+        return report
+
+
+# Shared by the API and DocumentValidator
+stage_executor = StageExecutor({
+    PIPELINE: Config.STAGE_PIPELINE_WORKERS,
+    OCR: Config.STAGE_OCR_WORKERS,
+    PDF: Config.STAGE_PDF_WORKERS,
+    LLM: Config.STAGE_LLM_WORKERS,
+    INDEX: Config.STAGE_INDEX_WORKERS
+})
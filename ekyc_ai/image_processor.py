@@ -1,17 +1,22 @@
 import logging
 import cv2
 import numpy as np
-import easyocr
 import pytesseract
 from PIL import Image
 from typing import Dict, List, Optional, Tuple
 import re
 
+from model_registry import get_easyocr_reader
+
 class ImageProcessor:
     def __init__(self):
-        self.ocr_reader = easyocr.Reader(['id', 'en'])  # Indonesian and English
         self.logger = logging.getLogger(__name__)
     
+    @property
+    def ocr_reader(self):
+        """Shared EasyOCR reader (Indonesian and English)"""
+        return get_easyocr_reader(['id', 'en'])
+    
     def preprocess_image(self, image_path: str) -> np.ndarray:
         """Preprocess image for better OCR results"""
         # Read image
@@ -0,0 +1,389 @@
+"""
+Background job queue untuk Document Validation
+Job disimpan di SQLite sehingga tetap ada setelah restart; worker thread menjalankan DocumentValidator
+"""
+import ipaddress
+import json
+import logging
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import urllib.parse
+import urllib.request
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from execution import stage_listener
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+# Finished jobs are pruned at most this often (seconds)
+PRUNE_INTERVAL = 3600
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised when too many jobs are already waiting"""
+
+
+def validate_webhook_url(url: str, allowed_hosts: Optional[Iterable[str]] = None):
+    """Raise ValueError unless url is an http(s) URL the server may POST to
+
+    With allowed_hosts, the host must be one of them. Otherwise every address
+    the host resolves to must be public (no loopback, private, link-local or
+    reserved ranges), so a webhook cannot reach internal services.
+    """
+    parsed = urllib.parse.urlparse(url)
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        raise ValueError("Webhook URL must be an http or https URL")
+    host = parsed.hostname.lower()
+
+    allowed_hosts = [allowed.lower() for allowed in allowed_hosts or []]
+    if allowed_hosts:
+        if host not in allowed_hosts:
+            raise ValueError(f"Webhook host {host} is not allowed")
+        return
+
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, parsed.port or None)}
+    except (socket.gaierror, UnicodeError):
+        raise ValueError(f"Webhook host {host} cannot be resolved")
+    for address in addresses:
+        if not ipaddress.ip_address(address.split('%')[0]).is_global:
+            raise ValueError(f"Webhook host {host} resolves to a non-public address")
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Webhooks are not followed through redirects, which could point at internal hosts"""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class JobQueue:
+    """Persistent job queue drained by a pool of worker threads
+
+    Handlers are registered per job kind and receive (files, params). Uploaded
+    files are moved into upload_dir so a job queued before a restart can still
+    run afterwards; jobs that were running when the process stopped are queued
+    again, up to max_attempts times. Finished jobs and their events are deleted
+    once they are older than retention_days (0 keeps them forever).
+    """
+
+    def __init__(self, path: str, upload_dir: str, workers: int = 2,
+                 max_queued: int = 200, max_attempts: int = 3,
+                 webhook_allowed_hosts: Optional[Iterable[str]] = None,
+                 retention_days: float = 7):
+        self.path = path
+        self.upload_dir = upload_dir
+        self.workers = workers
+        self.max_queued = max_queued
+        self.max_attempts = max_attempts
+        self.webhook_allowed_hosts = list(webhook_allowed_hosts or [])
+        self.retention_days = retention_days
+        self._pruned_at = 0.0
+        self._handlers: Dict[str, Callable[[Dict[str, str], Dict[str, Any]], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, stage TEXT, "
+                "files TEXT NOT NULL, params TEXT NOT NULL, webhook_url TEXT, result TEXT, error TEXT, "
+                "attempts INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL, "
+                "started_at REAL, finished_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs(finished_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_events ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT NOT NULL, stage TEXT NOT NULL, "
+                "event TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_job_events_job ON job_events(job_id, id)")
+            self._initialized = True
+        return conn
+
+    def register(self, kind: str, handler: Callable[[Dict[str, str], Dict[str, Any]], Dict[str, Any]]):
+        """Set the function that runs jobs of this kind"""
+        self._handlers[kind] = handler
+
+    def start(self):
+        """Requeue interrupted jobs and start the worker threads"""
+        if self._threads:
+            return
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, error = 'Interrupted too many times', finished_at = ? "
+                        "WHERE status = ? AND attempts >= ?",
+                        (FAILED, time.time(), RUNNING, self.max_attempts)
+                    )
+                    requeued = conn.execute(
+                        "UPDATE jobs SET status = ?, stage = NULL WHERE status = ?", (QUEUED, RUNNING)
+                    ).rowcount
+                self._prune(conn)
+            finally:
+                conn.close()
+        if requeued:
+            logger.info(f"Requeued {requeued} interrupted jobs")
+
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self._wake.set()
+        logger.info(f"Job queue started with {self.workers} workers ({self.path})")
+
+    def stop(self):
+        """Stop taking new jobs; running jobs are requeued on the next start"""
+        self._stopping.set()
+        self._wake.set()
+
+    def submit(self, kind: str, files: Dict[str, str], params: Optional[Dict[str, Any]] = None,
+               webhook_url: Optional[str] = None) -> Dict[str, Any]:
+        """Queue a job, taking ownership of the given files
+
+        Raises ValueError for an unknown kind or a webhook_url that fails
+        validate_webhook_url.
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if webhook_url:
+            validate_webhook_url(webhook_url, self.webhook_allowed_hosts)
+
+        job_id = uuid.uuid4().hex
+        os.makedirs(self.upload_dir, exist_ok=True)
+        stored = {}
+        for name, file_path in files.items():
+            target = os.path.join(self.upload_dir, f"{job_id}_{name}{os.path.splitext(file_path)[1]}")
+            shutil.move(file_path, target)
+            stored[name] = target
+
+        with self._lock:
+            conn = self._connect()
+            try:
+                queued = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+                if queued >= self.max_queued:
+                    for file_path in stored.values():
+                        os.remove(file_path)
+                    raise JobQueueFullError(f"{queued} jobs already queued")
+                with conn:
+                    conn.execute(
+                        "INSERT INTO jobs (id, kind, status, files, params, webhook_url, created_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (job_id, kind, QUEUED, json.dumps(stored), json.dumps(params or {}), webhook_url, time.time())
+                    )
+            finally:
+                conn.close()
+
+        self._wake.set()
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job status, current stage and (once finished) result"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                position = None
+                if row is not None and row['status'] == QUEUED:
+                    position = conn.execute(
+                        "SELECT COUNT(*) FROM jobs WHERE status = ? AND created_at < ?",
+                        (QUEUED, row['created_at'])
+                    ).fetchone()[0]
+            finally:
+                conn.close()
+        if row is None:
+            return None
+
+        job = {
+            'job_id': row['id'],
+            'kind': row['kind'],
+            'status': row['status'],
+            'stage': row['stage'],
+            'attempts': row['attempts'],
+            'created_at': row['created_at'],
+            'started_at': row['started_at'],
+            'finished_at': row['finished_at']
+        }
+        if position is not None:
+            job['queue_position'] = position
+        if row['result'] is not None:
+            job['result'] = json.loads(row['result'])
+        if row['error'] is not None:
+            job['error'] = row['error']
+        return job
+
+    def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent jobs, optionally filtered by status"""
+        query = "SELECT id, kind, status, stage, created_at, finished_at FROM jobs"
+        args: tuple = ()
+        if status:
+            query += " WHERE status = ?"
+            args = (status,)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        with self._lock:
+            conn = self._connect()
+            try:
+                rows = conn.execute(query, args + (limit,)).fetchall()
+            finally:
+                conn.close()
+        return [{'job_id': row['id'], 'kind': row['kind'], 'status': row['status'], 'stage': row['stage'],
+                 'created_at': row['created_at'], 'finished_at': row['finished_at']} for row in rows]
+
+    def events(self, job_id: str, after_id: int = 0) -> List[Dict[str, Any]]:
+        """Stage progress events of a job newer than after_id"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                rows = conn.execute(
+                    "SELECT id, stage, event, created_at FROM job_events WHERE job_id = ? AND id > ? ORDER BY id",
+                    (job_id, after_id)
+                ).fetchall()
+            finally:
+                conn.close()
+        return [dict(row) for row in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        """Job counts per status"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+            finally:
+                conn.close()
+        return {'workers': self.workers, 'max_queued': self.max_queued, **{row[0]: row[1] for row in rows}}
+
+    def _record_event(self, job_id: str, stage: str, event: str):
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT INTO job_events (job_id, stage, event, created_at) VALUES (?, ?, ?, ?)",
+                        (job_id, stage, event, time.time())
+                    )
+                    if event == 'started':
+                        conn.execute("UPDATE jobs SET stage = ? WHERE id = ?", (stage, job_id))
+            finally:
+                conn.close()
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        """Mark the oldest queued job as running and return it"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    row = conn.execute(
+                        "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+                    ).fetchone()
+                    if row is None:
+                        return None
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                        (RUNNING, time.time(), row['id'])
+                    )
+                return row
+            finally:
+                conn.close()
+
+    def _finish(self, job_id: str, status: str, result: Optional[Dict[str, Any]] = None,
+                error: Optional[str] = None):
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, stage = NULL, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                        (status, json.dumps(result, default=str) if result is not None else None,
+                         error, time.time(), job_id)
+                    )
+                if time.time() - self._pruned_at >= PRUNE_INTERVAL:
+                    self._prune(conn)
+            finally:
+                conn.close()
+
+    def _prune(self, conn: sqlite3.Connection):
+        """Delete finished jobs (and their events) older than retention_days; caller holds _lock"""
+        self._pruned_at = time.time()
+        if self.retention_days <= 0:
+            return
+        cutoff = time.time() - self.retention_days * 86400
+        with conn:
+            conn.execute(
+                "DELETE FROM job_events WHERE job_id IN "
+                "(SELECT id FROM jobs WHERE status IN (?, ?) AND finished_at < ?)",
+                (COMPLETED, FAILED, cutoff)
+            )
+            pruned = conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?", (COMPLETED, FAILED, cutoff)
+            ).rowcount
+        if pruned:
+            logger.info(f"Pruned {pruned} jobs finished more than {self.retention_days} days ago")
+
+    def _run(self):
+        while not self._stopping.is_set():
+            row = self._claim()
+            if row is None:
+                self._wake.wait(timeout=1.0)
+                self._wake.clear()
+                continue
+            self._run_job(row)
+
+    def _run_job(self, row: sqlite3.Row):
+        job_id = row['id']
+        files = json.loads(row['files'])
+        logger.info(f"Running {row['kind']} job {job_id}")
+
+        # Stage progress from DocumentValidator arrives through the stage listener
+        token = stage_listener.set(lambda stage, event: self._record_event(job_id, stage, event))
+        try:
+            result = self._handlers[row['kind']](files, json.loads(row['params']))
+            self._finish(job_id, COMPLETED, result=result)
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            self._finish(job_id, FAILED, error=str(e))
+        finally:
+            stage_listener.reset(token)
+            for file_path in files.values():
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+
+        if row['webhook_url']:
+            self._send_webhook(job_id, row['webhook_url'])
+
+    def _send_webhook(self, job_id: str, url: str):
+        """POST the finished job to its webhook (best effort)"""
+        payload = json.dumps(self.get(job_id), default=str).encode('utf-8')
+        request = urllib.request.Request(url, data=payload, headers={'Content-Type': 'application/json'})
+        try:
+            # Checked again: the host may resolve differently than at submit time
+            validate_webhook_url(url, self.webhook_allowed_hosts)
+            with urllib.request.build_opener(_NoRedirect).open(request, timeout=10):
+                pass
+            self._record_event(job_id, 'webhook', 'finished')
+        except Exception as e:
+            logger.warning(f"Webhook for job {job_id} failed: {str(e)}")
+            self._record_event(job_id, 'webhook', 'failed')
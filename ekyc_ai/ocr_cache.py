@@ -0,0 +1,168 @@
+"""
+OCR result cache untuk Document Validation
+Content-addressed cache (sha256 gambar + konfigurasi pipeline) dengan LRU eviction di disk
+Salinan yang sama ada di ekyc/ocr_cache.py: kedua aplikasi dipasang dan dijalankan terpisah
+(requirements, setup, bare import dari foldernya sendiri), jadi tidak berbagi paket. Ubah keduanya bersamaan.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _to_json(value):
+    """JSON fallback for numpy scalars and arrays inside OCR results"""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class OCRResultCache:
+    """Persistent OCR result cache bounded by total size on disk"""
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, enabled: bool = True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._initialized = False
+        self._metrics = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'errors': 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ocr_cache_access ON ocr_cache(last_access)")
+            self._initialized = True
+        return conn
+
+    @staticmethod
+    def hash_file(file_path: str) -> str:
+        """sha256 of the file contents"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_key(content_hash: str, pipeline: Dict[str, Any]) -> str:
+        """Combine content hash and pipeline config into a cache key"""
+        config = json.dumps(pipeline, sort_keys=True, default=str)
+        return hashlib.sha256(f"{content_hash}:{config}".encode('utf-8')).hexdigest()
+
+    def key_for_file(self, file_path: str, pipeline: Dict[str, Any],
+                     content_hash: Optional[str] = None) -> str:
+        """Cache key for a file, reusing a precomputed content hash when given"""
+        return self.make_key(content_hash or self.hash_file(file_path), pipeline)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a cached result, or None on miss"""
+        if not self.enabled:
+            return None
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    row = conn.execute("SELECT value FROM ocr_cache WHERE key = ?", (key,)).fetchone()
+                    if row is None:
+                        self._metrics['misses'] += 1
+                        return None
+                    conn.execute("UPDATE ocr_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+                    conn.commit()
+                finally:
+                    conn.close()
+                self._metrics['hits'] += 1
+            return json.loads(row[0])
+        except Exception as e:
+            self._metrics['errors'] += 1
+            logger.warning(f"OCR cache read failed: {e}")
+            return None
+
+    def put(self, key: str, value: Dict[str, Any]):
+        """Store a result and evict least recently used entries over the size limit"""
+        if not self.enabled:
+            return
+        try:
+            payload = json.dumps(value, default=_to_json)
+            now = time.time()
+            with self._lock:
+                conn = self._connect()
+                try:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO ocr_cache (key, value, size, created_at, last_access) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (key, payload, len(payload), now, now)
+                    )
+                    self._evict(conn)
+                    conn.commit()
+                finally:
+                    conn.close()
+                self._metrics['stores'] += 1
+        except Exception as e:
+            self._metrics['errors'] += 1
+            logger.warning(f"OCR cache write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM ocr_cache ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM ocr_cache WHERE key = ?", (key,))
+            total -= size
+            self._metrics['evictions'] += 1
+
+    def clear(self):
+        """Remove all cached results"""
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("DELETE FROM ocr_cache")
+                conn.commit()
+            finally:
+                conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process plus on-disk size"""
+        entries, size = 0, 0
+        if self.enabled:
+            try:
+                with self._lock:
+                    conn = self._connect()
+                    try:
+                        entries, size = conn.execute(
+                            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ocr_cache"
+                        ).fetchone()
+                    finally:
+                        conn.close()
+            except Exception as e:
+                logger.warning(f"OCR cache stats failed: {e}")
+
+        lookups = self._metrics['hits'] + self._metrics['misses']
+        return {
+            'enabled': self.enabled,
+            'entries': entries,
+            'size_bytes': size,
+            'max_bytes': self.max_bytes,
+            'hit_rate': self._metrics['hits'] / lookups if lookups else 0.0,
+            **self._metrics
+        }
@@ -1,27 +1,332 @@
 import PyPDF2
 import fitz  # PyMuPDF
-from typing import Dict, List
+import numpy as np
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import logging
+import multiprocessing
 import re
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 
+from config import Config
+from model_registry import get_easyocr_reader
+from easyocr_batcher import get_batcher
+
+# Structural markers of a notarial deed, scored by validate_akta_structure
+AKTA_INDICATORS = [
+    r'AKTA\s+(?:PENDIRIAN|PERUBAHAN)',
+    r'NOTARIS',
+    r'PERSEROAN\s+TERBATAS',
+    r'MODAL\s+DASAR',
+    r'ANGGARAN\s+DASAR'
+]
+
+
+# Akta field patterns, most specific first; the index of the matching pattern sets confidence
+AKTA_FIELD_PATTERNS = {
+    'nomor_akta': [
+        r'AKTA\s+(?:NO|NOMOR)\.?\s*(\d+)',
+        r'NOMOR\s*:\s*(\d+)',
+        r'NO\.\s*(\d+)'
+    ],
+    'tanggal_akta': [
+        r'(\d{1,2})\s+(Januari|Februari|Maret|April|Mei|Juni|Juli|Agustus|September|Oktober|November|Desember)\s+(\d{4})',
+        r'(\d{1,2})[-/](\d{1,2})[-/](\d{4})',
+        r'tanggal\s+(\d{1,2})\s+(\w+)\s+(\d{4})'
+    ],
+    # Company name (usually after "PT" or "CV")
+    'nama_perusahaan': [
+        r'PT\.?\s+([A-Z\s&]+?)(?:\s+Tbk|,|\n)',
+        r'CV\.?\s+([A-Z\s&]+?)(?:,|\n)',
+        r'PERSEROAN\s+TERBATAS\s+([A-Z\s&]+?)(?:,|\n)',
+        r'PT\s*[\"\']*([A-Z\s\.\-_]+?)[\"\']*\s*(?:INDONESIA|INA|IDN|\n)',
+        r'bernama\s+PT\.?\s*([A-Z\s&\.\-_]+?)(?:\s*\(|\s*berkedudukan|\n)'
+    ],
+    # Notary name - improved patterns for OCR text
+    'nama_notaris': [
+        r'saya[,\s]+([A-Z\s\.]+?)[,\s]+(?:Sarjana\s+Hukum|SH)',  # "Berhadapan dengan saya DANIEL PARGANDA MARPAUNG Sarjana Hukum"
+        r'Motaris\s+([A-Z\s\.]+?)(?:\s*,\s*SH|\s*berkedudukan)',  # "Motaris Daniel Parganda Marpaung, SH"
+        r'dari\s+Motaris\s+([A-Z\s\.]+?)(?:\s*,\s*SH|\n)',       # "dari Motaris Daniel Parganda Marpaung, SH"
+        r'dihadapan\s+dengan\s+saya\s+([A-Z\s\.]+?)\s+Sarjana',  # "dihadapan dengan saya DANIEL PARGANDA MARPAUNG Sarjana"
+        r'NOTARIS\s+([A-Z\s\.]{5,30})(?:\s+berkedudukan|\s+di\s+[A-Z])',  # More restrictive NOTARIS pattern
+    ],
+    # Address - improved for OCR text
+    'alamat_perusahaan': [
+        r'berkedudukan\s+di\s+([A-Za-z\s,]+?)(?:\n|,|\s+sesuai)',
+        r'alamat\s*:\s*([A-Za-z\s,\d\.]+?)(?:\n|,)',
+        r'domisili\s+di\s+([A-Za-z\s,]+?)(?:\n|,)',
+        r'bertempat\s+tinggal\s+di\s+([A-Za-z\s,\d\.]+?)(?:\s+jalan|\s+Rukun|\n)',
+        r'Jakarta[,\s]*([A-Za-z\s]+?)(?:\s*\d|\s*Kelurahan|\n)'
+    ],
+    # Capital/Modal - improved patterns for OCR text
+    'modal_dasar': [
+        r'MODAL\s+DASAR.*?Rp\.?\s*([\d,\.]+)',
+        r'modal\s+dasar.*?sebesar\s+Rp\.?\s*([\d,\.]+)',
+        r'Rp\.?\s*([\d,\.]+).*?modal\s+dasar',
+        r'Modal\s+dasar\s+Perseroan\s+berjumlah\s+Rp\.?\s*([\d,\.]+)',
+        r'berjumlah\s+Rp\.?\s*([\d,\.]+).*?(?:rupiah|juta)',
+        r'Rp\.\s*([\d,\.]+)\s*\([^)]*juta[^)]*rupiah\)'
+    ],
+    'bidang_usaha': [
+        r'MAKSUD\s+DAN\s+TUJUAN.*?(?:adalah|ialah)\s*([^\.]{20,200})',
+        r'BIDANG\s+USAHA.*?(?:adalah|ialah|meliputi)\s*([^\.]{20,200})',
+        r'KEGIATAN\s+USAHA.*?(?:adalah|ialah|meliputi)\s*([^\.]{20,200})',
+        r'usaha\s+(?:dalam\s+)?bidang\s+([^\.]{10,150})',
+        r'bergerak\s+(?:dalam\s+)?bidang\s+([^\.]{10,150})',
+        r'menjalankan\s+usaha.*?bidang\s+([^\.]{10,150})'
+    ],
+    'npwp': [
+        r'NPWP\s*[:\.]?\s*(\d{2}\.\d{3}\.\d{3}\.\d{1}-\d{3}\.\d{3})'
+    ]
+}
+
+# Fields whose value is the whole match rather than group 1
+AKTA_WHOLE_MATCH_FIELDS = {'tanggal_akta'}
+
+NOTARY_NAME_STOPWORDS = ['departemen', 'keputusan', 'nomor', 'penghadap', 'bertindak', 'tersebut', 'dengan', 'menerangkan']
+
+# A match whose value fails its check falls through to the next pattern
+AKTA_FIELD_CHECKS = {
+    'nama_perusahaan': lambda value: len(value) > 3,  # Minimal length check
+    'nama_notaris': lambda value: (5 <= len(value) <= 50 and  # Reasonable name length
+                                   not any(x in value.lower() for x in NOTARY_NAME_STOPWORDS) and
+                                   ' ' in value),  # Should contain at least one space (first + last name)
+    'alamat_perusahaan': lambda value: len(value) > 3,
+    'modal_dasar': lambda value: len(value) >= 3,  # Minimal check for reasonable amount
+    'bidang_usaha': lambda value: len(value) >= 10
+}
+
+# Directors and commissioners: every matching name is collected
+AKTA_PERSON_PATTERNS = {
+    'direktur': [
+        r'DIREKTUR\s+UTAMA[:\s]*([A-Z\s\.]+?)(?:\n|,|\s+berkedudukan)',
+        r'DIREKTUR[:\s]*([A-Z\s\.]+?)(?:\n|,|\s+yang)',
+        r'DIREKSI.*?terdiri.*?([A-Z\s\.]+?)(?:\s+sebagai|\n)',
+        r'Direktur\s+Utama\s*:\s*([A-Z\s\.]+?)(?:\n|,)',
+        r'menjadi\s+Direktur\s+([A-Z\s\.]+?)(?:\n|,|\s+dengan)'
+    ],
+    'komisaris': [
+        r'KOMISARIS\s+UTAMA[:\s]*([A-Z\s\.]+?)(?:\n|,|\s+berkedudukan)',
+        r'KOMISARIS[:\s]*([A-Z\s\.]+?)(?:\n|,|\s+yang)',
+        r'DEWAN\s+KOMISARIS.*?([A-Z\s\.]+?)(?:\s+sebagai|\n)',
+        r'Komisaris\s+Utama\s*:\s*([A-Z\s\.]+?)(?:\n|,)',
+        r'menjadi\s+Komisaris\s+([A-Z\s\.]+?)(?:\n|,|\s+dengan)'
+    ]
+}
+
+# Fields that must be confidently found before incremental extraction stops reading
+AKTA_REQUIRED_FIELDS = ['nomor_akta', 'tanggal_akta', 'nama_notaris', 'nama_perusahaan']
+
+
+def _empty_akta_fields() -> Dict[str, any]:
+    """Akta schema with nothing found yet"""
+    return {
+        'nomor_akta': None,
+        'tanggal_akta': None,
+        'nama_notaris': None,
+        'nama_perusahaan': None,
+        'modal_dasar': None,
+        'modal_disetor': None,
+        'alamat_perusahaan': None,
+        'direktur': [],
+        'komisaris': [],
+        'bidang_usaha': None,
+        'npwp': None
+    }
+
+
+def _search_akta_field(field: str, text: str) -> Optional[Tuple[str, int, int]]:
+    """First pattern of a field whose match passes its check: (value, pattern index, start)"""
+    check = AKTA_FIELD_CHECKS.get(field)
+    for index, pattern in enumerate(AKTA_FIELD_PATTERNS[field]):
+        match = re.search(pattern, text, re.IGNORECASE)
+        if not match:
+            continue
+        value = match.group(0) if field in AKTA_WHOLE_MATCH_FIELDS else match.group(1).strip()
+        if check is None or check(value):
+            return value, index, match.start()
+    return None
+
+
+def _find_akta_persons(field: str, text: str) -> List[str]:
+    """Every distinct director or commissioner name in text"""
+    names = []
+    for pattern in AKTA_PERSON_PATTERNS[field]:
+        for match in re.finditer(pattern, text, re.IGNORECASE):
+            name = match.group(1).strip()
+            if 5 <= len(name) <= 50 and ' ' in name and name not in names:
+                names.append(name)
+    return names
+
+
+def _pattern_confidence(pattern_index: int) -> float:
+    """1.0 for a field's first pattern, lower for the more generic fallbacks"""
+    return max(0.5, 1.0 - 0.15 * pattern_index)
+
+
+def _extract_page_range(pdf_path: str, start: int, end: int) -> List[Dict[str, any]]:
+    """Extract text of pages [start, end) in a worker process"""
+    doc = fitz.open(pdf_path)
+    try:
+        return [{'page': page_num + 1, 'text': doc.load_page(page_num).get_text()}
+                for page_num in range(start, min(end, len(doc)))]
+    finally:
+        doc.close()
+
+
+# Worker processes shared by every PDFProcessor, started on first large PDF
+_page_pool: Optional[ProcessPoolExecutor] = None
+_page_pool_lock = threading.Lock()
+
+
+def _get_page_pool() -> ProcessPoolExecutor:
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is None:
+            _page_pool = ProcessPoolExecutor(
+                max_workers=Config.PDF_PAGE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _page_pool
+
+
+# OCR threads for scanned pages; they share the registry reader (or its batcher)
+_ocr_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _get_ocr_pool() -> ThreadPoolExecutor:
+    global _ocr_pool
+    with _page_pool_lock:
+        if _ocr_pool is None:
+            _ocr_pool = ThreadPoolExecutor(max_workers=Config.PDF_OCR_WORKERS, thread_name_prefix="pdf-ocr")
+        return _ocr_pool
+
+
 class PDFProcessor:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
     
+    def iter_pages(self, pdf_path: str, parallel: Optional[bool] = None,
+                   ocr_scanned: bool = False) -> Iterator[Dict[str, any]]:
+        """Yield {'page', 'text'} per page, in page order, as pages are extracted
+
+        PDFs with at least PDF_PARALLEL_MIN_PAGES pages are split into chunks of
+        PDF_PAGE_CHUNK_SIZE pages and extracted across worker processes; early
+        chunks are yielded while later ones are still running. With ocr_scanned,
+        pages without a usable text layer are OCR'd (see _ocr_scanned_pages).
+        """
+        if ocr_scanned:
+            yield from self._ocr_scanned_pages(pdf_path, self.iter_pages(pdf_path, parallel))
+            return
+        
+        doc = fitz.open(pdf_path)
+        total_pages = len(doc)
+        if parallel is None:
+            parallel = Config.PDF_PAGE_WORKERS > 1 and total_pages >= Config.PDF_PARALLEL_MIN_PAGES
+
+        if not parallel:
+            try:
+                for page_num in range(total_pages):
+                    yield {'page': page_num + 1, 'text': doc.load_page(page_num).get_text()}
+            finally:
+                doc.close()
+            return
+
+        doc.close()
+        pool = _get_page_pool()
+        chunk_size = max(1, Config.PDF_PAGE_CHUNK_SIZE)
+        futures = [pool.submit(_extract_page_range, pdf_path, start, start + chunk_size)
+                   for start in range(0, total_pages, chunk_size)]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            # Consumer stopped early or a chunk failed: drop chunks not started yet
+            for future in futures:
+                future.cancel()
+    
+    def _ocr_scanned_pages(self, pdf_path: str, pages: Iterable[Dict[str, any]]) -> Iterator[Dict[str, any]]:
+        """Pass text-layer pages through and OCR the scanned ones, keeping page order
+
+        A page is scanned when its text layer has fewer than PDF_TEXT_LAYER_MIN_CHARS
+        characters. Scanned pages are rasterised here and OCR'd on the shared OCR
+        threads; at most PDF_OCR_WORKERS * 2 pages are held back waiting for OCR.
+        """
+        pool = _get_ocr_pool()
+        max_pending = Config.PDF_OCR_WORKERS * 2
+        pending: "deque[Tuple[Dict[str, any], Optional[Future]]]" = deque()
+        doc = None
+        try:
+            for page in pages:
+                if len(page['text'].strip()) >= Config.PDF_TEXT_LAYER_MIN_CHARS:
+                    page['method'] = 'text_layer'
+                    pending.append((page, None))
+                else:
+                    if doc is None:
+                        doc = fitz.open(pdf_path)
+                    image, dpi = self._rasterize_page(doc.load_page(page['page'] - 1))
+                    page.update(method='ocr', dpi=dpi)
+                    pending.append((page, pool.submit(self._ocr_page_image, image)))
+                
+                while pending and (pending[0][1] is None or pending[0][1].done() or len(pending) > max_pending):
+                    yield self._finish_page(*pending.popleft())
+            
+            while pending:
+                yield self._finish_page(*pending.popleft())
+        finally:
+            for _, future in pending:
+                if future is not None:
+                    future.cancel()
+            if doc is not None:
+                doc.close()
+    
+    def _ocr_dpi(self, page) -> int:
+        """DPI that renders the page's long side at about PDF_OCR_TARGET_LONG_SIDE pixels"""
+        long_side_inches = max(page.rect.width, page.rect.height) / 72.0
+        dpi = Config.PDF_OCR_TARGET_LONG_SIDE / long_side_inches if long_side_inches else Config.PDF_OCR_MAX_DPI
+        return int(min(max(dpi, Config.PDF_OCR_MIN_DPI), Config.PDF_OCR_MAX_DPI))
+    
+    def _rasterize_page(self, page) -> Tuple[np.ndarray, int]:
+        """Render a page to a grayscale array for OCR"""
+        dpi = self._ocr_dpi(page)
+        pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+        image = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)[:, :pix.width]
+        return image, dpi
+    
+    def _ocr_page_image(self, image: np.ndarray) -> Tuple[str, float]:
+        """OCR one rasterised page with the shared EasyOCR reader"""
+        if Config.EASYOCR_BATCHING:
+            ocr_results = get_batcher(['id', 'en']).readtext(image)
+        else:
+            ocr_results = get_easyocr_reader(['id', 'en']).readtext(image)
+        if not ocr_results:
+            return '', 0.0
+        text = " ".join(result[1] for result in ocr_results)
+        return text, sum(result[2] for result in ocr_results) / len(ocr_results)
+    
+    def _finish_page(self, page: Dict[str, any], future: Optional[Future]) -> Dict[str, any]:
+        """Wait for a page's OCR (if any) and fill in its text"""
+        if future is not None:
+            try:
+                page['text'], page['ocr_confidence'] = future.result()
+            except Exception as e:
+                self.logger.error(f"OCR failed on page {page['page']}: {str(e)}")
+                page['error'] = str(e)
+        return page
+    
+    def iter_pages_pypdf2(self, pdf_path: str) -> Iterator[Dict[str, any]]:
+        """Yield {'page', 'text'} per page using PyPDF2"""
+        with open(pdf_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            for page_num, page in enumerate(pdf_reader.pages):
+                yield {'page': page_num + 1, 'text': page.extract_text()}
+    
     def extract_text_pypdf2(self, pdf_path: str) -> Dict[str, any]:
         """Extract text using PyPDF2"""
         try:
-            text_content = []
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                for page_num, page in enumerate(pdf_reader.pages):
-                    text = page.extract_text()
-                    text_content.append({
-                        'page': page_num + 1,
-                        'text': text
-                    })
+            text_content = list(self.iter_pages_pypdf2(pdf_path))
             
             full_text = '\n'.join([page['text'] for page in text_content])
             
@@ -38,18 +343,7 @@ class PDFProcessor:
     def extract_text_pymupdf(self, pdf_path: str) -> Dict[str, any]:
         """Extract text using PyMuPDF"""
         try:
-            doc = fitz.open(pdf_path)
-            text_content = []
-            
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                text = page.get_text()
-                text_content.append({
-                    'page': page_num + 1,
-                    'text': text
-                })
-            
-            doc.close()
+            text_content = list(self.iter_pages(pdf_path))
             full_text = '\n'.join([page['text'] for page in text_content])
             
             return {
@@ -64,261 +358,184 @@ class PDFProcessor:
 
     def extract_text_with_ocr_fallback(self, file_path):
         """
-        Extract text from PDF with OCR fallback for scanned documents
+        Extract text from PDF, OCR-ing only the pages without a usable text layer
         Returns: dict with success, full_text, method, and other metadata
         """
-        # Try regular text extraction first
-        result = self.extract_text_pymupdf(file_path)
-        if result['success'] and result['full_text'].strip():
-            result['method'] = 'PyMuPDF'
-            return result
-        
-        # Try PyPDF2 as fallback
-        result = self.extract_text_pypdf2(file_path)
-        if result['success'] and result['full_text'].strip():
-            result['method'] = 'PyPDF2'
-            return result
-        
-        # If both fail, try OCR for scanned PDFs
         try:
-            import fitz  # PyMuPDF
-            import easyocr
-            import io
-            
-            print("🔍 Attempting OCR extraction for scanned PDF...")
-            
-            # Open PDF and convert to images
-            doc = fitz.open(file_path)
-            ocr_reader = easyocr.Reader(['en', 'id'])  # English and Indonesian
-            
-            all_text = []
-            total_chars = 0
-            total_pages = len(doc)
-            
-            for page_num in range(min(5, total_pages)):  # Process first 5 pages for speed
-                page = doc.load_page(page_num)
-                
-                # Convert page to image
-                mat = fitz.Matrix(2.0, 2.0)  # 2x zoom for better OCR
-                pix = page.get_pixmap(matrix=mat)
-                img_data = pix.tobytes("png")
-                
-                # Perform OCR
-                ocr_results = ocr_reader.readtext(img_data)
-                page_text = " ".join([result[1] for result in ocr_results])
-                
-                all_text.append(page_text)
-                total_chars += len(page_text)
-            
-            doc.close()
-            
-            full_text = '\n'.join(all_text)
-            
-            if total_chars > 50:  # Minimum threshold
-                print(f"✅ OCR successful - extracted {total_chars} characters from {min(5, total_pages)} pages")
-                return {
-                    'success': True,
-                    'full_text': full_text,
-                    'total_pages': total_pages,
-                    'method': 'OCR',
-                    'pages_processed': min(5, total_pages),
-                    'character_count': total_chars
-                }
-            else:
-                return {'success': False, 'error': 'OCR produced insufficient text'}
-                
-        except ImportError as e:
-            return {'success': False, 'error': f'OCR libraries not available: {e}'}
+            pages = list(self.iter_pages(file_path, ocr_scanned=True))
         except Exception as e:
-            return {'success': False, 'error': f'OCR failed: {e}'}
-    
-    def extract_akta_fields(self, text: str) -> Dict[str, any]:
-        """Extract specific fields from Akta document"""
-        akta_fields = {
-            'nomor_akta': None,
-            'tanggal_akta': None,
-            'nama_notaris': None,
-            'nama_perusahaan': None,
-            'modal_dasar': None,
-            'modal_disetor': None,
-            'alamat_perusahaan': None,
-            'direktur': [],
-            'komisaris': [],
-            'bidang_usaha': None,
-            'npwp': None
-        }
-        
-        # Nomor Akta pattern
-        akta_patterns = [
-            r'AKTA\s+(?:NO|NOMOR)\.?\s*(\d+)',
-            r'NOMOR\s*:\s*(\d+)',
-            r'NO\.\s*(\d+)'
-        ]
-        
-        for pattern in akta_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                akta_fields['nomor_akta'] = match.group(1)
-                break
-        
-        # Date patterns
-        date_patterns = [
-            r'(\d{1,2})\s+(Januari|Februari|Maret|April|Mei|Juni|Juli|Agustus|September|Oktober|November|Desember)\s+(\d{4})',
-            r'(\d{1,2})[-/](\d{1,2})[-/](\d{4})',
-            r'tanggal\s+(\d{1,2})\s+(\w+)\s+(\d{4})'
-        ]
-        
-        for pattern in date_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                akta_fields['tanggal_akta'] = match.group(0)
-                break
+            self.logger.warning(f"PyMuPDF extraction failed, trying PyPDF2: {str(e)}")
+            result = self.extract_text_pypdf2(file_path)
+            if result['success'] and result['full_text'].strip():
+                result['method'] = 'PyPDF2'
+                return result
+            return {'success': False, 'error': f"PDF extraction failed: {result.get('error', e)}"}
         
-        # Company name extraction (usually after "PT" or "CV")
-        company_patterns = [
-            r'PT\.?\s+([A-Z\s&]+?)(?:\s+Tbk|,|\n)',
-            r'CV\.?\s+([A-Z\s&]+?)(?:,|\n)',
-            r'PERSEROAN\s+TERBATAS\s+([A-Z\s&]+?)(?:,|\n)',
-            r'PT\s*[\"\']*([A-Z\s\.\-_]+?)[\"\']*\s*(?:INDONESIA|INA|IDN|\n)',
-            r'bernama\s+PT\.?\s*([A-Z\s&\.\-_]+?)(?:\s*\(|\s*berkedudukan|\n)'
-        ]
+        full_text = '\n'.join(page['text'] for page in pages)
+        ocr_pages = [page['page'] for page in pages if page['method'] == 'ocr']
+        total_chars = len(full_text.strip())
+        # Fully scanned PDFs need a minimum amount of OCR text
+        if not total_chars or (len(ocr_pages) == len(pages) and total_chars <= 50):
+            return {'success': False, 'error': 'PDF produced insufficient text'}
         
-        for pattern in company_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                company_name = match.group(1).strip()
-                if len(company_name) > 3:  # Minimal length check
-                    akta_fields['nama_perusahaan'] = company_name
-                    break
-        
-        # Notary name extraction - improved patterns for OCR text
-        notary_patterns = [
-            # Most specific patterns first to avoid false matches
-            r'saya[,\s]+([A-Z\s\.]+?)[,\s]+(?:Sarjana\s+Hukum|SH)',  # "Berhadapan dengan saya DANIEL PARGANDA MARPAUNG Sarjana Hukum"
-            r'Motaris\s+([A-Z\s\.]+?)(?:\s*,\s*SH|\s*berkedudukan)',  # "Motaris Daniel Parganda Marpaung, SH"
-            r'dari\s+Motaris\s+([A-Z\s\.]+?)(?:\s*,\s*SH|\n)',       # "dari Motaris Daniel Parganda Marpaung, SH"
-            r'dihadapan\s+dengan\s+saya\s+([A-Z\s\.]+?)\s+Sarjana',  # "dihadapan dengan saya DANIEL PARGANDA MARPAUNG Sarjana"
-            r'NOTARIS\s+([A-Z\s\.]{5,30})(?:\s+berkedudukan|\s+di\s+[A-Z])',  # More restrictive NOTARIS pattern
-        ]
-        
-        for pattern in notary_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                notary_name = match.group(1).strip()
-                # Better validation for notary names
-                if (len(notary_name) >= 5 and 
-                    len(notary_name) <= 50 and  # Reasonable name length
-                    not any(x in notary_name.lower() for x in ['departemen', 'keputusan', 'nomor', 'penghadap', 'bertindak', 'tersebut', 'dengan', 'menerangkan']) and
-                    ' ' in notary_name):  # Should contain at least one space (first + last name)
-                    akta_fields['nama_notaris'] = notary_name
-                    break
+        if not ocr_pages:
+            method = 'PyMuPDF'
+        elif len(ocr_pages) == len(pages):
+            method = 'OCR'
+        else:
+            method = 'PyMuPDF+OCR'
+        self.logger.info(f"Extracted {total_chars} characters from {len(pages)} pages "
+                         f"({len(ocr_pages)} OCR'd)")
         
-        # Address extraction - improved for OCR text
-        address_patterns = [
-            r'berkedudukan\s+di\s+([A-Za-z\s,]+?)(?:\n|,|\s+sesuai)',
-            r'alamat\s*:\s*([A-Za-z\s,\d\.]+?)(?:\n|,)',
-            r'domisili\s+di\s+([A-Za-z\s,]+?)(?:\n|,)',
-            r'bertempat\s+tinggal\s+di\s+([A-Za-z\s,\d\.]+?)(?:\s+jalan|\s+Rukun|\n)',
-            r'Jakarta[,\s]*([A-Za-z\s]+?)(?:\s*\d|\s*Kelurahan|\n)'
-        ]
-        
-        for pattern in address_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                address = match.group(1).strip()
-                if len(address) > 3:
-                    akta_fields['alamat_perusahaan'] = address
-                    break
-        
-        # Capital/Modal extraction - improved patterns for OCR text
-        modal_patterns = [
-            r'MODAL\s+DASAR.*?Rp\.?\s*([\d,\.]+)',
-            r'modal\s+dasar.*?sebesar\s+Rp\.?\s*([\d,\.]+)',
-            r'Rp\.?\s*([\d,\.]+).*?modal\s+dasar',
-            r'Modal\s+dasar\s+Perseroan\s+berjumlah\s+Rp\.?\s*([\d,\.]+)',
-            r'berjumlah\s+Rp\.?\s*([\d,\.]+).*?(?:rupiah|juta)',
-            r'Rp\.\s*([\d,\.]+)\s*\([^)]*juta[^)]*rupiah\)'
-        ]
+        return {
+            'success': True,
+            'pages': pages,
+            'full_text': full_text,
+            'total_pages': len(pages),
+            'method': method,
+            'ocr_pages': ocr_pages,
+            'pages_processed': len(pages),
+            'character_count': total_chars
+        }
+    
+    def extract_akta_fields(self, text: str) -> Dict[str, any]:
+        """Extract specific fields from Akta document"""
+        akta_fields = _empty_akta_fields()
         
-        for pattern in modal_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for field in AKTA_FIELD_PATTERNS:
+            match = _search_akta_field(field, text)
             if match:
-                modal_value = match.group(1)
-                if len(modal_value) >= 3:  # Minimal check for reasonable amount
-                    akta_fields['modal_dasar'] = modal_value
-                    break
-        
-        # Directors extraction
-        director_patterns = [
-            r'DIREKTUR\s+UTAMA[:\s]*([A-Z\s\.]+?)(?:\n|,|\s+berkedudukan)',
-            r'DIREKTUR[:\s]*([A-Z\s\.]+?)(?:\n|,|\s+yang)',
-            r'DIREKSI.*?terdiri.*?([A-Z\s\.]+?)(?:\s+sebagai|\n)',
-            r'Direktur\s+Utama\s*:\s*([A-Z\s\.]+?)(?:\n|,)',
-            r'menjadi\s+Direktur\s+([A-Z\s\.]+?)(?:\n|,|\s+dengan)'
-        ]
+                akta_fields[field] = match[0]
         
-        directors = []
-        for pattern in director_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                director_name = match.group(1).strip()
-                if (len(director_name) >= 5 and 
-                    len(director_name) <= 50 and
-                    ' ' in director_name and
-                    director_name not in directors):
-                    directors.append(director_name)
+        for field in AKTA_PERSON_PATTERNS:
+            akta_fields[field] = _find_akta_persons(field, text)
         
-        if directors:
-            akta_fields['direktur'] = directors
-        
-        # Commissioners extraction
-        commissioner_patterns = [
-            r'KOMISARIS\s+UTAMA[:\s]*([A-Z\s\.]+?)(?:\n|,|\s+berkedudukan)',
-            r'KOMISARIS[:\s]*([A-Z\s\.]+?)(?:\n|,|\s+yang)',
-            r'DEWAN\s+KOMISARIS.*?([A-Z\s\.]+?)(?:\s+sebagai|\n)',
-            r'Komisaris\s+Utama\s*:\s*([A-Z\s\.]+?)(?:\n|,)',
-            r'menjadi\s+Komisaris\s+([A-Z\s\.]+?)(?:\n|,|\s+dengan)'
-        ]
+        return akta_fields
+    
+    def extract_akta_fields_incremental(self, pages: Iterable[Dict[str, any]],
+                                        required_fields: Optional[List[str]] = None,
+                                        min_confidence: Optional[float] = None,
+                                        stop: bool = True) -> Dict[str, any]:
+        """Fill the akta schema page by page until required fields are confident
+
+        A field's confidence comes from which of its patterns matched (the
+        first, most specific pattern scores highest). A later page replaces a
+        value only with a more confident match. Once every required field has
+        at least min_confidence, the result is complete: with stop, reading
+        ends there (which also stops OCR of later pages when pages come from
+        iter_pages); without it, the required fields are no longer re-matched
+        but the other fields and the director/commissioner lists keep being
+        filled from every remaining page.
+        """
+        required_fields = required_fields or AKTA_REQUIRED_FIELDS
+        min_confidence = Config.AKTA_FIELD_MIN_CONFIDENCE if min_confidence is None else min_confidence
         
-        commissioners = []
-        for pattern in commissioner_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                commissioner_name = match.group(1).strip()
-                if (len(commissioner_name) >= 5 and 
-                    len(commissioner_name) <= 50 and
-                    ' ' in commissioner_name and
-                    commissioner_name not in commissioners):
-                    commissioners.append(commissioner_name)
+        akta_fields = _empty_akta_fields()
+        field_sources = {}
+        pages_read = []
+        tail = ''
+        complete = False
         
-        if commissioners:
-            akta_fields['komisaris'] = commissioners
+        for page in pages:
+            pages_read.append(page)
+            # Include the end of the previous page so matches across a page break are found
+            prefix = tail + '\n' if tail else ''
+            window = prefix + page['text']
+            
+            for field in AKTA_FIELD_PATTERNS:
+                current = field_sources.get(field)
+                if current and (current['confidence'] >= 1.0 or (complete and field in required_fields)):
+                    continue
+                match = _search_akta_field(field, window)
+                if not match:
+                    continue
+                value, pattern_index, start = match
+                confidence = _pattern_confidence(pattern_index)
+                if current is None or confidence > current['confidence']:
+                    akta_fields[field] = value
+                    field_sources[field] = {
+                        'page': page['page'] - 1 if start < len(prefix) else page['page'],
+                        'confidence': confidence
+                    }
+            
+            for field in AKTA_PERSON_PATTERNS:
+                for name in _find_akta_persons(field, window):
+                    if name not in akta_fields[field]:
+                        akta_fields[field].append(name)
+                        field_sources.setdefault(field, {'pages': []})['pages'].append(page['page'])
+            
+            tail = page['text'][-300:]
+            if not complete:
+                complete = all(field in field_sources and field_sources[field]['confidence'] >= min_confidence
+                               for field in required_fields)
+            if complete and stop:
+                break
         
-        # Business field extraction
-        business_patterns = [
-            r'MAKSUD\s+DAN\s+TUJUAN.*?(?:adalah|ialah)\s*([^\.]{20,200})',
-            r'BIDANG\s+USAHA.*?(?:adalah|ialah|meliputi)\s*([^\.]{20,200})',
-            r'KEGIATAN\s+USAHA.*?(?:adalah|ialah|meliputi)\s*([^\.]{20,200})',
-            r'usaha\s+(?:dalam\s+)?bidang\s+([^\.]{10,150})',
-            r'bergerak\s+(?:dalam\s+)?bidang\s+([^\.]{10,150})',
-            r'menjalankan\s+usaha.*?bidang\s+([^\.]{10,150})'
-        ]
+        return {
+            'fields': akta_fields,
+            'field_sources': field_sources,
+            'pages': pages_read,
+            'pages_read': len(pages_read),
+            'complete': complete
+        }
+    
+    def extract_akta_from_pdf(self, pdf_path: str, stop_early: Optional[bool] = None) -> Dict[str, any]:
+        """Stream an akta PDF (OCR-ing scanned pages) and extract the akta fields page by page
+
+        Returns the extract_text_with_ocr_fallback fields plus akta_fields,
+        field_sources, structure_validation and truncated. Every page is read
+        and matched unless stop_early (default AKTA_STOP_AT_REQUIRED_FIELDS) is
+        set, in which case reading and OCR stop once the required fields are
+        found and truncated tells whether later pages were skipped.
+        """
+        stop_early = Config.AKTA_STOP_AT_REQUIRED_FIELDS if stop_early is None else stop_early
+        page_stream = self.iter_pages(pdf_path, ocr_scanned=True)
+        try:
+            # Without stop_early every page is read and matched: directors and
+            # commissioners are usually listed late, and structure checks, the
+            # LLM and the index need the whole deed
+            extraction = self.extract_akta_fields_incremental(page_stream, stop=stop_early)
+            pages = extraction['pages']
+        except Exception as e:
+            self.logger.error(f"Incremental akta extraction failed: {str(e)}")
+            return {'success': False, 'error': str(e)}
+        finally:
+            # Cancels page chunks and OCR not started yet when reading stopped early
+            page_stream.close()
         
-        for pattern in business_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                business_field = match.group(1).strip()
-                if len(business_field) >= 10:
-                    akta_fields['bidang_usaha'] = business_field
-                    break
+        full_text = '\n'.join(page['text'] for page in pages)
+        if not full_text.strip():
+            return {'success': False, 'error': 'PDF produced insufficient text'}
         
-        # NPWP extraction
-        npwp_pattern = r'NPWP\s*[:\.]?\s*(\d{2}\.\d{3}\.\d{3}\.\d{1}-\d{3}\.\d{3})'
-        npwp_match = re.search(npwp_pattern, text, re.IGNORECASE)
-        if npwp_match:
-            akta_fields['npwp'] = npwp_match.group(1)
+        with fitz.open(pdf_path) as doc:
+            total_pages = len(doc)
+        ocr_pages = [page['page'] for page in pages if page['method'] == 'ocr']
+        if not ocr_pages:
+            method = 'PyMuPDF'
+        elif len(ocr_pages) == len(pages):
+            method = 'OCR'
+        else:
+            method = 'PyMuPDF+OCR'
+        truncated = len(pages) < total_pages
+        self.logger.info(f"Akta fields {'complete' if extraction['complete'] else 'incomplete'} "
+                         f"after {extraction['pages_read']} pages, read {len(pages)} of {total_pages} pages")
         
-        return akta_fields
+        return {
+            'success': True,
+            'pages': pages,
+            'full_text': full_text,
+            'total_pages': total_pages,
+            'method': method,
+            'ocr_pages': ocr_pages,
+            'pages_processed': len(pages),
+            'truncated': truncated,
+            'character_count': len(full_text.strip()),
+            'akta_fields': extraction['fields'],
+            'field_sources': extraction['field_sources'],
+            'fields_complete': extraction['complete'],
+            # Stops scanning at the first pages that satisfy every structure check
+            'structure_validation': self.validate_akta_structure_pages(pages)
+        }
     
     def validate_akta_structure(self, text: str) -> Dict[str, any]:
         """Validate if the document has proper akta structure"""
@@ -331,20 +548,12 @@ class PDFProcessor:
         }
         
         # Check for akta indicators
-        akta_indicators = [
-            r'AKTA\s+(?:PENDIRIAN|PERUBAHAN)',
-            r'NOTARIS',
-            r'PERSEROAN\s+TERBATAS',
-            r'MODAL\s+DASAR',
-            r'ANGGARAN\s+DASAR'
-        ]
-        
         found_indicators = 0
-        for indicator in akta_indicators:
+        for indicator in AKTA_INDICATORS:
             if re.search(indicator, text, re.IGNORECASE):
                 found_indicators += 1
         
-        validation_results['confidence_score'] = found_indicators / len(akta_indicators)
+        validation_results['confidence_score'] = found_indicators / len(AKTA_INDICATORS)
         
         # Specific validations
         validation_results['has_akta_number'] = bool(re.search(r'AKTA.*NOMOR|NOMOR.*AKTA', text, re.IGNORECASE))
@@ -353,3 +562,38 @@ class PDFProcessor:
         validation_results['has_legal_structure'] = bool(re.search(r'ANGGARAN\s+DASAR|MODAL\s+DASAR', text, re.IGNORECASE))
         
         return validation_results
+    
+    def validate_akta_structure_pages(self, pages: Iterable[Dict[str, any]]) -> Dict[str, any]:
+        """validate_akta_structure over a page stream, stopping once every check has passed
+
+        Each page is checked together with the tail of the previous one so
+        indicators split across a page break are still found.
+        """
+        checks = {
+            'has_akta_number': False,
+            'has_notary_name': False,
+            'has_company_info': False,
+            'has_legal_structure': False
+        }
+        found_indicators = set()
+        pages_read = 0
+        tail = ''
+        
+        for page in pages:
+            pages_read += 1
+            window = tail + '\n' + page['text']
+            result = self.validate_akta_structure(window)
+            for key in checks:
+                checks[key] = checks[key] or result[key]
+            found_indicators.update(indicator for indicator in AKTA_INDICATORS
+                                    if re.search(indicator, window, re.IGNORECASE))
+            tail = page['text'][-200:]
+            
+            if all(checks.values()) and len(found_indicators) == len(AKTA_INDICATORS):
+                break
+        
+        return {
+            **checks,
+            'confidence_score': len(found_indicators) / len(AKTA_INDICATORS),
+            'pages_read': pages_read
+        }
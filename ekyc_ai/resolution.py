@@ -0,0 +1,62 @@
+"""
+Resolution normalisation untuk Document Validation
+Perkecil gambar ke tinggi teks target sebelum preprocessing yang mahal
+Salinan yang sama ada di ekyc/resolution.py: kedua aplikasi dipasang dan dijalankan terpisah
+(requirements, setup, bare import dari foldernya sendiri), jadi tidak berbagi paket. Ubah keduanya bersamaan.
+"""
+import cv2
+import numpy as np
+from typing import Dict, Any, Optional, Tuple
+
+# Size of the thumbnail used to estimate text height
+PROBE_SIDE = 1000
+
+
+def estimate_text_height(gray: np.ndarray) -> Optional[float]:
+    """Estimate the median character height in pixels from connected components"""
+    height, width = gray.shape[:2]
+    scale = min(1.0, PROBE_SIDE / max(height, width))
+    probe = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1 else gray
+
+    _, binary = cv2.threshold(probe, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    if count <= 1:
+        return None
+
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    # Character-like blobs: not specks, not lines or photo regions
+    glyphs = heights[(heights >= 4) & (heights <= probe.shape[0] * 0.2) & (widths <= heights * 3)]
+    if len(glyphs) < 10:
+        return None
+
+    return float(np.median(glyphs)) / scale
+
+
+def normalize_resolution(image: np.ndarray, target_text_height: float = 32,
+                         max_side: int = 2500) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """Downscale so text is about target_text_height pixels tall (never upscales)
+
+    Falls back to capping the long side at max_side when no text height can be
+    estimated. Returns the resized image and what was done.
+    """
+    height, width = image.shape[:2]
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+
+    text_height = estimate_text_height(gray)
+    scale = 1.0
+    if text_height:
+        scale = min(scale, target_text_height / text_height)
+    scale = min(scale, max_side / max(height, width))
+
+    info = {
+        'original_size': [width, height],
+        'estimated_text_height': round(text_height, 1) if text_height else None,
+        'scale': round(scale, 3)
+    }
+    if scale >= 0.95:
+        info['scale'] = 1.0
+        return image, info
+
+    resized = cv2.resize(image, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+    return resized, info
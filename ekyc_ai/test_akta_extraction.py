@@ -0,0 +1,84 @@
+"""
+Test script untuk incremental akta extraction (required fields early, directors late)
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add current directory to path
+sys.path.append(str(Path(__file__).parent))
+
+import fitz  # PyMuPDF
+
+from pdf_processor import PDFProcessor
+
+FIRST_PAGE = (
+    "AKTA PENDIRIAN\n"
+    "AKTA NOMOR 12\n"
+    "Pada hari ini, 1 Januari 2020\n"
+    "Berhadapan dengan saya DANIEL PARGANDA MARPAUNG Sarjana Hukum\n"
+    "mendirikan PT MAJU JAYA,\n"
+)
+FILLER_PAGE = "Pasal 1\nNama dan tempat kedudukan perseroan diatur dalam anggaran dasar ini.\n"
+LAST_PAGE = (
+    "Pasal 20\n"
+    "DIREKTUR UTAMA: BUDI SANTOSO\n"
+    "KOMISARIS UTAMA: SITI AMINAH\n"
+)
+
+processor = PDFProcessor()
+
+
+def build_akta_pdf(path: str, filler_pages: int = 3):
+    """Required fields on page 1, directors and commissioners on the last page"""
+    doc = fitz.open()
+    for text in [FIRST_PAGE] + [FILLER_PAGE] * filler_pages + [LAST_PAGE]:
+        page = doc.new_page()
+        page.insert_text((72, 72), text, fontsize=10)
+    doc.save(path)
+    doc.close()
+
+
+def _with_akta_pdf(check):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "akta.pdf")
+        build_akta_pdf(path)
+        check(path)
+
+
+def test_late_directors_are_extracted():
+    """Reading the whole deed keeps matching people after the required fields are found"""
+    def check(path):
+        result = processor.extract_akta_from_pdf(path, stop_early=False)
+        assert result['success'], result
+        assert result['fields_complete']
+        assert not result['truncated']
+        assert result['pages_processed'] == result['total_pages'] == 5
+        assert result['field_sources']['nomor_akta']['page'] == 1
+        assert 'BUDI SANTOSO' in result['akta_fields']['direktur']
+        assert 'SITI AMINAH' in result['akta_fields']['komisaris']
+        assert result['field_sources']['direktur']['pages'] == [5]
+
+    _with_akta_pdf(check)
+
+
+def test_stop_early_reports_truncation():
+    """stop_early stops after page 1 and says later pages were skipped"""
+    def check(path):
+        result = processor.extract_akta_from_pdf(path, stop_early=True)
+        assert result['success'], result
+        assert result['fields_complete']
+        assert result['truncated']
+        assert result['pages_processed'] == 1
+        assert result['akta_fields']['nomor_akta'] == '12'
+        assert result['akta_fields']['direktur'] == []
+
+    _with_akta_pdf(check)
+
+
+if __name__ == "__main__":
+    print("=== Akta Extraction Test ===")
+    for test in (test_late_directors_are_extracted, test_stop_early_reports_truncation):
+        test()
+        print(f"✅ {test.__name__}")
@@ -15,6 +15,7 @@ The MLOps layer (knowledge versioning) sits on top via `KnowledgeBase`.
 from __future__ import annotations
 import hashlib
 import json
+import logging
 import re
 import time
 from dataclasses import dataclass, field
@@ -22,10 +23,13 @@ from pathlib import Path
 from typing import Iterable, List, Dict, Any, Optional
 
 import numpy as np
-from elasticsearch import Elasticsearch
+from elasticsearch import AuthorizationException, BadRequestError, Elasticsearch
+from elasticsearch.helpers import parallel_bulk
 from rank_bm25 import BM25Okapi
 
 
+logger = logging.getLogger(__name__)
+
 EMBED_DIM = 384
 
 
@@ -203,13 +207,21 @@ class KnowledgeBase:
 INDEX_NAME = "ekyc_kb_ablation"
 
 
+_ES_CLIENT: Optional[Elasticsearch] = None
+
+
 def _es_client() -> Elasticsearch:
-    return Elasticsearch(
-        "http://localhost:9200",
-        basic_auth=("elastic", "changeme"),
-        request_timeout=30,
-        verify_certs=False,
-    )
+    """Process-wide client, so repeated index_kb calls reuse one keep-alive pool."""
+    global _ES_CLIENT
+    if _ES_CLIENT is None:
+        _ES_CLIENT = Elasticsearch(
+            "http://localhost:9200",
+            basic_auth=("elastic", "changeme"),
+            request_timeout=30,
+            connections_per_node=10,
+            verify_certs=False,
+        )
+    return _ES_CLIENT
 
 
 def ensure_index(es: Elasticsearch) -> None:
@@ -234,25 +246,105 @@ def ensure_index(es: Elasticsearch) -> None:
     es.indices.create(index=INDEX_NAME, body=mapping)
 
 
-def index_kb(kb: KnowledgeBase, es: Optional[Elasticsearch] = None) -> Elasticsearch:
-    es = es or _es_client()
-    ensure_index(es)
+def _bulk_actions(kb: KnowledgeBase) -> Iterable[Dict[str, Any]]:
     for entry in kb.entries:
-        es.index(
-            index=INDEX_NAME,
-            id=entry.doc_id,
-            document={
+        yield {
+            "_index": INDEX_NAME,
+            "_id": entry.doc_id,
+            "_source": {
                 "doc_id": entry.doc_id,
                 "doc_type": entry.doc_type,
                 "version": entry.version,
                 "text": entry.text,
                 "embedding": deterministic_embed(entry.text),
             },
+        }
+
+
+def index_kb(
+    kb: KnowledgeBase,
+    es: Optional[Elasticsearch] = None,
+    chunk_size: int = 500,
+    thread_count: int = 4,
+) -> Elasticsearch:
+    """(Re)create the KB index and load every entry through the _bulk API.
+
+    Entries are sent `chunk_size` per request with `thread_count` requests in
+    flight. Periodic refresh is disabled during the load and restored
+    afterwards, followed by a single refresh. Per-item failures are collected
+    and raised together so an ablation never runs on a partial KB.
+    """
+    es = es or _es_client()
+    ensure_index(es)
+    es.indices.put_settings(index=INDEX_NAME, settings={"index": {"refresh_interval": "-1"}})
+    failures: List[Dict[str, Any]] = []
+    try:
+        for ok, item in parallel_bulk(
+            es,
+            _bulk_actions(kb),
+            chunk_size=chunk_size,
+            thread_count=thread_count,
+            raise_on_error=False,
+            raise_on_exception=False,
+        ):
+            if not ok:
+                failures.append(item)
+    finally:
+        es.indices.put_settings(index=INDEX_NAME, settings={"index": {"refresh_interval": None}})
+        es.indices.refresh(index=INDEX_NAME)
+    if failures:
+        raise RuntimeError(
+            f"{len(failures)} of {len(kb.entries)} KB entries failed to index: {failures[:3]}"
         )
-    es.indices.refresh(index=INDEX_NAME)
     return es
 
 
+# None until the first hybrid query tells us whether the cluster supports RRF retrievers
+_NATIVE_RRF: Optional[bool] = None
+RRF_K = 60
+# Error text that means the cluster cannot run RRF retrievers at all (old version or licence)
+_RRF_UNSUPPORTED_MARKERS = ("unknown field", "unknown key", "unknown retriever", "license", "non-compliant")
+
+
+def _rrf_unsupported(exc: Exception) -> bool:
+    """True when the error is about the retriever/RRF feature, not about this query."""
+    text = f"{getattr(exc, 'message', '')} {getattr(exc, 'body', '')}".lower()
+    return (any(marker in text for marker in _RRF_UNSUPPORTED_MARKERS)
+            and ("retriever" in text or "rrf" in text))
+
+
+def _retrieve_hybrid_native(es: Elasticsearch, query: str, k: int) -> List[Dict[str, Any]]:
+    """BM25 + dense kNN fused by Elasticsearch's RRF retriever in one request.
+
+    Uses the same windows (k * 2 per ranker) and rank constant as the
+    client-side fusion below, so both paths rank documents identically up to
+    ties.
+    """
+    body = {
+        "retriever": {
+            "rrf": {
+                "retrievers": [
+                    {"standard": {"query": {"match": {"text": query}}}},
+                    {
+                        "knn": {
+                            "field": "embedding",
+                            "query_vector": deterministic_embed(query),
+                            "k": k * 2,
+                            "num_candidates": max(k * 8, 30),
+                        }
+                    },
+                ],
+                "rank_window_size": k * 2,
+                "rank_constant": RRF_K,
+            }
+        },
+        "_source": ["doc_id", "doc_type", "version", "text"],
+        "size": k,
+    }
+    res = es.search(index=INDEX_NAME, body=body)
+    return [h["_source"] for h in res["hits"]["hits"]]
+
+
 def retrieve(
     es: Elasticsearch,
     query: str,
@@ -263,7 +355,9 @@ def retrieve(
 
     mode = 'none' returns an empty context.
     mode = 'dense' performs cosine kNN only.
-    mode = 'hybrid' fuses BM25 and dense via reciprocal rank fusion (RRF).
+    mode = 'hybrid' fuses BM25 and dense via reciprocal rank fusion (RRF),
+    natively in one request when the cluster supports RRF retrievers and
+    client-side over two requests otherwise.
     """
     if mode == "none":
         return []
@@ -281,6 +375,17 @@ def retrieve(
         res = es.search(index=INDEX_NAME, body=body)
         return [h["_source"] for h in res["hits"]["hits"]]
     if mode == "hybrid":
+        global _NATIVE_RRF
+        if _NATIVE_RRF is not False:
+            try:
+                return _retrieve_hybrid_native(es, query, k)
+            except (BadRequestError, AuthorizationException) as exc:
+                if _rrf_unsupported(exc):
+                    # Cluster without the retrievers API (< 8.14) or without an RRF licence
+                    _NATIVE_RRF = False
+                    logger.warning("Native RRF unavailable (%s); using client-side fusion", exc.meta.status)
+                else:
+                    logger.warning("Native RRF failed for this query (%s); using client-side fusion", exc)
         bm25_body = {
             "query": {"match": {"text": query}},
             "_source": ["doc_id", "doc_type", "version", "text"],
@@ -298,10 +403,10 @@ def retrieve(
             "size": k * 2,
         }
         dense_hits = es.search(index=INDEX_NAME, body=dense_body)["hits"]["hits"]
-        # RRF fusion
+        # RRF fusion (client-side fallback)
         scores: Dict[str, float] = {}
         sources: Dict[str, Dict[str, Any]] = {}
-        rrf_k = 60
+        rrf_k = RRF_K
         for rank, h in enumerate(bm25_hits):
             doc_id = h["_source"]["doc_id"]
             scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (rrf_k + rank + 1)